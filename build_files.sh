@@ -0,0 +1,6 @@
+#!/bin/sh
+# Vercel build step, see vercel.json: collects the static files into staticfiles/,
+# which the Python function bundles and serves through WhiteNoise
+set -e
+python3 -m pip install -r requirements.txt
+STATIC_MANIFEST=1 python3 manage.py collectstatic --noinput --clear
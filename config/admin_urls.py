@@ -0,0 +1,6 @@
+from django.contrib import admin
+
+# Imported when an admin URL is first resolved or reversed, see config/urls.py
+admin.autodiscover()
+
+urlpatterns = admin.site.get_urls()
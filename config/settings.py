@@ -11,12 +11,41 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+import importlib.util
 import os
 import dotenv
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 dotenv.load_dotenv()
+
+
+def env_bool(name, default=False):
+    """Read a boolean flag such as 1/true/yes/on from the environment"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == '':
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_int(name, default):
+    """Read an integer from the environment, 'none' maps to None"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == '':
+        return default
+    if value.strip().lower() == 'none':
+        return None
+    return int(value)
+
+
+def env_float(name, default):
+    """Read a float from the environment"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == '':
+        return default
+    return float(value)
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
@@ -24,7 +53,7 @@ dotenv.load_dotenv()
 SECRET_KEY = 'django-insecure-em4-*f8q+4@&ts3rr!%v*rwn&g32h1k96=yx5w-bw4*0r=y4j='
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env_bool('DEBUG', True)
 
 ALLOWED_HOSTS = ['.vercel.app', 'localhost','127.0.0.1']
 
@@ -32,7 +61,8 @@ ALLOWED_HOSTS = ['.vercel.app', 'localhost','127.0.0.1']
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Admin without autodiscovery at startup, config/admin_urls.py loads it on first use
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -42,11 +72,18 @@ INSTALLED_APPS = [
     'countryapp',
     # third party app
     'rest_framework',
+    'rest_framework.authtoken',
     'drf_spectacular',
 ]
 
 MIDDLEWARE = [
+    'countryapp.middleware.ServerTimingMiddleware',
+    'countryapp.middleware.PrometheusMetricsMiddleware',
+    'countryapp.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Answers /static/ requests before the rest of the stack runs
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'countryapp.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,6 +96,8 @@ ROOT_URLCONF = 'config.urls'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
+# Flag thumbnails and the cells of the flag sprite sheet, see `mirror_assets`
+FLAG_THUMBNAIL_SIZE = (48, 32)
 
 TEMPLATES = [
     {
@@ -89,6 +128,35 @@ WSGI_APPLICATION = 'config.wsgi.application'
 #     }
 # }
 
+# Connection management
+# Persistent connections are kept open for DATABASE_CONN_MAX_AGE seconds
+# ('none' keeps them forever, 0 reconnects on every request) and are checked
+# before reuse when DATABASE_CONN_HEALTH_CHECKS is on. DATABASE_POOL switches
+# to a psycopg 3 connection pool instead, which replaces persistent connections.
+HAS_PSYCOPG3 = importlib.util.find_spec('psycopg') is not None
+
+DATABASE_POOL = env_bool('DATABASE_POOL')
+DATABASE_CONN_MAX_AGE = 0 if DATABASE_POOL else env_int('DATABASE_CONN_MAX_AGE', 60)
+DATABASE_CONN_HEALTH_CHECKS = env_bool('DATABASE_CONN_HEALTH_CHECKS', True)
+
+DATABASE_OPTIONS = {
+    'connect_timeout': env_int('DATABASE_CONNECT_TIMEOUT', 5),
+}
+if DATABASE_POOL:
+    DATABASE_OPTIONS['pool'] = {
+        'min_size': env_int('DATABASE_POOL_MIN_SIZE', 1),
+        'max_size': env_int('DATABASE_POOL_MAX_SIZE', 10),
+        'timeout': env_float('DATABASE_POOL_TIMEOUT', 10.0),
+        'max_idle': env_float('DATABASE_POOL_MAX_IDLE', 300.0),
+        'max_lifetime': env_float('DATABASE_POOL_MAX_LIFETIME', 3600.0),
+    }
+if HAS_PSYCOPG3:
+    # Server-side prepared statements are a psycopg 3 feature; a query is
+    # prepared after it has run DATABASE_PREPARE_THRESHOLD times on a connection.
+    # Leave it unset when running behind a transaction-mode pgbouncer.
+    DATABASE_OPTIONS['prepare_threshold'] = env_int('DATABASE_PREPARE_THRESHOLD', None)
+    DATABASE_OPTIONS['server_side_binding'] = env_bool('DATABASE_SERVER_SIDE_BINDING')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -96,10 +164,72 @@ DATABASES = {
         'USER': os.environ.get('DATABASE_USER'),
         'PASSWORD': os.environ.get('DATABASE_PASSWORD'),
         'HOST': os.environ.get('DATABASE_HOST'),
-        'PORT': 5432
+        'PORT': env_int('DATABASE_PORT', 5432),
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DATABASE_CONN_HEALTH_CHECKS,
+        'OPTIONS': DATABASE_OPTIONS,
     }
 }
 
+# Read replicas
+# DATABASE_REPLICAS is a comma separated list of [postgres://][user[:password]@]host[:port][/name]
+# entries (use ?host=/path for a unix socket). Anything left out is taken from the
+# primary. Safe API requests read from a random replica, writes always go to the
+# primary, and a client that just wrote stays on the primary for
+# DATABASE_REPLICA_STICKY_SECONDS so it reads its own writes.
+DATABASE_REPLICAS = []
+for index, entry in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), start=1):
+    entry = entry.strip()
+    replica_url = urlsplit(entry if '//' in entry else f'//{entry}')
+    replica_query = parse_qs(replica_url.query)
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': replica_url.path.lstrip('/') or DATABASES['default']['NAME'],
+        'USER': replica_url.username or DATABASES['default']['USER'],
+        'PASSWORD': replica_url.password or DATABASES['default']['PASSWORD'],
+        'HOST': replica_query.get('host', [replica_url.hostname])[0] or DATABASES['default']['HOST'],
+        'PORT': replica_url.port or DATABASES['default']['PORT'],
+        'OPTIONS': {**DATABASE_OPTIONS},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['countryapp.routers.PrimaryReplicaRouter']
+DATABASE_REPLICA_STICKY_SECONDS = env_int('DATABASE_REPLICA_STICKY_SECONDS', 10)
+DATABASE_REPLICA_PIN_COOKIE = 'db_primary_pin'
+
+# Cache
+# Local memory per process by default; set REDIS_URL (requires `pip install redis`)
+# to share the cache between worker processes.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+# Cached country data is keyed by a dataset version that every write changes, the
+# timeout only bounds staleness in other processes when the cache isn't shared
+COUNTRY_CACHE_SECONDS = env_int('COUNTRY_CACHE_SECONDS', 300)
+# Concurrent misses of a cached entry wait for the one request building it. With a shared
+# cache a lock (held at most this long) also makes other processes wait; 0 disables it.
+CACHE_COALESCE_LOCK_SECONDS = env_int('CACHE_COALESCE_LOCK_SECONDS', 10 if REDIS_URL else 0)
+# Serve the entry of the previous dataset version while the new one is being built
+CACHE_STALE_WHILE_REVALIDATE = env_bool('CACHE_STALE_WHILE_REVALIDATE', True)
+# Most items a bulk lookup (phone number resolution, postal code validation) takes per request
+BULK_LOOKUP_MAX_ITEMS = env_int('BULK_LOOKUP_MAX_ITEMS', 50000)
+# Largest distance matrix (rows x columns) the distances endpoint computes
+DISTANCE_MATRIX_MAX_CELLS = env_int('DISTANCE_MATRIX_MAX_CELLS', 1000000)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -139,6 +269,29 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# With STATIC_MANIFEST on, `collectstatic` writes every file under a content hashed
+# name together with .gz and .br variants, templates link the hashed names, and
+# WhiteNoise serves them from STATIC_ROOT, picking the variant the client accepts;
+# hashed names are cached for a year as immutable. It has to be on both when
+# collecting and when serving, vercel.json sets it for the build and the function.
+# Off, files are served from STATICFILES_DIRS as they are, so development and
+# tests need no collectstatic.
+STATIC_MANIFEST = env_bool('STATIC_MANIFEST')
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'countryapp.storage.HashedStaticFilesStorage' if STATIC_MANIFEST
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+WHITENOISE_USE_FINDERS = not STATIC_MANIFEST
+WHITENOISE_AUTOREFRESH = DEBUG
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -147,11 +300,19 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework settings
 REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'countryapp.authentication.CachedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 100,
+    # JSON unless the Accept header or ?format= asks for one of the compact formats
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
+        'countryapp.renderers.MessagePackRenderer',
+        'countryapp.renderers.CBORRenderer',
+        'countryapp.renderers.ColumnarJSONRenderer',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
@@ -166,12 +327,93 @@ SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
     'SCHEMA_PATH_PREFIX': r'/api/',
 }
+# Pre-generated schema served by /api/schema/; `manage.py check --deploy` and the
+# tests fail when it no longer matches the views. Without it the schema is generated
+# once per process.
+OPENAPI_SCHEMA_FILE = BASE_DIR / 'countryapp' / 'openapi.json'
+
+# Cold start
+# With WARMUP_ON_STARTUP config/wsgi.py connects to the databases, loads the URLconf
+# and API views and caches the first page of countries before serving requests, so
+# the first request doesn't pay for it. WARMUP_SCHEMA also loads the OpenAPI schema.
+# Profile the startup with: python manage.py profile_startup
+WARMUP_ON_STARTUP = env_bool('WARMUP_ON_STARTUP')
+WARMUP_SCHEMA = env_bool('WARMUP_SCHEMA')
+
+# Performance instrumentation
+# With PERFORMANCE_SERVER_TIMING every response gets a Server-Timing header with
+# query count, DB, serializer and render time. It tells any client how the request
+# hit the database, so it is off unless DEBUG is on. PERFORMANCE_LOG_JSON also writes one JSON line per request to the
+# 'countryapp.performance' logger; for a PERFORMANCE_QUERY_SAMPLE_RATE share of
+# requests the individual SQL timings are added when slower than
+# PERFORMANCE_SLOW_REQUEST_MS.
+PERFORMANCE_INSTRUMENTATION = env_bool('PERFORMANCE_INSTRUMENTATION', True)
+PERFORMANCE_SERVER_TIMING = env_bool('PERFORMANCE_SERVER_TIMING', DEBUG)
+PERFORMANCE_LOG_JSON = env_bool('PERFORMANCE_LOG_JSON')
+PERFORMANCE_SLOW_REQUEST_MS = env_float('PERFORMANCE_SLOW_REQUEST_MS', 500.0)
+PERFORMANCE_QUERY_SAMPLE_RATE = env_float('PERFORMANCE_QUERY_SAMPLE_RATE', 0.0)
+
+# Response compression
+# API, static and metrics responses of at least COMPRESSION_MIN_SIZE bytes are sent
+# with brotli or gzip, whichever the client's Accept-Encoding prefers. Compressed
+# bodies of responses served from the country cache are cached next to them.
+COMPRESSION_MIN_SIZE = env_int('COMPRESSION_MIN_SIZE', 1024)
+COMPRESSION_GZIP_LEVEL = env_int('COMPRESSION_GZIP_LEVEL', 6)
+COMPRESSION_BROTLI_QUALITY = env_int('COMPRESSION_BROTLI_QUALITY', 5)
+
+# Prometheus metrics
+# /metrics is public unless METRICS_AUTH_TOKEN is set, in which case scrapers must
+# send it as a bearer token. For multiple worker processes point
+# PROMETHEUS_MULTIPROC_DIR at a shared, empty directory before starting them.
+METRICS_AUTH_TOKEN = os.environ.get('METRICS_AUTH_TOKEN')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'performance': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'countryapp.performance': {
+            'handlers': ['performance'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
 
 # Authentication settings
+# Users and API tokens are looked up in the cache before the database. Changes to
+# a user clear its cache entry, but only in the cache of the process that made them,
+# so users are only cached when the cache is shared. A deleted token stays valid in
+# other processes for at most AUTH_TOKEN_CACHE_SECONDS unless the cache is shared.
+AUTHENTICATION_BACKENDS = [
+    'countryapp.authentication.CachedModelBackend',
+    # Keeps sessions created before the cached backend was introduced valid
+    'django.contrib.auth.backends.ModelBackend',
+]
+AUTH_USER_CACHE_SECONDS = env_int('AUTH_USER_CACHE_SECONDS', 300 if REDIS_URL else 0)
+AUTH_TOKEN_CACHE_SECONDS = env_int('AUTH_TOKEN_CACHE_SECONDS', 60)
 LOGIN_REDIRECT_URL = 'home'  # Where to redirect after login
 LOGOUT_REDIRECT_URL = 'login'  # Where to redirect after logout
 
 # Session settings
+# SESSION_BACKEND: db (default), cached_db (database with a cache in front), cache
+# (cache only, sessions are lost when it is cleared) or signed_cookies (no server
+# side storage at all)
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('SESSION_BACKEND', 'db')]
 SESSION_COOKIE_AGE = 86400  # 24 hours in seconds
 SESSION_COOKIE_SECURE = True  # Use secure cookies if using HTTPS
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True  # Session expires when browser closes
\ No newline at end of file
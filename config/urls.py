@@ -14,16 +14,15 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+from django.views.generic import RedirectView
+
+from countryapp.startup import lazy_include
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    lazy_include('admin/', 'config.admin_urls', namespace='admin'),
     path('', include('countryapp.urls')),
-    # drf-spectacular URLs
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    # Optional UI:
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    # The schema and its UIs are routed in countryapp/urls.py, these are old aliases
+    path('api/docs/', RedirectView.as_view(pattern_name='swagger-ui', permanent=True)),
+    path('api/redoc/', RedirectView.as_view(pattern_name='redoc', permanent=True)),
 ]
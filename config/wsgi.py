@@ -15,4 +15,10 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
 
+from django.conf import settings  # noqa: E402
+
+if settings.WARMUP_ON_STARTUP:
+    from countryapp.startup import warm_up
+    warm_up()
+
 app = application
\ No newline at end of file
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CountryappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'countryapp'
+
+    def ready(self):
+        # Connects the signal handlers that invalidate cached users and tokens,
+        # and registers the OpenAPI schema check
+        from . import authentication, caching, checks  # noqa: F401
@@ -0,0 +1,91 @@
+"""Local copies of the flag and coat of arms images, see the mirror_assets command
+
+Files are stored in the default storage under ASSET_PREFIX with names derived from
+their content, so they can be cached forever and are never overwritten. The views
+use asset_url() on every request, so Pillow is only imported by the functions that
+process images, not with the module.
+"""
+import hashlib
+import io
+import math
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+ASSET_PREFIX = 'countries'
+
+# What Pillow raises for data it can't read as an image, UnidentifiedImageError being an OSError
+IMAGE_ERRORS = (OSError, SyntaxError, ValueError)
+
+
+def hashed_name(folder, data, extension='.png'):
+    """Return the storage name of data: its folder and a digest of its content"""
+    return f'{ASSET_PREFIX}/{folder}/{hashlib.sha256(data).hexdigest()[:16]}{extension}'
+
+
+def store(folder, data, extension='.png'):
+    """Save data under its hashed name unless it is already stored; return the name"""
+    name = hashed_name(folder, data, extension)
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(data))
+    return name
+
+
+def asset_url(name, fallback=None):
+    """Return the URL of a stored asset, or fallback when it isn't mirrored"""
+    return default_storage.url(name) if name else fallback
+
+
+def source_path(source_dir, url):
+    """Return where a local mirror of the upstream keeps url: <source_dir>/<host>/<path>"""
+    parts = urlsplit(url)
+    return Path(source_dir, parts.netloc, parts.path.lstrip('/'))
+
+
+def to_png(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def verify_image(data):
+    """Raise one of IMAGE_ERRORS unless data is an image Pillow can read"""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.verify()
+
+
+def make_thumbnail(data, size=None):
+    """Return data shrunk to fit in size (width, height), keeping its aspect ratio, as PNG"""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert('RGBA')
+        image.thumbnail(size or settings.FLAG_THUMBNAIL_SIZE, Image.LANCZOS)
+        return to_png(image)
+
+
+def build_sprite(thumbnails, cell_size=None):
+    """Pack PNG thumbnails into one sprite sheet
+
+    thumbnails maps keys to PNG data. Returns the sheet as PNG and a dict mapping
+    each key to the {'x', 'y', 'width', 'height'} of its image in the sheet.
+    """
+    from PIL import Image
+
+    cell_width, cell_height = cell_size or settings.FLAG_THUMBNAIL_SIZE
+    columns = max(1, math.ceil(math.sqrt(len(thumbnails))))
+    rows = max(1, math.ceil(len(thumbnails) / columns))
+    sheet = Image.new('RGBA', (columns * cell_width, rows * cell_height), (0, 0, 0, 0))
+
+    offsets = {}
+    for index, (key, data) in enumerate(sorted(thumbnails.items())):
+        x, y = (index % columns) * cell_width, (index // columns) * cell_height
+        with Image.open(io.BytesIO(data)) as image:
+            sheet.paste(image, (x, y))
+            offsets[key] = {'x': x, 'y': y, 'width': image.width, 'height': image.height}
+    return to_png(sheet), offsets
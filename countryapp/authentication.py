@@ -0,0 +1,114 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .metrics import record_cache_lookup
+
+USER_CACHE_KEY = 'auth:user:{}'
+TOKEN_CACHE_KEY = 'auth:token:{}'
+
+
+def token_cache_key(key):
+    """Return the cache key of an API token; only a digest of the token is stored"""
+    return TOKEN_CACHE_KEY.format(hashlib.sha256(key.encode()).hexdigest())
+
+
+def get_user(user_id):
+    UserModel = get_user_model()
+    try:
+        return UserModel._default_manager.get(pk=user_id)
+    except UserModel.DoesNotExist:
+        return None
+
+
+def get_cached_user(user_id):
+    """Return the user with user_id from the cache or the database, or None
+
+    Only the user's fields without the password hash are cached, along with the
+    session auth hash derived from it. The password is loaded as a deferred field
+    if something reads it, and save() leaves it alone.
+    """
+    UserModel = get_user_model()
+    if not settings.AUTH_USER_CACHE_SECONDS:
+        return get_user(user_id)
+
+    cache_key = USER_CACHE_KEY.format(user_id)
+    entry = cache.get(cache_key)
+    record_cache_lookup('auth_user', 'hit' if entry is not None else 'miss')
+    if entry is None:
+        user = get_user(user_id)
+        if user is None:
+            return None
+        entry = {
+            'fields': {
+                field.attname: getattr(user, field.attname)
+                for field in UserModel._meta.concrete_fields if field.attname != 'password'
+            },
+            'session_auth_hash': user.get_session_auth_hash(),
+        }
+        cache.set(cache_key, entry, settings.AUTH_USER_CACHE_SECONDS)
+
+    fields = entry['fields']
+    user = UserModel.from_db(UserModel._default_manager.db, list(fields), list(fields.values()))
+    # Checked on every request by the session middleware, so it must not load the password
+    session_auth_hash = entry['session_auth_hash']
+    get_session_auth_hash = user.get_session_auth_hash
+
+    def get_cached_session_auth_hash():
+        # Once the password is set (or loaded), e.g. by update_session_auth_hash() after
+        # a password change, the cached hash is outdated
+        if 'password' in user.__dict__:
+            return get_session_auth_hash()
+        return session_auth_hash
+
+    user.get_session_auth_hash = get_cached_session_auth_hash
+    return user
+
+
+class CachedModelBackend(ModelBackend):
+    """Model backend that loads the user of a session from the cache"""
+
+    def get_user(self, user_id):
+        user = get_cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that keeps verified tokens in the cache
+
+    Clients send `Authorization: Token <key>`. A cached token and user mean the
+    request is authenticated without touching the auth tables.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        user_id = cache.get(cache_key)
+        record_cache_lookup('auth_token', 'hit' if user_id is not None else 'miss')
+        if user_id is None:
+            user_id = Token.objects.filter(key=key).values_list('user_id', flat=True).first()
+            if user_id is None:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+            cache.set(cache_key, user_id, settings.AUTH_TOKEN_CACHE_SECONDS)
+
+        user = get_cached_user(user_id)
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return user, key
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    cache.delete(USER_CACHE_KEY.format(instance.pk))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    cache.delete(token_cache_key(instance.key))
@@ -0,0 +1,334 @@
+import gzip
+import hashlib
+import io
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import cbor2
+import msgpack
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.settings import api_settings
+
+from .caching import bump_dataset_version
+from .indexes import get_phone_prefix_index, resolve_phone_numbers
+from .models import Country
+
+# How a client decodes each response format, by renderer format
+FORMAT_DECODERS = {
+    'json': json.loads,
+    'msgpack': msgpack.unpackb,
+    'cbor': cbor2.loads,
+    'columnar': json.loads,
+}
+
+SNAPSHOT_PATH = Path(__file__).resolve().parent / 'fixtures' / 'countries_snapshot.json'
+BENCHMARK_USERNAME = 'benchmark'
+BENCHMARK_PASSWORD = 'benchmark-Passw0rd'
+
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """Import a REST Countries JSON snapshot into the current database
+
+    Returns the SHA-256 of the file so results can be tied to the exact dataset.
+    """
+    # Imported here because management commands import this module's siblings
+    from .management.commands.fetch_countries import Command as FetchCountriesCommand
+
+    raw = Path(path).read_bytes()
+    FetchCountriesCommand(stdout=io.StringIO()).import_countries_data(json.loads(raw))
+    bump_dataset_version()
+    return hashlib.sha256(raw).hexdigest()
+
+
+def add_snapshot_arguments(parser, output_name):
+    """Add the --snapshot, --output and --keepdb arguments of a benchmark command"""
+    parser.add_argument('--snapshot', default=str(SNAPSHOT_PATH), help='Country snapshot to load')
+    parser.add_argument(
+        '--output',
+        default=str(settings.BASE_DIR / 'benchmarks' / output_name),
+        help='Where to write the JSON results'
+    )
+    parser.add_argument('--keepdb', action='store_true', help='Keep the test database between runs')
+
+
+@contextmanager
+def snapshot_database(snapshot=SNAPSHOT_PATH, keepdb=False):
+    """Run the block against a throwaway test database loaded with a snapshot
+
+    Yields the SHA-256 of the snapshot, see `load_snapshot`.
+    """
+    runner = DiscoverRunner(verbosity=0, interactive=False, keepdb=keepdb)
+    runner.setup_test_environment()
+    old_config = runner.setup_databases()
+    try:
+        yield load_snapshot(snapshot)
+    finally:
+        runner.teardown_databases(old_config)
+        runner.teardown_test_environment()
+
+
+def get_benchmark_user():
+    """Return the user the benchmark authenticates as, creating it if needed"""
+    user = User.objects.filter(username=BENCHMARK_USERNAME).first()
+    if user is None:
+        user = User.objects.create_user(BENCHMARK_USERNAME, password=BENCHMARK_PASSWORD)
+    return user
+
+
+def get_endpoints():
+    """Return (name, path) pairs covering the read endpoints in countryapp/urls.py
+
+    logout and the POST/PUT/DELETE handlers are left out because they change
+    the state the other measurements depend on.
+    """
+    country = Country.objects.get(cca3='DEU')
+    return [
+        ('country-list', reverse('country-list')),
+        ('country-list-page-2', reverse('country-list') + '?page=2'),
+        ('country-list-filtered', reverse('country-list') + '?continent=Europe&landlocked=true&ordering=-population'),
+        ('country-list-localized', reverse('country-list') + '?lang=deu'),
+        ('country-bulk-list', reverse('country-bulk-list')),
+        ('country-detail', reverse('country-detail', args=[country.pk])),
+        ('country-by-region', reverse('country-by-region', args=[country.pk])),
+        ('country-by-language', reverse('country-by-language', args=['deu'])),
+        ('country-by-languages', reverse('country-by-languages') + '?codes=eng,fra&match=all'),
+        ('language-list', reverse('language-list')),
+        ('country-search', reverse('country-search') + '?q=land'),
+        ('distance-matrix', reverse('distance-matrix')),
+        ('schema', reverse('schema')),
+        ('swagger-ui', reverse('swagger-ui')),
+        ('redoc', reverse('redoc')),
+        ('home', reverse('home')),
+        ('about', reverse('about')),
+        ('login', reverse('login')),
+        ('register', reverse('register')),
+        ('metrics', reverse('metrics')),
+    ]
+
+
+def get_format_endpoints():
+    """Return (name, path) pairs of the endpoints whose response formats are compared"""
+    country = Country.objects.get(cca3='DEU')
+    return [
+        ('country-list-100', reverse('country-list') + '?page_size=100'),
+        ('country-detail', reverse('country-detail', args=[country.pk])),
+        ('country-bulk-list', reverse('country-bulk-list') + '?limit=1000'),
+    ]
+
+
+def time_call(function, iterations):
+    """Return the mean time of function() in milliseconds"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - started) * 1000 / iterations
+
+
+def summarize(timings, wall_time, queries, status_code):
+    """Turn per-request timings (in seconds) into the stored statistics"""
+    ordered = sorted(timings)
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))] * 1000
+
+    return {
+        'requests': len(ordered),
+        'status': status_code,
+        'queries': queries,
+        'rps': round(len(ordered) / wall_time, 1) if wall_time else None,
+        'mean_ms': round(statistics.mean(ordered) * 1000, 3),
+        'p50_ms': round(percentile(0.50), 3),
+        'p95_ms': round(percentile(0.95), 3),
+        'p99_ms': round(percentile(0.99), 3),
+    }
+
+
+def count_queries(client, path):
+    """Return the number of SQL queries a single request to path executes"""
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(path)
+    return len(context.captured_queries), response.status_code
+
+
+def benchmark_client(endpoints, user, iterations, warmup):
+    """Measure every endpoint in-process through the Django test client"""
+    client = Client()
+    client.force_login(user)
+
+    results = {}
+    for name, path in endpoints:
+        for _ in range(warmup):
+            client.get(path)
+        queries, status_code = count_queries(client, path)
+
+        timings = []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            start = time.perf_counter()
+            client.get(path)
+            timings.append(time.perf_counter() - start)
+        results[name] = summarize(timings, time.perf_counter() - started, queries, status_code)
+    return results
+
+
+def benchmark_server(endpoints, user, iterations, warmup, concurrency=1):
+    """Measure every endpoint over HTTP against a live local WSGI server"""
+    import requests
+    from django.contrib.staticfiles.handlers import StaticFilesHandler
+    from django.test.testcases import LiveServerThread
+
+    server = LiveServerThread('127.0.0.1', StaticFilesHandler, port=0)
+    server.daemon = True
+    server.start()
+    server.is_ready.wait()
+    if server.error:
+        raise server.error
+
+    # Reuse the session of an authenticated test client for the HTTP requests
+    client = Client()
+    client.force_login(user)
+    session_id = client.cookies[settings.SESSION_COOKIE_NAME].value
+    base_url = f'http://127.0.0.1:{server.port}'
+
+    # A new connection per request: keep-alive against the threaded dev server
+    # hits delayed-ACK stalls that would dominate every measurement
+    cookies = {settings.SESSION_COOKIE_NAME: session_id}
+
+    def fetch(url):
+        start = time.perf_counter()
+        response = requests.get(url, cookies=cookies)
+        return time.perf_counter() - start, response.status_code
+
+    results = {}
+    try:
+        for name, path in endpoints:
+            url = base_url + path
+            for _ in range(warmup):
+                fetch(url)
+            queries, _ = count_queries(client, path)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                samples = list(executor.map(lambda _: fetch(url), range(iterations)))
+            wall_time = time.perf_counter() - started
+            results[name] = summarize([s[0] for s in samples], wall_time, queries, samples[-1][1])
+    finally:
+        server.terminate()
+    return results
+
+
+def benchmark_formats(endpoints, user, iterations):
+    """Compare every configured response format of each endpoint with JSON
+
+    Sizes are of the bodies the endpoints return. Encoding is timed on the renderer
+    alone, on the same data for every format, and decoding with FORMAT_DECODERS.
+    """
+    client = Client()
+    client.force_login(user)
+    renderer_classes = [r for r in api_settings.DEFAULT_RENDERER_CLASSES if r.format in FORMAT_DECODERS]
+
+    results = {}
+    for name, path in endpoints:
+        data = client.get(path, headers={'Accept': 'application/json'}).json()
+        results[name] = {}
+        for renderer_class in renderer_classes:
+            renderer = renderer_class()
+            response = client.get(path, headers={'Accept': renderer.media_type})
+            body = response.content
+            decode = FORMAT_DECODERS[renderer.format]
+            results[name][renderer.format] = {
+                'status': response.status_code,
+                'bytes': len(body),
+                'gzip_bytes': len(gzip.compress(body)),
+                'encode_ms': round(time_call(lambda: renderer.render(data, renderer.media_type, {}), iterations), 3),
+                'decode_ms': round(time_call(lambda: decode(body), iterations), 3),
+            }
+    return results
+
+
+def generate_phone_numbers(count, seed=0):
+    """Return count phone numbers starting with the known dialing prefixes, written in varied styles"""
+    rng = random.Random(seed)
+    prefixes = sorted(get_phone_prefix_index().prefixes)
+    numbers = []
+    for _ in range(count):
+        prefix = rng.choice(prefixes)
+        number = prefix + ''.join(rng.choices('0123456789', k=12 - len(prefix)))
+        style = rng.random()
+        if style < 0.2:
+            number = '00' + number[1:]
+        elif style < 0.3:
+            number = f'{number[:len(prefix)]} {number[len(prefix):len(prefix) + 3]}-{number[len(prefix) + 3:]}'
+        numbers.append(number)
+    return numbers
+
+
+def benchmark_phone_numbers(user, count, batch_size, seed=0):
+    """Measure phone number resolution in numbers per second
+
+    'python' times resolve_phone_numbers() on the whole list; 'api' posts it to the
+    resolve endpoint in batches of batch_size, including parsing and rendering.
+    Both run with the prefix index already built. The API run stops at the first
+    batch that isn't answered with a 200, whose status is returned.
+    """
+    numbers = generate_phone_numbers(count, seed)
+    client = Client()
+    client.force_login(user)
+    path = reverse('phone-number-resolve')
+
+    started = time.perf_counter()
+    results = resolve_phone_numbers(numbers)
+    python_seconds = time.perf_counter() - started
+
+    status_code = None
+    started = time.perf_counter()
+    for start in range(0, count, batch_size):
+        response = client.post(path, {'numbers': numbers[start:start + batch_size]}, content_type='application/json')
+        status_code = response.status_code
+        if status_code != 200:
+            break
+    api_seconds = time.perf_counter() - started
+
+    return {
+        'numbers': count,
+        'batch_size': batch_size,
+        'matched': sum(bool(result['countries']) for result in results),
+        'prefixes': len(get_phone_prefix_index().prefixes),
+        'status': status_code,
+        'python_numbers_per_second': round(count / python_seconds),
+        'api_numbers_per_second': round(count / api_seconds),
+    }
+
+
+def compare_with_baseline(results, baseline, tolerance, min_delta_ms=1.0):
+    """Return a list of regressions of results against a stored baseline
+
+    More queries than the baseline is always a regression. Latency only counts
+    when p95 grew by more than tolerance (a fraction) and by at least
+    min_delta_ms, so timer noise on very fast endpoints is ignored. An endpoint
+    missing from the baseline is reported too, it would otherwise go unchecked.
+    """
+    regressions = []
+    for mode in ('client', 'server'):
+        for name, stats in results.get(mode, {}).items():
+            base = baseline.get(mode, {}).get(name)
+            if base is None:
+                regressions.append(f"{mode}/{name}: no baseline, re-record it with --save-baseline")
+                continue
+            if stats['queries'] > base['queries']:
+                regressions.append(f"{mode}/{name}: queries {base['queries']} -> {stats['queries']}")
+            limit = max(base['p95_ms'] * (1 + tolerance), base['p95_ms'] + min_delta_ms)
+            if stats['p95_ms'] > limit:
+                regressions.append(f"{mode}/{name}: p95 {base['p95_ms']}ms -> {stats['p95_ms']}ms")
+    return regressions
@@ -0,0 +1,176 @@
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_started
+from django.db import transaction
+from django.dispatch import receiver
+
+from .metrics import record_cache_lookup
+
+DATASET_VERSION_KEY = 'countries:dataset-version'
+
+# How long callers wait for a build in progress before building themselves, and
+# how often they look for the result of a build in another process
+COALESCE_WAIT_SECONDS = 30
+COALESCE_POLL_SECONDS = 0.05
+
+# Builds in progress in this process, by cache key
+_flights = {}
+_flights_lock = threading.Lock()
+
+# Oldest dataset version of stale data handed out while handling the current request
+_served_version = ContextVar('served_dataset_version', default=None)
+
+
+def get_dataset_version():
+    """Return the version of the country data; every committed write changes it"""
+    version = cache.get(DATASET_VERSION_KEY)
+    if version is None:
+        # Start from the clock so a lost key never brings back an old version
+        cache.add(DATASET_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(DATASET_VERSION_KEY)
+    return version
+
+
+def bump_dataset_version():
+    """Move to a new dataset version, which invalidates everything cached for the old one"""
+    try:
+        cache.incr(DATASET_VERSION_KEY)
+    except ValueError:
+        get_dataset_version()
+
+
+def bump_dataset_version_on_commit(using=None):
+    """Bump the dataset version once the current transaction commits, or now outside one
+
+    Writes to the country tables call it (or bump_dataset_version() after their own
+    transaction) rather than model signals, which would keep Django from deleting
+    related rows without loading them.
+    """
+    # After the commit, so other requests can't cache the old rows under the new version
+    transaction.on_commit(bump_dataset_version, using=using)
+
+
+class _Flight:
+    """A build of a cache entry in progress in this process, which other callers wait for"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _note_served_version(version):
+    """Remember that the current request got data of an older dataset version"""
+    served = _served_version.get()
+    if served is None or version < served:
+        _served_version.set(version)
+
+
+def take_served_version():
+    """Return the oldest dataset version whose stale data the current request got, or None, and forget it"""
+    version = _served_version.get()
+    _served_version.set(None)
+    return version
+
+
+def _get_stale(name, key, version):
+    """Return (value, version) of the entry for the version it was last built for, or None"""
+    built_version = cache.get(f'{name}:built:{key}')
+    if built_version is None or built_version == version:
+        return None
+    value = cache.get(f'{name}:{built_version}:{key}')
+    return None if value is None else (value, built_version)
+
+
+def _build(name, key, version, build, timeout, allow_stale):
+    """Build and cache an entry, or wait for another process building it; return (value, version)"""
+    cache_key = f'{name}:{version}:{key}'
+    lock_key = f'{cache_key}:lock'
+    lock_seconds = settings.CACHE_COALESCE_LOCK_SECONDS
+    locked = bool(lock_seconds) and cache.add(lock_key, 1, lock_seconds)
+    if lock_seconds and not locked:
+        stale = allow_stale and _get_stale(name, key, version)
+        if stale:
+            record_cache_lookup(name, 'stale')
+            return stale
+        deadline = time.monotonic() + lock_seconds
+        while time.monotonic() < deadline:
+            time.sleep(COALESCE_POLL_SECONDS)
+            value = cache.get(cache_key)
+            if value is not None:
+                record_cache_lookup(name, 'coalesced')
+                return value, version
+            if cache.get(lock_key) is None:
+                break
+        # The other process failed or is too slow, build it here as well
+
+    record_cache_lookup(name, 'miss')
+    try:
+        value = build()
+        timeout = settings.COUNTRY_CACHE_SECONDS if timeout is None else timeout
+        cache.set_many({cache_key: value, f'{name}:built:{key}': version}, timeout)
+        return value, version
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def cached(name, key, build, timeout=None, allow_stale=True):
+    """Return build() cached under name and key for the current dataset version
+
+    Concurrent misses of an entry are coalesced: one caller builds it while the
+    others in the process wait for its result, and with CACHE_COALESCE_LOCK_SECONDS
+    so do other processes sharing the cache. With CACHE_STALE_WHILE_REVALIDATE and
+    allow_stale, the waiting callers get the entry of the previous version instead,
+    when it is still cached; see take_served_version().
+    """
+    version = get_dataset_version()
+    cache_key = f'{name}:{version}:{key}'
+    value = cache.get(cache_key)
+    if value is not None:
+        record_cache_lookup(name, 'hit')
+        return value
+
+    allow_stale = allow_stale and settings.CACHE_STALE_WHILE_REVALIDATE
+    with _flights_lock:
+        flight = _flights.get(cache_key)
+        leader = flight is None
+        if leader:
+            flight = _flights[cache_key] = _Flight()
+
+    if not leader:
+        stale = allow_stale and _get_stale(name, key, version)
+        if stale:
+            record_cache_lookup(name, 'stale')
+            value, served_version = stale
+        elif flight.done.wait(COALESCE_WAIT_SECONDS):
+            record_cache_lookup(name, 'coalesced')
+            if flight.error is not None:
+                raise flight.error
+            value, served_version = flight.result
+        else:
+            value, served_version = _build(name, key, version, build, timeout, allow_stale)
+    else:
+        try:
+            flight.result = _build(name, key, version, build, timeout, allow_stale)
+            value, served_version = flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with _flights_lock:
+                del _flights[cache_key]
+            flight.done.set()
+
+    if served_version != version:
+        _note_served_version(served_version)
+    return value
+
+
+@receiver(request_started)
+def reset_served_version(**kwargs):
+    _served_version.set(None)
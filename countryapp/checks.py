@@ -0,0 +1,8 @@
+from django.core.checks import register
+
+
+@register('openapi', deploy=True)
+def check_openapi_schema(app_configs, **kwargs):
+    # Imported here, the schema generator isn't needed to serve requests
+    from .schema import check_schema_file
+    return check_schema_file(app_configs, **kwargs)
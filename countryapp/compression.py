@@ -0,0 +1,56 @@
+import gzip
+import hashlib
+
+import brotli
+from django.conf import settings
+
+from .caching import cached
+from .headers import parse_quality_header
+
+# Server preference when the client accepts several encodings equally
+ENCODINGS = ('br', 'gzip')
+
+# HTML is left out: pages carry CSRF tokens, which compression would expose (BREACH)
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/vnd.columnar+json',
+    'application/vnd.oai.openapi',
+    'application/vnd.oai.openapi+json',
+    'application/msgpack',
+    'application/cbor',
+    'application/x-npy',
+    'application/javascript',
+    'text/javascript',
+    'text/css',
+    'text/plain',
+    'image/svg+xml',
+}
+
+
+def compress(body, encoding):
+    """Return body compressed with encoding ('br' or 'gzip')"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    # mtime=0 makes the output depend on the body only
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def choose_encoding(accept_encoding):
+    """Return the encoding of ENCODINGS the Accept-Encoding header prefers, or None"""
+    weights = {coding.lower(): weight for coding, weight in parse_quality_header(accept_encoding)}
+    default = weights.get('*', 0.0)
+    candidates = [(weights.get(encoding, default), -index, encoding) for index, encoding in enumerate(ENCODINGS)]
+    weight, _, encoding = max(candidates)
+    return encoding if weight > 0 else None
+
+
+def get_compressed_body(body, encoding, cache_variant=False):
+    """Compress body; with cache_variant the result is cached for the current dataset version
+
+    Cached variants are keyed by a digest of body, so any response with the same
+    content reuses them.
+    """
+    if not cache_variant:
+        return compress(body, encoding)
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return cached('compressed-body', f'{encoding}:{digest}', lambda: compress(body, encoding), allow_stale=False)
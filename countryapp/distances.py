@@ -0,0 +1,97 @@
+"""Great-circle distances between capitals, computed with NumPy
+
+The capital coordinates are kept as arrays per dataset version (see get_index()),
+and a matrix is one broadcast haversine over them. NumPy takes about 90ms to
+import, so views import this module when a distance is first asked for rather
+than at startup.
+"""
+import numpy as np
+
+from .indexes import get_index
+from .models import CapitalCity
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Return the great-circle distances in km between points in radians, broadcast against each other"""
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class CapitalCoordinates:
+    """Every capital with coordinates, as arrays in list order (country name, capital id)
+
+    A country with several capitals is located at its first one.
+    """
+
+    def __init__(self, ids, names, countries, latitudes, longitudes):
+        self.ids = ids
+        self.names = names
+        self.countries = countries
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.capital_rows = {capital_id: row for row, capital_id in enumerate(ids.tolist())}
+        self.country_rows = {}
+        for row, cca3 in enumerate(countries):
+            self.country_rows.setdefault(cca3, row)
+
+    @classmethod
+    def build(cls):
+        capitals = list(CapitalCity.objects.filter(
+            latitude__isnull=False, longitude__isnull=False
+        ).order_by('country__common_name', 'country_id', 'id').values_list(
+            'id', 'name', 'country__cca3', 'latitude', 'longitude'
+        ))
+        ids, names, countries, latitudes, longitudes = zip(*capitals) if capitals else ((), (), (), (), ())
+        return cls(
+            np.array(ids, dtype=np.int64), list(names), list(countries),
+            np.radians(np.array(latitudes, dtype=np.float64)), np.radians(np.array(longitudes, dtype=np.float64)),
+        )
+
+    def rows(self, countries=None, capitals=None):
+        """Return the rows of cca3 codes or capital ids, in their order, and the unknown ones
+
+        Without either, every country's row.
+        """
+        if countries is None and capitals is None:
+            return list(self.country_rows.values()), []
+        lookup, keys = (self.capital_rows, capitals) if capitals is not None else (self.country_rows, countries)
+        return [lookup[key] for key in keys if key in lookup], [key for key in keys if key not in lookup]
+
+    def labels(self, rows):
+        return [{'id': int(self.ids[row]), 'capital': self.names[row], 'country': self.countries[row]} for row in rows]
+
+    def matrix(self, rows, columns):
+        """Return the distances in km from the capitals at rows to those at columns"""
+        rows, columns = np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)
+        return haversine(
+            self.latitudes[rows, np.newaxis], self.longitudes[rows, np.newaxis],
+            self.latitudes[np.newaxis, columns], self.longitudes[np.newaxis, columns],
+        )
+
+
+def get_capital_coordinates():
+    return get_index('capital-coordinates', CapitalCoordinates.build)
+
+
+def distance_matrix(countries=None, capitals=None, to_countries=None, to_capitals=None, max_cells=None):
+    """Return (row labels, column labels, distances in km) between two sets of capitals
+
+    Each set is given as cca3 codes or capital ids; without a target set the matrix
+    is square, and without any set it covers all countries. Raises KeyError with the
+    unknown codes or ids, and ValueError when the matrix would have more than
+    max_cells distances.
+    """
+    coordinates = get_capital_coordinates()
+    rows, unknown = coordinates.rows(countries, capitals)
+    if to_countries is None and to_capitals is None:
+        columns = rows
+    else:
+        columns, unknown_columns = coordinates.rows(to_countries, to_capitals)
+        unknown += unknown_columns
+    if unknown:
+        raise KeyError(unknown)
+    if max_cells is not None and len(rows) * len(columns) > max_cells:
+        raise ValueError(f"{len(rows)} x {len(columns)} distances is more than {max_cells}")
+    return coordinates.labels(rows), coordinates.labels(columns), coordinates.matrix(rows, columns)
@@ -0,0 +1,57 @@
+"""Views serving the OpenAPI schema and its documentation pages
+
+Kept apart from views.py and routed through lazy_view() (see countryapp/urls.py) so API
+requests never import the schema generator and its renderers.
+"""
+from django.http import HttpResponse
+from django.utils.http import parse_etags
+from drf_spectacular.plumbing import set_query_parameters
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+
+from .schema import get_rendered_schema, get_schema_hash
+
+
+class CachedSchemaView(SpectacularAPIView):
+    """OpenAPI schema served from memory instead of being generated on every request
+
+    Requests for ?v=<schema hash>, as made by the documentation pages, may be
+    cached forever; others are revalidated with the ETag.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        body, schema_hash = get_rendered_schema(type(renderer))
+        etag = f'"{schema_hash}"'
+        # Weak comparison, CompressionMiddleware weakens the ETag of compressed responses
+        if etag in [tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))]:
+            response = HttpResponse(status=304)
+        else:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type += f'; charset={renderer.charset}'
+            response = HttpResponse(body, content_type=content_type)
+            response['Content-Disposition'] = f'inline; filename="{self._get_filename(request, None)}"'
+            response.cache_compressed = True
+        response['ETag'] = etag
+        if request.GET.get('v') == get_schema_hash():
+            response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response['Cache-Control'] = 'no-cache'
+        return response
+
+
+class VersionedSchemaUrlMixin:
+    """Point a documentation page at the schema URL of the current schema version"""
+
+    def _get_schema_url(self, request):
+        return set_query_parameters(url=super()._get_schema_url(request), v=get_schema_hash())
+
+
+class SchemaSwaggerView(VersionedSchemaUrlMixin, SpectacularSwaggerView):
+    pass
+
+
+class SchemaRedocView(VersionedSchemaUrlMixin, SpectacularRedocView):
+    pass
@@ -0,0 +1,83 @@
+"""Fetching the full REST Countries dataset, see the fetch_countries command
+
+The API returns at most ten fields per request, so the dataset is fetched as
+several field groups at once over one pooled session and the partial records
+are merged by cca3. Failed requests are retried with backoff, and responses come
+compressed (requests asks for gzip, and br when brotli is installed).
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_API_URL = 'https://restcountries.com/v3.1/all'
+
+# Fields the import reads, at most ten per request including cca3, the merge key
+FIELD_GROUPS = [
+    ['cca3', 'name', 'cca2', 'ccn3', 'cioc', 'independent', 'status', 'unMember', 'region', 'subregion'],
+    ['cca3', 'latlng', 'landlocked', 'area', 'population', 'tld', 'startOfWeek', 'gini', 'fifa', 'car'],
+    ['cca3', 'timezones', 'continents', 'maps', 'flags', 'coatOfArms', 'postalCode', 'capital', 'capitalInfo',
+     'altSpellings'],
+    ['cca3', 'languages', 'currencies', 'demonyms', 'translations', 'idd', 'borders'],
+]
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def make_session(retries=3, backoff=0.5, pool_size=10):
+    """Return a session reusing connections, retrying GETs that fail to connect or get a RETRY_STATUSES answer
+
+    Retries wait backoff, 2 * backoff, 4 * backoff... seconds, or what Retry-After says.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=['GET'],
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def merge_by_cca3(payloads):
+    """Merge lists of partial country records into one record per cca3, in order of first appearance
+
+    Records without a cca3 can't be matched up and are dropped.
+    """
+    countries = {}
+    for payload in payloads:
+        for record in payload:
+            cca3 = record.get('cca3')
+            if cca3:
+                countries.setdefault(cca3, {}).update(record)
+    return list(countries.values())
+
+
+def fetch_countries(url=DEFAULT_API_URL, field_groups=FIELD_GROUPS, workers=4, timeout=30.0, retries=3,
+                    backoff=0.5, session=None):
+    """Fetch every field group from url concurrently and return the merged country records
+
+    timeout applies to connecting and to each read. Raises requests.RequestException
+    when any group still fails after its retries, so a partial dataset is never returned.
+    """
+    own_session = session is None
+    if own_session:
+        session = make_session(retries, backoff, pool_size=workers)
+
+    def fetch_group(fields):
+        response = session.get(url, params={'fields': ','.join(fields)}, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            payloads = list(executor.map(fetch_group, field_groups))
+    finally:
+        if own_session:
+            session.close()
+    return merge_by_cca3(payloads)
@@ -0,0 +1,62 @@
+"""Filters and sort orders of the country list
+
+Every filter and sort order is backed by one of the indexes in Country.Meta, so
+PostgreSQL can combine them (bitmap AND) whatever the combination asked for.
+"""
+from django.db.models import F
+
+from .localization import DEFAULT_LANGUAGE, localize
+from .models import population_density
+
+# Query parameter: lookup
+COUNTRY_FILTERS = {
+    'region': 'region',
+    'subregion': 'subregion',
+    'continent': 'continents__contains',
+    'timezone': 'timezones__contains',
+    'landlocked': 'landlocked',
+    'independent': 'independent',
+    'un_member': 'un_member',
+    'car_side': 'car_side',
+    'population_min': 'population__gte',
+    'population_max': 'population__lte',
+    'area_min': 'area__gte',
+    'area_max': 'area__lte',
+}
+
+# Filters on array fields, matched with @> so the GIN indexes apply
+ARRAY_FILTERS = {'continent', 'timezone'}
+
+# ?ordering= value: sorted expression, and whether it can be NULL
+COUNTRY_ORDERINGS = {
+    'name': (F('common_name'), False),
+    'population': (F('population'), True),
+    'area': (F('area'), True),
+    'density': (population_density(), True),
+}
+
+
+def get_ordering(ordering, localized=False):
+    """Return the order_by() arguments of an ?ordering= value like 'population' or '-density'
+
+    The id breaks ties so pages don't overlap; unknown values come last both ways.
+    With localized, names are sorted by localized_common_name (see localize()).
+    """
+    field = ordering.lstrip('-')
+    expression, nullable = COUNTRY_ORDERINGS[field]
+    if localized and field == 'name':
+        expression = F('localized_common_name')
+    nulls = {'nulls_last': True} if nullable else {}
+    if ordering.startswith('-'):
+        return [expression.desc(**nulls), F('id').desc()]
+    return [expression.asc(**nulls), F('id').asc()]
+
+
+def filter_countries(queryset, filters, ordering='name', lang=DEFAULT_LANGUAGE):
+    """Apply the validated filters (see CountryListQuerySerializer) and ordering to queryset, in lang"""
+    lookups = {
+        COUNTRY_FILTERS[name]: [value] if name in ARRAY_FILTERS else value
+        for name, value in filters.items()
+    }
+    queryset = localize(queryset.filter(**lookups), lang)
+    return queryset.order_by(*get_ordering(ordering, localized=lang != DEFAULT_LANGUAGE))
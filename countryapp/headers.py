@@ -0,0 +1,19 @@
+def parse_quality_header(header):
+    """Return (value, weight) pairs of a header with q-values, such as Accept-Encoding, in header order
+
+    Values without a q-value weigh 1.0, an unreadable q-value counts as 0.0.
+    Empty values are left out; q=0 entries are kept, they can rule out a wildcard.
+    """
+    entries = []
+    for part in header.split(','):
+        value, _, params = part.partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if value.strip():
+            entries.append((value.strip(), weight))
+    return entries
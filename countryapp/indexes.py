@@ -0,0 +1,174 @@
+"""In-memory indexes over the country data, rebuilt once per dataset version
+
+Each index is built from a few flat queries, shared between processes through
+cached() and kept in process memory until the dataset version changes, or for at
+most COUNTRY_CACHE_SECONDS, as a write in another process only changes the version
+this process sees when the cache is shared.
+"""
+import re
+import threading
+import time
+
+from django.conf import settings
+
+from .caching import cached, get_dataset_version
+from .models import Country, CountryLanguage, InternationalDialingCode, Language
+
+_local_indexes = {}
+_local_lock = threading.Lock()
+
+
+def get_index(name, build):
+    """Return the index called name for the current dataset version, building it when needed"""
+    version = get_dataset_version()
+    timeout = settings.COUNTRY_CACHE_SECONDS
+
+    def is_current(entry):
+        return entry is not None and entry[0] == version and (timeout is None or time.monotonic() < entry[1] + timeout)
+
+    entry = _local_indexes.get(name)
+    if not is_current(entry):
+        with _local_lock:
+            entry = _local_indexes.get(name)
+            if not is_current(entry):
+                # Never stale: the index is kept for this version until the next change
+                entry = (version, time.monotonic(), cached(f'index-{name}', 'all', build, allow_stale=False))
+                _local_indexes[name] = entry
+    return entry[2]
+
+
+def iter_bits(mask, start=0):
+    """Yield the positions of the set bits of mask from the lowest, skipping the first start"""
+    bits = bin(mask)[:1:-1]
+    position = bits.find('1')
+    while position != -1:
+        if start:
+            start -= 1
+        else:
+            yield position
+        position = bits.find('1', position + 1)
+
+
+class LanguageIndex:
+    """Which countries speak which language, as one bitset per language
+
+    Bit n of a language's bitset is set when the n-th country in list order
+    (common_name, id) speaks it, so unions and intersections are integer | and &,
+    and the set bits come out already sorted for pagination.
+    """
+
+    def __init__(self, country_ids, languages, bitsets):
+        self.country_ids = country_ids
+        self.languages = languages
+        self.bitsets = bitsets
+
+    @classmethod
+    def build(cls):
+        country_ids = list(Country.objects.order_by('common_name', 'id').values_list('id', flat=True))
+        positions = {country_id: position for position, country_id in enumerate(country_ids)}
+        languages = dict(Language.objects.order_by('code').values_list('code', 'name'))
+        bitsets = dict.fromkeys(languages, 0)
+        for code, country_id in CountryLanguage.objects.values_list('language_id', 'country_id').iterator():
+            bitsets[code] |= 1 << positions[country_id]
+        return cls(country_ids, languages, bitsets)
+
+    def unknown(self, codes):
+        """Return the codes that aren't languages"""
+        return [code for code in codes if code not in self.languages]
+
+    def match(self, codes, match_all=False):
+        """Return the bitset of countries speaking all (or any) of codes"""
+        masks = [self.bitsets.get(code, 0) for code in codes]
+        if not masks:
+            return 0
+        result = masks[0]
+        for mask in masks[1:]:
+            result = result & mask if match_all else result | mask
+        return result
+
+    def country_ids_in(self, mask, offset=0, limit=None):
+        """Return the ids of the countries in mask in list order, optionally a slice of them"""
+        ids = []
+        for position in iter_bits(mask, offset):
+            if limit is not None and len(ids) >= limit:
+                break
+            ids.append(self.country_ids[position])
+        return ids
+
+    def counts(self):
+        """Return (code, name, number of countries) for every language"""
+        return [(code, name, self.bitsets[code].bit_count()) for code, name in self.languages.items()]
+
+
+def get_language_index():
+    return get_index('languages', LanguageIndex.build)
+
+
+# Separators people write phone numbers with
+PHONE_SEPARATORS = re.compile(r'[\s().\-/]')
+PHONE_NUMBER = re.compile(r'\+\d+')
+
+
+def normalize_phone_number(number):
+    """Return number as '+' and digits, or None when it isn't in international format
+
+    Accepts separators and the 00 international prefix: '0049 (30) 123-456' -> '+4930123456'.
+    """
+    if number.startswith('+') and number[1:].isdigit() and number.isascii():
+        return number
+    number = PHONE_SEPARATORS.sub('', number)
+    if number.startswith('00'):
+        number = '+' + number[2:]
+    return number if PHONE_NUMBER.fullmatch(number) else None
+
+
+class PhonePrefixIndex:
+    """Dialing prefixes (IDD root + suffix, e.g. '+49', '+1201') mapped to the countries using them
+
+    Lookups probe only the prefix lengths that exist, longest first, so resolving a
+    number costs a handful of dict lookups however many prefixes there are.
+    """
+
+    def __init__(self, prefixes):
+        self.prefixes = prefixes
+        self.lengths = sorted({len(prefix) for prefix in prefixes}, reverse=True)
+
+    @classmethod
+    def build(cls):
+        prefixes = {}
+        dialing_codes = InternationalDialingCode.objects.exclude(root='').order_by(
+            'country__common_name', 'country_id'
+        ).values_list('root', 'suffixes', 'country__cca3')
+        for root, suffixes, cca3 in dialing_codes:
+            for suffix in suffixes or ['']:
+                prefixes.setdefault(root + suffix, []).append(cca3)
+        return cls({prefix: tuple(countries) for prefix, countries in prefixes.items()})
+
+    def resolve(self, number):
+        """Return (prefix, countries) of the longest prefix of a normalized number, or (None, ())"""
+        for length in self.lengths:
+            if length <= len(number):
+                countries = self.prefixes.get(number[:length])
+                if countries is not None:
+                    return number[:length], countries
+        return None, ()
+
+
+def get_phone_prefix_index():
+    return get_index('phone-prefixes', PhonePrefixIndex.build)
+
+
+def resolve_phone_numbers(numbers):
+    """Return a {'number', 'prefix', 'countries'} dict for each phone number, in order
+
+    countries lists the cca3 codes sharing the longest matching dialing prefix,
+    usually one; it is empty, with a null prefix, when nothing matches or the
+    number isn't in international format.
+    """
+    index = get_phone_prefix_index()
+    results = []
+    for number in numbers:
+        normalized = normalize_phone_number(number)
+        prefix, countries = index.resolve(normalized) if normalized else (None, ())
+        results.append({'number': number, 'prefix': prefix, 'countries': list(countries)})
+    return results
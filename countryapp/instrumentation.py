@@ -0,0 +1,106 @@
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Metrics for the request being handled in the current context
+_current_metrics = ContextVar('request_metrics', default=None)
+
+# Patterns replacing the parts of an SQL statement that vary between executions
+SQL_NORMALIZERS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'"s\d+_x\d+"'), '"savepoint"'),
+    (re.compile(r'"_django_curs_\d+_(a?sync)_\d+"'), r'"_django_curs_\1"'),
+    (re.compile(r'%s|\$\d+'), '?'),
+    (re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b', re.IGNORECASE), '?'),
+    (re.compile(r'\bIN \((?:\s*\?\s*,)*\s*\?\s*\)', re.IGNORECASE), 'IN (...)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+class RequestMetrics:
+    """Timings collected while a single request is handled"""
+
+    def __init__(self, record_queries=False):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.durations = {}
+        self.record_queries = record_queries
+        self.queries = []
+
+    def add_duration(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper counting and timing every query"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.query_count += 1
+            self.db_time += duration
+            if self.record_queries:
+                self.queries.append({'sql': sql, 'ms': round(duration * 1000, 3)})
+
+
+def current_metrics():
+    """Return the metrics of the current request, or None outside of one"""
+    return _current_metrics.get()
+
+
+@contextmanager
+def collect_metrics(record_queries=False):
+    """Collect metrics for everything executed inside the block"""
+    metrics = RequestMetrics(record_queries=record_queries)
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to the current request's metrics"""
+    metrics = current_metrics()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_duration(name, time.perf_counter() - start)
+
+
+def fingerprint_sql(sql):
+    """Return sql with literals, parameters and IN lists replaced by placeholders
+
+    Queries that only differ in their values share a fingerprint, so the shape
+    of the SQL a request runs can be compared across runs and datasets.
+    """
+    for pattern, replacement in SQL_NORMALIZERS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def server_timing_header(metrics, total):
+    """Format metrics as a Server-Timing header value"""
+    entries = [f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.query_count} queries"']
+    for name, seconds in metrics.durations.items():
+        entries.append(f'{name};dur={seconds * 1000:.2f}')
+    entries.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(entries)
+
+
+class TimedSerializerMixin:
+    """Record serialization time of a serializer in the request metrics"""
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
@@ -0,0 +1,78 @@
+"""Country names in the language a client asks for, from CountryTranslation
+
+The language comes from ?lang= (ISO 639-1 or the 639-2 code REST Countries
+uses, 'de' or 'deu') or else the Accept-Language header. English is the
+untranslated name.
+"""
+from django.db.models import F, FilteredRelation, Q
+from django.db.models.functions import Coalesce
+from rest_framework.exceptions import ValidationError
+
+from .headers import parse_quality_header
+
+DEFAULT_LANGUAGE = 'eng'
+
+# ISO 639-1 code: code of the REST Countries translations
+TRANSLATION_LANGUAGES = {
+    'ar': 'ara', 'br': 'bre', 'cs': 'ces', 'cy': 'cym', 'de': 'deu', 'en': 'eng', 'es': 'spa',
+    'et': 'est', 'fa': 'per', 'fi': 'fin', 'fr': 'fra', 'hr': 'hrv', 'hu': 'hun', 'it': 'ita',
+    'ja': 'jpn', 'ko': 'kor', 'nl': 'nld', 'pl': 'pol', 'pt': 'por', 'ru': 'rus', 'sk': 'slk',
+    'sr': 'srp', 'sv': 'swe', 'tr': 'tur', 'ur': 'urd', 'zh': 'zho',
+}
+
+
+def parse_language(value):
+    """Return the translation code of a language tag ('de', 'de-CH', 'deu'), or None when there isn't one"""
+    code = value.strip().lower().split('-')[0]
+    if code in TRANSLATION_LANGUAGES:
+        return TRANSLATION_LANGUAGES[code]
+    return code if code in TRANSLATION_LANGUAGES.values() else None
+
+
+def parse_accept_language(header):
+    """Return the language tags of an Accept-Language header, most preferred first
+
+    Tags of equal weight keep their order; tags with q=0 or an unreadable q are left out.
+    """
+    weighted = [
+        (-weight, index, tag) for index, (tag, weight) in enumerate(parse_quality_header(header)) if weight > 0
+    ]
+    return [tag for _, _, tag in sorted(weighted)]
+
+
+def get_accept_language(header):
+    """Return the translation code of the most preferred language of an Accept-Language header"""
+    for tag in parse_accept_language(header or ''):
+        code = parse_language(tag)
+        if code:
+            return code
+    return DEFAULT_LANGUAGE
+
+
+def get_request_language(request):
+    """Return the translation code asked for with ?lang=, or else with Accept-Language
+
+    Raises ValidationError for a ?lang= without translations.
+    """
+    lang = request.GET.get('lang')
+    if lang is None:
+        return get_accept_language(request.headers.get('Accept-Language'))
+    code = parse_language(lang)
+    if code is None:
+        raise ValidationError({'lang': f"No translations for '{lang}'."})
+    return code
+
+
+def localize(queryset, lang):
+    """Annotate countries with localized_common_name and localized_official_name in lang
+
+    The names come from a LEFT JOIN on the one CountryTranslation row of lang (unique
+    per country), falling back to the English names, so they can also be sorted on.
+    """
+    if lang == DEFAULT_LANGUAGE:
+        return queryset
+    return queryset.annotate(
+        localized=FilteredRelation('translations', condition=Q(translations__language_code=lang)),
+        localized_common_name=Coalesce(F('localized__common_name'), F('common_name')),
+        localized_official_name=Coalesce(F('localized__official_name'), F('official_name')),
+    )
@@ -0,0 +1,91 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-request database latency with and without connection reuse'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Number of simulated requests per scenario'
+        )
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Database alias to benchmark'
+        )
+        parser.add_argument(
+            '--query',
+            default='SELECT 1',
+            help='SQL statement executed once per simulated request'
+        )
+
+    def run_fresh_connections(self, connection, iterations, query):
+        """Open a brand new driver connection for every request"""
+        params = connection.get_connection_params()
+        params.pop('cursor_factory', None)
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            raw_connection = connection.Database.connect(**params)
+            try:
+                cursor = raw_connection.cursor()
+                cursor.execute(query)
+                cursor.fetchall()
+                cursor.close()
+            finally:
+                raw_connection.close()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def run_configured_lifecycle(self, connection, iterations, query):
+        """Follow Django's request lifecycle using the configured settings"""
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            # request_started / request_finished both call close_old_connections()
+            close_old_connections()
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+                cursor.fetchall()
+            close_old_connections()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def summarize(self, label, timings):
+        ordered = sorted(timings)
+        p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) > 1 else ordered[0]
+        self.stdout.write(
+            f"{label:<28} mean={statistics.mean(ordered):8.3f}ms "
+            f"p50={statistics.median(ordered):8.3f}ms p95={p95:8.3f}ms"
+        )
+        return statistics.mean(ordered)
+
+    def handle(self, *args, **options):
+        """Execute the command"""
+        connection = connections[options['database']]
+        settings_dict = connection.settings_dict
+        iterations = options['iterations']
+        query = options['query']
+
+        pool_options = settings_dict['OPTIONS'].get('pool')
+        mode = 'pool' if pool_options else f"CONN_MAX_AGE={settings_dict['CONN_MAX_AGE']}"
+        self.stdout.write(self.style.NOTICE(
+            f"Benchmarking {iterations} requests against '{options['database']}' ({mode})"
+        ))
+
+        # Warm up so DNS lookups and pool startup do not skew the first sample
+        self.run_configured_lifecycle(connection, 5, query)
+
+        fresh = self.summarize('new connection per request', self.run_fresh_connections(connection, iterations, query))
+        configured = self.summarize(f'configured ({mode})', self.run_configured_lifecycle(connection, iterations, query))
+
+        if configured > 0:
+            self.stdout.write(self.style.SUCCESS(f"Configured mode is {fresh / configured:.1f}x faster per request"))
+        connection.close()
@@ -0,0 +1,97 @@
+import json
+import platform
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from countryapp.benchmarking import (
+    add_snapshot_arguments, benchmark_client, benchmark_server, compare_with_baseline,
+    get_benchmark_user, get_endpoints, snapshot_database
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every country endpoint against a fixed snapshot in a throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode',
+            choices=['client', 'server', 'both'],
+            default='both',
+            help='Measure through the Django test client, a live local server, or both'
+        )
+        parser.add_argument('--iterations', type=int, default=50, help='Measured requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per endpoint')
+        parser.add_argument('--concurrency', type=int, default=1, help='Parallel HTTP clients in server mode')
+        add_snapshot_arguments(parser, 'results.json')
+        parser.add_argument(
+            '--baseline',
+            default=str(settings.BASE_DIR / 'benchmarks' / 'baseline.json'),
+            help='Baseline results to compare against'
+        )
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Store these results as the new baseline instead of comparing'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Allowed relative p95 latency increase before reporting a regression'
+        )
+
+    def print_results(self, mode, results):
+        self.stdout.write(self.style.NOTICE(f"\n{mode} results"))
+        self.stdout.write(f"{'endpoint':<22}{'status':>7}{'queries':>9}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, stats in results.items():
+            self.stdout.write(
+                f"{name:<22}{stats['status']:>7}{stats['queries']:>9}{stats['rps']:>10}"
+                f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+            )
+
+    def handle(self, *args, **options):
+        """Execute the command"""
+        with snapshot_database(options['snapshot'], options['keepdb']) as dataset_hash:
+            user = get_benchmark_user()
+            endpoints = get_endpoints()
+
+            results = {
+                'meta': {
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'snapshot_sha256': dataset_hash,
+                    'iterations': options['iterations'],
+                    'concurrency': options['concurrency'],
+                },
+            }
+            if options['mode'] in ('client', 'both'):
+                results['client'] = benchmark_client(endpoints, user, options['iterations'], options['warmup'])
+                self.print_results('client', results['client'])
+            if options['mode'] in ('server', 'both'):
+                results['server'] = benchmark_server(
+                    endpoints, user, options['iterations'], options['warmup'], options['concurrency']
+                )
+                self.print_results('server', results['server'])
+
+        output = Path(options['baseline'] if options['save_baseline'] else options['output'])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2) + '\n')
+        self.stdout.write(self.style.SUCCESS(f"\nResults written to {output}"))
+        if options['save_baseline']:
+            return
+
+        baseline_path = Path(options['baseline'])
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING("No baseline found, run with --save-baseline to create one"))
+            return
+
+        baseline = json.loads(baseline_path.read_text())
+        if baseline.get('meta', {}).get('snapshot_sha256') != dataset_hash:
+            self.stdout.write(self.style.WARNING("Baseline was recorded with a different snapshot"))
+        regressions = compare_with_baseline(results, baseline, options['tolerance'])
+        if regressions:
+            raise CommandError("Performance regressions against baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
@@ -0,0 +1,39 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from countryapp.benchmarking import (
+    add_snapshot_arguments, benchmark_formats, get_benchmark_user, get_format_endpoints, snapshot_database
+)
+
+
+class Command(BaseCommand):
+    help = 'Compare the size and encode/decode time of the API response formats against JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Encodes and decodes timed per format')
+        add_snapshot_arguments(parser, 'formats.json')
+
+    def handle(self, *args, **options):
+        """Execute the command"""
+        with snapshot_database(options['snapshot'], options['keepdb']):
+            results = benchmark_formats(get_format_endpoints(), get_benchmark_user(), options['iterations'])
+
+        for name, formats in results.items():
+            json_stats = formats['json']
+            self.stdout.write(self.style.NOTICE(f"\n{name}"))
+            self.stdout.write(
+                f"{'format':<12}{'status':>7}{'bytes':>10}{'vs json':>9}{'gzip':>9}{'encode ms':>11}{'decode ms':>11}"
+            )
+            for format_name, stats in formats.items():
+                self.stdout.write(
+                    f"{format_name:<12}{stats['status']:>7}{stats['bytes']:>10}"
+                    f"{stats['bytes'] / json_stats['bytes']:>8.0%} {stats['gzip_bytes']:>8}"
+                    f"{stats['encode_ms']:>11}{stats['decode_ms']:>11}"
+                )
+
+        output = Path(options['output'])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2) + '\n')
+        self.stdout.write(self.style.SUCCESS(f"\nResults written to {output}"))
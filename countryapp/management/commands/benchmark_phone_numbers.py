@@ -0,0 +1,39 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from countryapp.benchmarking import (
+    add_snapshot_arguments, benchmark_phone_numbers, get_benchmark_user, snapshot_database
+)
+
+
+class Command(BaseCommand):
+    help = 'Measure how many phone numbers per second are resolved to countries, in Python and through the API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200000, help='Phone numbers to resolve')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Numbers per API request')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the generated numbers')
+        add_snapshot_arguments(parser, 'phone_numbers.json')
+
+    def handle(self, *args, **options):
+        """Execute the command"""
+        with snapshot_database(options['snapshot'], options['keepdb']):
+            results = benchmark_phone_numbers(
+                get_benchmark_user(), options['count'], options['batch_size'], options['seed']
+            )
+
+        if results['status'] != 200:
+            raise CommandError(f"The resolve endpoint answered {results['status']}, the results are meaningless")
+
+        self.stdout.write(
+            f"{results['numbers']} numbers, {results['prefixes']} prefixes, {results['matched']} matched\n"
+            f"python: {results['python_numbers_per_second']:>12,} numbers/s\n"
+            f"api:    {results['api_numbers_per_second']:>12,} numbers/s (batches of {results['batch_size']})"
+        )
+
+        output = Path(options['output'])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2) + '\n')
+        self.stdout.write(self.style.SUCCESS(f"\nResults written to {output}"))
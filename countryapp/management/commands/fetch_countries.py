@@ -1,7 +1,18 @@
-from django.core.management.base import BaseCommand
+from collections import Counter
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
 import requests
 from django.db import transaction
 
+from countryapp.caching import bump_dataset_version
+from countryapp.fetching import DEFAULT_API_URL, FIELD_GROUPS, fetch_countries
+from countryapp.metrics import record_import
+from countryapp.staging import (
+    PREVIOUS_SCHEMA, STAGING_SCHEMA, RollbackError, create_staging, drop_staging, publish, rollback, schema_exists,
+    use_schema,
+)
 
 from countryapp.models import (
     Country, CapitalCity, CountryName, AlternativeSpelling, 
@@ -15,34 +26,69 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument(
             '--api-url',
-            default='https://restcountries.com/v3.1/all',
+            default=DEFAULT_API_URL,
             help='API URL to fetch country data from'
         )
+        parser.add_argument('--workers', type=int, default=len(FIELD_GROUPS), help='Parallel API requests')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Seconds to wait to connect and for each read')
+        parser.add_argument('--retries', type=int, default=3, help='Retries of a failed API request')
+        parser.add_argument('--backoff', type=float, default=0.5, help='Seconds before the second retry, doubling after')
+        parser.add_argument(
+            '--file',
+            help='Import from a local JSON file in the REST Countries format instead of the API'
+        )
         parser.add_argument(
             '--reset',
             action='store_true',
             help='Delete all existing country data before importing'
         )
+        parser.add_argument(
+            '--staging',
+            action='store_true',
+            help='Import into staging tables and swap them in when done, keeping the current data for --rollback'
+        )
+        parser.add_argument(
+            '--rollback',
+            action='store_true',
+            help='Swap the data replaced by the last --staging import back in, and do nothing else'
+        )
 
-    def fetch_countries_data(self, url):
-        """Fetch country data from REST Countries API"""
-        self.stdout.write(self.style.NOTICE(f"Fetching country data from {url}"))
+    def fetch_countries_data(self, url, options):
+        """Fetch country data from REST Countries API, one request per field group"""
+        self.stdout.write(self.style.NOTICE(f"Fetching country data from {url} in {len(FIELD_GROUPS)} requests"))
         
         try:
-            response = requests.get(url)
-            response.raise_for_status()  # Raise an exception for bad responses
-            countries_data = response.json()
+            countries_data = fetch_countries(
+                url, workers=options['workers'], timeout=options['timeout'],
+                retries=options['retries'], backoff=options['backoff'],
+            )
             self.stdout.write(self.style.SUCCESS(f"Successfully fetched data for {len(countries_data)} countries"))
             return countries_data
-        except requests.RequestException as e:
+        except (requests.RequestException, ValueError) as e:
             self.stdout.write(self.style.ERROR(f"Error fetching data: {e}"))
             return None
 
+    def load_countries_file(self, path):
+        """Load country data from a local JSON file"""
+        self.stdout.write(self.style.NOTICE(f"Loading country data from {path}"))
+        
+        try:
+            with open(path, encoding='utf-8') as f:
+                countries_data = json.load(f)
+            self.stdout.write(self.style.SUCCESS(f"Successfully loaded data for {len(countries_data)} countries"))
+            return countries_data
+        except (OSError, ValueError) as e:
+            self.stdout.write(self.style.ERROR(f"Error loading data: {e}"))
+            return None
+
     @transaction.atomic
     def import_countries_data(self, countries_data):
         """Import country data to the database"""
         self.stdout.write(self.style.NOTICE("Starting country data import..."))
         
+        # Rows written per table, exported as a metric
+        self.rows_written = Counter()
+        
         # Track countries by code for border relationships
         country_objects = {}
         
@@ -60,6 +106,7 @@ class Command(BaseCommand):
                         code=lang_code,
                         defaults={'name': lang_name}
                     )
+                    self.rows_written[Language._meta.db_table] += 1
                     languages[lang_code] = language
                     if created:
                         self.stdout.write(f"Created language: {lang_code} - {lang_name}")
@@ -74,6 +121,7 @@ class Command(BaseCommand):
                             'symbol': currency_info.get('symbol', '')
                         }
                     )
+                    self.rows_written[Currency._meta.db_table] += 1
                     currencies[currency_code] = currency
                     if created:
                         self.stdout.write(f"Created currency: {currency_code}")
@@ -136,6 +184,7 @@ class Command(BaseCommand):
                         'postal_code_regex': country_data.get('postalCode', {}).get('regex', ''),
                     }
                 )
+                self.rows_written[Country._meta.db_table] += 1
                 
                 # Store for border relationships
                 country_objects[country.cca3] = country
@@ -155,6 +204,7 @@ class Command(BaseCommand):
                         latitude=lat,
                         longitude=lng
                     )
+                    self.rows_written[CapitalCity._meta.db_table] += 1
                 
                 # Add native names
                 CountryName.objects.filter(country=country).delete()
@@ -165,6 +215,7 @@ class Command(BaseCommand):
                         official_name=name_data.get('official', ''),
                         common_name=name_data.get('common', '')
                     )
+                    self.rows_written[CountryName._meta.db_table] += 1
                 
                 # Add alternative spellings
                 AlternativeSpelling.objects.filter(country=country).delete()
@@ -173,6 +224,7 @@ class Command(BaseCommand):
                         country=country,
                         spelling=spelling
                     )
+                    self.rows_written[AlternativeSpelling._meta.db_table] += 1
                 
                 # Add languages
                 CountryLanguage.objects.filter(country=country).delete()
@@ -182,6 +234,7 @@ class Command(BaseCommand):
                             country=country,
                             language=languages[lang_code]
                         )
+                        self.rows_written[CountryLanguage._meta.db_table] += 1
                 
                 # Add currencies
                 CountryCurrency.objects.filter(country=country).delete()
@@ -191,6 +244,7 @@ class Command(BaseCommand):
                             country=country,
                             currency=currencies[currency_code]
                         )
+                        self.rows_written[CountryCurrency._meta.db_table] += 1
                 
                 # Add demonyms
                 Demonym.objects.filter(country=country).delete()
@@ -201,6 +255,7 @@ class Command(BaseCommand):
                         male=demonym_data.get('m', ''),
                         female=demonym_data.get('f', '')
                     )
+                    self.rows_written[Demonym._meta.db_table] += 1
                 
                 # Add translations
                 CountryTranslation.objects.filter(country=country).delete()
@@ -211,6 +266,7 @@ class Command(BaseCommand):
                         official_name=translation_data.get('official', ''),
                         common_name=translation_data.get('common', '')
                     )
+                    self.rows_written[CountryTranslation._meta.db_table] += 1
                 
                 # Add IDD (International Dialing)
                 InternationalDialingCode.objects.filter(country=country).delete()
@@ -221,6 +277,7 @@ class Command(BaseCommand):
                         root=idd_data.get('root', ''),
                         suffixes=idd_data.get('suffixes', [])
                     )
+                    self.rows_written[InternationalDialingCode._meta.db_table] += 1
                     
             except Exception as e:
                 self.stdout.write(self.style.ERROR(
@@ -245,39 +302,76 @@ class Command(BaseCommand):
                         from_country=from_country,
                         to_country=to_country
                     )
+                    self.rows_written[BorderCountry._meta.db_table] += 1
         
         self.stdout.write(self.style.SUCCESS(f"Successfully imported data for {len(country_objects)} countries"))
 
+    def reset_countries_data(self):
+        """Delete all country data"""
+        self.stdout.write(self.style.WARNING("Deleting all existing country data..."))
+        # Delete in order to avoid foreign key conflicts
+        InternationalDialingCode.objects.all().delete()
+        CountryTranslation.objects.all().delete()
+        Demonym.objects.all().delete()
+        CountryCurrency.objects.all().delete()
+        CountryLanguage.objects.all().delete()
+        AlternativeSpelling.objects.all().delete()
+        CountryName.objects.all().delete()
+        CapitalCity.objects.all().delete()
+        BorderCountry.objects.all().delete()
+        Country.objects.all().delete()
+        Currency.objects.all().delete()
+        Language.objects.all().delete()
+
+    def import_staged(self, countries_data, reset):
+        """Import into staging tables, starting empty with reset, then publish them"""
+        self.stdout.write(self.style.NOTICE("Importing into staging tables..."))
+        create_staging(copy_live=not reset)
+        try:
+            with use_schema(STAGING_SCHEMA):
+                self.import_countries_data(countries_data)
+        except Exception:
+            drop_staging()
+            raise
+        publish()
+        self.stdout.write(self.style.SUCCESS("Published the staging tables; --rollback restores the previous data"))
+
     def handle(self, *args, **options):
         """Execute the command"""
+        if options['rollback']:
+            if not schema_exists(PREVIOUS_SCHEMA):
+                raise CommandError("No previous data to roll back to, import with --staging first.")
+            try:
+                rollback()
+            except RollbackError as e:
+                raise CommandError(f"{e} Import with --staging instead.")
+            self.stdout.write(self.style.SUCCESS("Swapped the previous country data back in"))
+            return
+
         self.stdout.write(self.style.NOTICE("Starting country data fetch and import process"))
-        
-        # Reset existing data if requested
-        if options['reset']:
-            self.stdout.write(self.style.WARNING("Deleting all existing country data..."))
-            # Delete in order to avoid foreign key conflicts
-            InternationalDialingCode.objects.all().delete()
-            CountryTranslation.objects.all().delete()
-            Demonym.objects.all().delete()
-            CountryCurrency.objects.all().delete()
-            CountryLanguage.objects.all().delete()
-            AlternativeSpelling.objects.all().delete()
-            CountryName.objects.all().delete()
-            CapitalCity.objects.all().delete()
-            BorderCountry.objects.all().delete()
-            Country.objects.all().delete()
-            Currency.objects.all().delete()
-            Language.objects.all().delete()
             
-        # Fetch data from API
-        countries_data = self.fetch_countries_data(options['api_url'])
+        # Fetch data from API or a local snapshot
+        if options['file']:
+            countries_data = self.load_countries_file(options['file'])
+        else:
+            countries_data = self.fetch_countries_data(options['api_url'], options)
         if not countries_data:
             self.stdout.write(self.style.ERROR("Failed to fetch country data. Exiting."))
             return
         
         # Import data to database
         try:
-            self.import_countries_data(countries_data)
+            start = time.perf_counter()
+            if options['staging']:
+                self.import_staged(countries_data, options['reset'])
+            else:
+                # Readers keep seeing the old rows until the new ones are committed
+                with transaction.atomic():
+                    if options['reset']:
+                        self.reset_countries_data()
+                    self.import_countries_data(countries_data)
+                bump_dataset_version()
+            record_import(time.perf_counter() - start, self.rows_written)
             self.stdout.write(self.style.SUCCESS("Country data import completed successfully"))
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error during import process: {e}"))
\ No newline at end of file
+            self.stdout.write(self.style.ERROR(f"Error during import process: {e}"))
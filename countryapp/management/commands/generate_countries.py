@@ -0,0 +1,383 @@
+import bisect
+import itertools
+import random
+import time
+import unicodedata
+from collections import Counter
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Max
+
+from countryapp.bulk import copy_rows, reset_sequence, suspended_constraints
+from countryapp.caching import bump_dataset_version
+from countryapp.models import (
+    Country, CapitalCity, CountryName, AlternativeSpelling,
+    BorderCountry, Currency, CountryCurrency, Language,
+    CountryLanguage, Demonym, CountryTranslation, InternationalDialingCode
+)
+
+# Synthetic rows are tagged with this status so they can be found and removed
+SYNTHETIC_STATUS = 'synthetic'
+SYNTHETIC_PREFIX = 'Synthetic'
+
+# Codes are built from non-ASCII letters so they never clash with real ISO codes
+UPPER_ALPHABET = [chr(c) for c in range(0x100, 0x2000) if unicodedata.category(chr(c)) == 'Lu']
+LOWER_ALPHABET = [chr(c) for c in range(0x100, 0x2000) if unicodedata.category(chr(c)) == 'Ll']
+
+# region: (share of real countries, subregions, continent per subregion)
+REGIONS = {
+    'Africa': (59, {
+        'Northern Africa': 'Africa', 'Western Africa': 'Africa', 'Middle Africa': 'Africa',
+        'Eastern Africa': 'Africa', 'Southern Africa': 'Africa',
+    }),
+    'Americas': (56, {
+        'North America': 'North America', 'Central America': 'North America',
+        'Caribbean': 'North America', 'South America': 'South America',
+    }),
+    'Asia': (50, {
+        'Eastern Asia': 'Asia', 'South-Eastern Asia': 'Asia', 'Southern Asia': 'Asia',
+        'Central Asia': 'Asia', 'Western Asia': 'Asia',
+    }),
+    'Europe': (53, {
+        'Northern Europe': 'Europe', 'Western Europe': 'Europe', 'Central Europe': 'Europe',
+        'Southern Europe': 'Europe', 'Eastern Europe': 'Europe', 'Southeast Europe': 'Europe',
+    }),
+    'Oceania': (27, {
+        'Australia and New Zealand': 'Oceania', 'Melanesia': 'Oceania',
+        'Micronesia': 'Oceania', 'Polynesia': 'Oceania',
+    }),
+    'Antarctic': (5, {'': 'Antarctica'}),
+}
+REGION_CENTRES = {
+    'Africa': (5, 20), 'Americas': (10, -75), 'Asia': (30, 95),
+    'Europe': (50, 15), 'Oceania': (-15, 150), 'Antarctic': (-75, 0),
+}
+
+# The translation languages served by the REST Countries API
+TRANSLATION_LANGUAGES = [
+    'ara', 'bre', 'ces', 'cym', 'deu', 'est', 'fin', 'fra', 'hrv', 'hun', 'ita', 'jpn', 'kor',
+    'nld', 'per', 'pol', 'por', 'rus', 'slk', 'spa', 'srp', 'swe', 'tur', 'urd', 'zho',
+]
+OFFICIAL_PREFIXES = {
+    'deu': 'Republik', 'fra': 'République de', 'spa': 'República de', 'ita': 'Repubblica di',
+    'por': 'República de', 'nld': 'Republiek', 'pol': 'Republika', 'ces': 'Republika',
+    'hrv': 'Republika', 'slk': 'Republika', 'swe': 'Republiken', 'fin': 'tasavalta',
+}
+NAME_ENDINGS = {
+    'deu': 'ien', 'fra': 'ie', 'nld': 'ië', 'swe': 'ien', 'pol': 'ja', 'ces': 'ie', 'hun': 'ia',
+}
+OFFICIAL_FORMS = [
+    ('Republic of {}', 60), ('Kingdom of {}', 12), ('Federal Republic of {}', 6),
+    ('Democratic Republic of {}', 5), ('Principality of {}', 3), ('State of {}', 6),
+    ('Commonwealth of {}', 3), ('{}', 5),
+]
+SYLLABLES = [
+    'ba', 'ca', 'da', 'el', 'fa', 'ga', 'ha', 'ir', 'ka', 'la', 'ma', 'na', 'or', 'pa', 'ra',
+    'sa', 'ta', 'ul', 'va', 'za', 'bor', 'dan', 'gar', 'mon', 'nor', 'tor', 'vel', 'kes', 'lin',
+    'mar', 'sol', 'tan', 'ver', 'zan', 'qui', 'ost', 'ber', 'cor', 'dru', 'fen',
+]
+NAME_SUFFIXES = ['ia', 'land', 'stan', 'ovia', 'ica', 'ar', 'istan', 'ea', 'on', 'ania']
+CAPITAL_SUFFIXES = ['', ' City', 'ville', 'grad', 'burg', 'polis', 'abad', 'pur', 'haven']
+POSTAL_FORMATS = [
+    ('#####', '^(\\d{5})$'), ('####', '^(\\d{4})$'), ('######', '^(\\d{6})$'),
+    ('###-####', '^(\\d{7})$'), ('@#@ #@#', '^([A-Z]\\d[A-Z]) ?(\\d[A-Z]\\d)$'),
+]
+
+
+def encode(index, alphabet, length):
+    """Encode index as a fixed-length code over alphabet"""
+    base = len(alphabet)
+    if index >= base ** length:
+        raise CommandError(f"Cannot encode more than {base ** length} unique {length}-letter codes")
+    chars = []
+    for _ in range(length):
+        index, remainder = divmod(index, base)
+        chars.append(alphabet[remainder])
+    return ''.join(reversed(chars))
+
+
+class Weighted:
+    """A fixed weighted choice
+
+    pick() draws the same item as rng.choices(items, weights)[0] would, without
+    summing the weights again on every call.
+    """
+
+    def __init__(self, items, weights):
+        self.items = list(items)
+        self.cum_weights = list(itertools.accumulate(weights))
+        self.total = self.cum_weights[-1] + 0.0
+
+    def pick(self, rng):
+        return self.items[bisect.bisect(self.cum_weights, rng.random() * self.total, 0, len(self.items) - 1)]
+
+
+REGION_CHOICE = Weighted(REGIONS, [share for share, _ in REGIONS.values()])
+OFFICIAL_FORM_CHOICE = Weighted([form for form, _ in OFFICIAL_FORMS], [weight for _, weight in OFFICIAL_FORMS])
+TIMEZONE_COUNT = Weighted([1, 2, 3, 5], [80, 12, 6, 2])
+START_OF_WEEK = Weighted(['monday', 'sunday', 'saturday'], [80, 15, 5])
+CAR_SIDE = Weighted(['right', 'left'], [70, 30])
+CAPITAL_COUNT = Weighted([1, 2, 3], [95, 4, 1])
+LANGUAGE_COUNT = Weighted([1, 2, 3, 4], [55, 30, 10, 5])
+CURRENCY_COUNT = Weighted([1, 2, 3], [88, 10, 2])
+EXTRA_SPELLING_COUNT = Weighted([0, 1, 2], [60, 30, 10])
+MISSING_TRANSLATION_COUNT = Weighted([0, 1, 3], [85, 10, 5])
+BORDER_COUNT = Weighted([0, 1, 2, 3, 4, 5, 6, 8], [20, 15, 18, 17, 12, 9, 6, 3])
+
+
+class ZipfChooser:
+    """Pick items with Zipf-like popularity, like real language and currency usage"""
+
+    def __init__(self, items, exponent=1.1):
+        self.items = items
+        self.cum_weights = list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, len(items) + 1)))
+
+    def choose(self, rng, k):
+        total = self.cum_weights[-1]
+        chosen = []
+        while len(chosen) < min(k, len(self.items)):
+            item = self.items[bisect.bisect(self.cum_weights, rng.random() * total)]
+            if item not in chosen:
+                chosen.append(item)
+        return chosen
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic countries with realistic related data for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int, help='Number of synthetic countries to create')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, the same seed gives the same dataset')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Countries written per COPY batch')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated countries first')
+        parser.add_argument('--database', default='default', help='Database alias to write to')
+        parser.add_argument(
+            '--keep-constraints',
+            action='store_true',
+            help='Leave foreign keys in place while loading (slower, but does not lock the tables)'
+        )
+
+    def clear_synthetic(self, using):
+        """Delete every synthetic country with its related rows"""
+        connection = connections[using]
+        synthetic_ids = f"SELECT id FROM {Country._meta.db_table} WHERE status = %s"
+        with connection.cursor() as cursor:
+            for model, column in [
+                (CapitalCity, 'country_id'), (CountryName, 'country_id'), (AlternativeSpelling, 'country_id'),
+                (BorderCountry, 'from_country_id'), (BorderCountry, 'to_country_id'),
+                (CountryCurrency, 'country_id'), (CountryLanguage, 'country_id'), (Demonym, 'country_id'),
+                (CountryTranslation, 'country_id'), (InternationalDialingCode, 'country_id'),
+            ]:
+                cursor.execute(
+                    f"DELETE FROM {model._meta.db_table} WHERE {column} IN ({synthetic_ids})",
+                    [SYNTHETIC_STATUS],
+                )
+            cursor.execute(f"DELETE FROM {Country._meta.db_table} WHERE status = %s", [SYNTHETIC_STATUS])
+            deleted = cursor.rowcount
+            for model in (Language, Currency):
+                cursor.execute(
+                    f"DELETE FROM {model._meta.db_table} WHERE name LIKE %s", [f"{SYNTHETIC_PREFIX} %"]
+                )
+        return deleted
+
+    def create_pools(self, count, using):
+        """Create the synthetic languages and currencies countries draw from"""
+        pool_size = max(10, int(count * 0.6))
+        languages = [
+            Language(code=encode(i, LOWER_ALPHABET, 3), name=f"{SYNTHETIC_PREFIX} language {i}")
+            for i in range(pool_size)
+        ]
+        currencies = [
+            Currency(code=encode(i, UPPER_ALPHABET, 3), name=f"{SYNTHETIC_PREFIX} currency {i}", symbol='¤')
+            for i in range(pool_size)
+        ]
+        Language.objects.using(using).bulk_create(languages, batch_size=5000, ignore_conflicts=True)
+        Currency.objects.using(using).bulk_create(currencies, batch_size=5000, ignore_conflicts=True)
+        return ZipfChooser([l.code for l in languages]), ZipfChooser([c.code for c in currencies])
+
+    def make_name(self, rng):
+        syllables = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+        return (syllables + rng.choice(NAME_SUFFIXES)).capitalize()
+
+    def localize(self, name, official, lang):
+        """Return (common, official) names in a translation language"""
+        common = name
+        ending = NAME_ENDINGS.get(lang)
+        if ending and name.endswith('ia'):
+            common = name[:-2] + ending
+        prefix = OFFICIAL_PREFIXES.get(lang)
+        return common, f"{prefix} {common}" if prefix else official
+
+    def generate_batch(self, rng, ids, offset, regions, languages, currencies):
+        """Build the rows of every table for one batch of countries"""
+        rows = {model: [] for model in (
+            Country, CapitalCity, CountryName, AlternativeSpelling, CountryCurrency,
+            CountryLanguage, Demonym, CountryTranslation, InternationalDialingCode,
+        )}
+        for position, country_id in enumerate(ids):
+            index = offset + position
+            region = REGION_CHOICE.pick(rng)
+            subregion, continent = rng.choice(list(REGIONS[region][1].items()))
+            regions.setdefault(region, []).append(country_id)
+
+            name = self.make_name(rng)
+            official = OFFICIAL_FORM_CHOICE.pick(rng).format(name)
+            cca2 = encode(index, UPPER_ALPHABET, 2)
+            cca3 = encode(index, UPPER_ALPHABET, 3)
+            centre_lat, centre_lng = REGION_CENTRES[region]
+            lat = max(-90.0, min(90.0, rng.gauss(centre_lat, 15)))
+            lng = max(-180.0, min(180.0, rng.gauss(centre_lng, 25)))
+            offset_hours = round(lng / 15)
+            timezones = sorted({
+                f"UTC{'+' if h >= 0 else '-'}{abs(h):02d}:00"
+                for h in (offset_hours + rng.randint(-1, 1) for _ in range(TIMEZONE_COUNT.pick(rng)))
+            })
+            postal = rng.choice(POSTAL_FORMATS) if rng.random() < 0.6 else (None, None)
+
+            rows[Country].append([
+                country_id, name, official, cca2, cca3, f"{index % 1000:03d}", cca3,
+                rng.random() < 0.9, SYNTHETIC_STATUS, rng.random() < 0.8, region, subregion,
+                round(lat, 4), round(lng, 4), rng.random() < 0.18,
+                round(rng.lognormvariate(11, 2.2), 1), min(int(rng.lognormvariate(15.5, 2.0)), 1_500_000_000),
+                [f".{cca2.lower()}"], START_OF_WEEK.pick(rng),
+                {str(rng.randint(2010, 2022)): round(rng.uniform(24, 63), 1)} if rng.random() < 0.7 else {},
+                cca3, [cca3], CAR_SIDE.pick(rng), timezones, [continent],
+                f"https://goo.gl/maps/synthetic{index}", f"https://www.openstreetmap.org/relation/{index}",
+                f"https://flagcdn.com/w320/synthetic-{index}.png", f"https://flagcdn.com/synthetic-{index}.svg",
+                f"The flag of {name}.", None, None, postal[0], postal[1],
+            ])
+
+            for capital_number in range(CAPITAL_COUNT.pick(rng)):
+                rows[CapitalCity].append([
+                    country_id, name + rng.choice(CAPITAL_SUFFIXES),
+                    round(lat + rng.uniform(-2, 2), 4) if capital_number == 0 else None,
+                    round(lng + rng.uniform(-2, 2), 4) if capital_number == 0 else None,
+                ])
+
+            spoken = languages.choose(rng, LANGUAGE_COUNT.pick(rng))
+            rows[CountryLanguage].extend([country_id, code] for code in spoken)
+            rows[CountryName].extend([country_id, code, official, name] for code in spoken[:2])
+            rows[CountryCurrency].extend(
+                [country_id, code] for code in currencies.choose(rng, CURRENCY_COUNT.pick(rng))
+            )
+
+            spellings = [cca2, official, name.upper()][:rng.randint(1, 3)]
+            spellings += [self.make_name(rng) for _ in range(EXTRA_SPELLING_COUNT.pick(rng))]
+            rows[AlternativeSpelling].extend([country_id, spelling] for spelling in spellings)
+
+            demonym = name.rstrip('aeiou') + 'ian'
+            rows[Demonym].append([country_id, 'eng', demonym, demonym])
+            rows[Demonym].append([country_id, 'fra', demonym, demonym + 'ne'])
+
+            missing = set(rng.sample(TRANSLATION_LANGUAGES, MISSING_TRANSLATION_COUNT.pick(rng)))
+            for lang in TRANSLATION_LANGUAGES:
+                if lang not in missing:
+                    common, official_translation = self.localize(name, official, lang)
+                    rows[CountryTranslation].append([country_id, lang, official_translation, common])
+
+            rows[InternationalDialingCode].append([
+                country_id, f"+{rng.randint(1, 9)}", [f"{rng.randint(0, 99)}"],
+            ])
+        return rows
+
+    def generate_borders(self, rng, regions):
+        """Connect countries of the same region with symmetric land borders"""
+        pairs = set()
+        for members in regions.values():
+            if len(members) < 2:
+                continue
+            for country_id in members:
+                # Roughly a fifth of countries are islands without land borders
+                degree = BORDER_COUNT.pick(rng)
+                for neighbour in rng.sample(members, min(degree, len(members))):
+                    if neighbour != country_id:
+                        pairs.add((country_id, neighbour))
+                        pairs.add((neighbour, country_id))
+        return sorted(pairs)
+
+    def handle(self, *args, **options):
+        """Execute the command"""
+        count = options['count']
+        using = options['database']
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+
+        # Languages and currencies keep their unique constraints, the pools rely on them
+        loaded_models = [
+            Country, CapitalCity, CountryName, AlternativeSpelling, BorderCountry, CountryCurrency,
+            CountryLanguage, Demonym, CountryTranslation, InternationalDialingCode,
+        ]
+        written = Counter()
+        with transaction.atomic(using=using):
+            if options['keep_constraints']:
+                suspended = nullcontext()
+            else:
+                suspended = suspended_constraints(loaded_models, using)
+            with suspended:
+                if options['clear']:
+                    deleted = self.clear_synthetic(using)
+                    self.stdout.write(self.style.WARNING(f"Deleted {deleted} synthetic countries"))
+                if count > 0:
+                    written = self.load(count, rng, options['batch_size'], using)
+                if not options['keep_constraints']:
+                    self.stdout.write(self.style.NOTICE("Rebuilding indexes and validating constraints..."))
+
+        bump_dataset_version()
+        if count <= 0:
+            return
+        elapsed = time.perf_counter() - started
+        total = sum(written.values())
+        for table, rows_written in sorted(written.items()):
+            self.stdout.write(f"  {table:<40} {rows_written:>10}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {count} synthetic countries ({total} rows) in {elapsed:.1f}s, {total / elapsed:,.0f} rows/s"
+        ))
+
+    def load(self, count, rng, batch_size, using):
+        """Generate count countries and COPY them in, returning the rows written per table"""
+        languages, currencies = self.create_pools(count, using)
+        offset = Country.objects.using(using).filter(status=SYNTHETIC_STATUS).count()
+        next_id = (Country.objects.using(using).aggregate(Max('id'))['id__max'] or 0) + 1
+
+        columns = {
+            Country: [
+                'id', 'common_name', 'official_name', 'cca2', 'cca3', 'ccn3', 'cioc', 'independent',
+                'status', 'un_member', 'region', 'subregion', 'latitude', 'longitude', 'landlocked',
+                'area', 'population', 'tlds', 'start_of_week', 'gini', 'fifa', 'car_signs', 'car_side',
+                'timezones', 'continents', 'google_maps_url', 'openstreetmap_url', 'flag_png_url',
+                'flag_svg_url', 'flag_alt', 'coat_of_arms_png_url', 'coat_of_arms_svg_url',
+                'postal_code_format', 'postal_code_regex', 'created_at', 'updated_at',
+            ],
+            CapitalCity: ['country_id', 'name', 'latitude', 'longitude'],
+            CountryName: ['country_id', 'language_code', 'official_name', 'common_name'],
+            AlternativeSpelling: ['country_id', 'spelling'],
+            CountryCurrency: ['country_id', 'currency_id'],
+            CountryLanguage: ['country_id', 'language_id'],
+            Demonym: ['country_id', 'language', 'male', 'female'],
+            CountryTranslation: ['country_id', 'language_code', 'official_name', 'common_name'],
+            InternationalDialingCode: ['country_id', 'root', 'suffixes'],
+        }
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT now()")
+            now = cursor.fetchone()[0]
+
+        written = Counter()
+        regions = {}
+        for batch_start in range(0, count, batch_size):
+            size = min(batch_size, count - batch_start)
+            ids = range(next_id + batch_start, next_id + batch_start + size)
+            rows = self.generate_batch(rng, ids, offset + batch_start, regions, languages, currencies)
+            for row in rows[Country]:
+                row.extend([now, now])
+            for model, model_rows in rows.items():
+                written[model._meta.db_table] += copy_rows(model._meta.db_table, columns[model], model_rows, using)
+            self.stdout.write(f"Generated {batch_start + size}/{count} countries")
+
+        border_rows = self.generate_borders(rng, regions)
+        written[BorderCountry._meta.db_table] += copy_rows(
+            BorderCountry._meta.db_table, ['from_country_id', 'to_country_id'], border_rows, using
+        )
+        reset_sequence(Country, using)
+        return written
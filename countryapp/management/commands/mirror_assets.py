@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from countryapp.assets import IMAGE_ERRORS, build_sprite, make_thumbnail, source_path, store, verify_image
+from countryapp.caching import bump_dataset_version
+from countryapp.management.commands.generate_countries import SYNTHETIC_STATUS
+from countryapp.models import Country
+
+ASSET_FIELDS = [
+    'flag_file', 'flag_thumbnail_file', 'coat_of_arms_file', 'flag_source_url', 'coat_of_arms_source_url', 'flag_sprite',
+]
+
+
+class Command(BaseCommand):
+    help = 'Copy flag and coat of arms images to local storage and build flag thumbnails and a sprite sheet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source-dir',
+            help='Read images from a local mirror of the upstream (<dir>/<host>/<path>) instead of downloading them'
+        )
+        parser.add_argument('--missing', action='store_true', help='Only fetch images not mirrored yet from their current URL')
+        parser.add_argument('--workers', type=int, default=8, help='Parallel downloads')
+        parser.add_argument('--timeout', type=float, default=10.0, help='Seconds to wait for each download')
+
+    def fetch(self, url, options):
+        """Return the content of url, or None when it can't be fetched"""
+        try:
+            if options['source_dir']:
+                return source_path(options['source_dir'], url).read_bytes()
+            response = requests.get(url, timeout=options['timeout'])
+            response.raise_for_status()
+            return response.content
+        except (OSError, requests.RequestException) as e:
+            self.stdout.write(self.style.WARNING(f"Could not fetch {url}: {e}"))
+            return None
+
+    def is_wanted(self, url, source_url, options):
+        """Whether to fetch url, an image last mirrored from source_url"""
+        return bool(url) and not (options['missing'] and url == source_url)
+
+    def handle(self, *args, **options):
+        """Execute the command"""
+        # Synthetic countries point at images that don't exist
+        countries = list(Country.objects.exclude(status=SYNTHETIC_STATUS).order_by('pk'))
+
+        # With --missing, images already mirrored from their current URL are left alone
+        flag_urls = {
+            country.flag_png_url for country in countries
+            if self.is_wanted(country.flag_png_url, country.flag_source_url, options)
+        }
+        coat_of_arms_urls = {
+            country.coat_of_arms_png_url for country in countries
+            if self.is_wanted(country.coat_of_arms_png_url, country.coat_of_arms_source_url, options)
+        }
+        wanted = sorted(flag_urls | coat_of_arms_urls)
+        self.stdout.write(self.style.NOTICE(f"Fetching {len(wanted)} images"))
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            fetched = dict(zip(wanted, executor.map(lambda url: self.fetch(url, options), wanted)))
+
+        # The stored names of every image that could be read. Others, such as an error
+        # page served with a 200, are skipped and their countries keep the older copies.
+        flags, coats_of_arms = {}, {}
+        for url, data in fetched.items():
+            if data is None:
+                continue
+            try:
+                if url in flag_urls:
+                    thumbnail = make_thumbnail(data)
+                    flags[url] = (store('flags', data), store('thumbnails', thumbnail))
+                if url in coat_of_arms_urls:
+                    verify_image(data)
+                    coats_of_arms[url] = store('coats', data)
+            except IMAGE_ERRORS as e:
+                self.stdout.write(self.style.WARNING(f"Could not read the image at {url}: {e}"))
+
+        thumbnails = {}
+        for country in countries:
+            if country.flag_png_url in flags:
+                country.flag_file, country.flag_thumbnail_file = flags[country.flag_png_url]
+                country.flag_source_url = country.flag_png_url
+            if country.coat_of_arms_png_url in coats_of_arms:
+                country.coat_of_arms_file = coats_of_arms[country.coat_of_arms_png_url]
+                country.coat_of_arms_source_url = country.coat_of_arms_png_url
+            if country.flag_thumbnail_file:
+                with default_storage.open(country.flag_thumbnail_file) as f:
+                    thumbnails[country.cca3] = f.read()
+
+        # One sheet with every thumbnail, the list page loads it instead of a flag per row
+        sprite_file = None
+        offsets = {}
+        if thumbnails:
+            sheet, offsets = build_sprite(thumbnails)
+            sprite_file = store('sprites', sheet)
+        for country in countries:
+            offset = offsets.get(country.cca3)
+            country.flag_sprite = {'file': sprite_file, **offset} if offset else None
+
+        with transaction.atomic():
+            Country.objects.bulk_update(countries, ASSET_FIELDS, batch_size=500)
+        # Drop the cached pages with the old URLs
+        bump_dataset_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Mirrored {len(flags) + len(coats_of_arms)} of {len(wanted)} images; "
+            f"sprite sheet with {len(offsets)} flags: {sprite_file}"
+        ))
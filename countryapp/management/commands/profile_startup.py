@@ -0,0 +1,93 @@
+import json
+import re
+import statistics
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: import the WSGI entry point like a cold serverless
+# instance does, then optionally serve one request
+STARTUP_SCRIPT = """
+import json, sys, time
+from wsgiref.util import setup_testing_defaults
+
+started = time.perf_counter()
+import config.wsgi
+imported = time.perf_counter()
+timings = {'import_ms': (imported - started) * 1000}
+
+path = sys.argv[1]
+if path:
+    environ = {'PATH_INFO': path, 'HTTP_HOST': 'localhost'}
+    setup_testing_defaults(environ)
+    statuses = []
+    body = config.wsgi.application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    b''.join(body)
+    timings['first_request_ms'] = (time.perf_counter() - imported) * 1000
+    timings['status'] = statuses[0]
+print(json.dumps(timings))
+"""
+
+IMPORT_TIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+class Command(BaseCommand):
+    help = 'Profile the cold start of the WSGI entry point: import time per module and first request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to start')
+        parser.add_argument('--path', default='/api/countries/', help="Request to serve after the import ('' for none)")
+        parser.add_argument('--top', type=int, default=20, help='Number of packages and modules to list')
+
+    def run_once(self, path):
+        """Start one interpreter; return its timings and {module: (self_us, cumulative_us, depth)}"""
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT, path],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Startup failed:\n{result.stderr[-2000:]}")
+        modules = {}
+        for line in result.stderr.splitlines():
+            match = IMPORT_TIME_LINE.match(line)
+            if match:
+                self_us, cumulative_us, indent, module = match.groups()
+                modules[module] = (int(self_us), int(cumulative_us), len(indent) // 2)
+        return json.loads(result.stdout.strip().splitlines()[-1]), modules
+
+    def handle(self, *args, **options):
+        """Execute the command"""
+        runs = [self.run_once(options['path']) for _ in range(options['runs'])]
+        timings = [run[0] for run in runs]
+
+        self.stdout.write(self.style.NOTICE(f"Cold start over {len(runs)} runs (median)"))
+        self.stdout.write(f"  import config.wsgi   {statistics.median(t['import_ms'] for t in timings):8.1f} ms")
+        if options['path']:
+            self.stdout.write(
+                f"  first request        {statistics.median(t['first_request_ms'] for t in timings):8.1f} ms"
+                f"  ({options['path']} -> {timings[-1]['status']})"
+            )
+
+        # Self time summed per top level package, median module timings across runs
+        packages = Counter()
+        module_times = {}
+        for _, modules in runs:
+            for module, (self_us, cumulative_us, depth) in modules.items():
+                packages[module.split('.')[0]] += self_us / len(runs)
+                module_times.setdefault(module, []).append((self_us, cumulative_us, depth))
+        total = sum(packages.values())
+
+        self.stdout.write(self.style.NOTICE(f"\nImport time by package (total {total / 1000:.1f} ms)"))
+        for package, self_us in packages.most_common(options['top']):
+            self.stdout.write(f"  {package:<40}{self_us / 1000:8.1f} ms {100 * self_us / total:5.1f}%")
+
+        self.stdout.write(self.style.NOTICE("\nSlowest imports (cumulative, including what they import)"))
+        slowest = sorted(
+            ((statistics.median(t[1] for t in times), module) for module, times in module_times.items()),
+            reverse=True,
+        )
+        for cumulative_us, module in slowest[:options['top']]:
+            self.stdout.write(f"  {module:<60}{cumulative_us / 1000:8.1f} ms")
@@ -0,0 +1,78 @@
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+    generate_latest, multiprocess
+)
+
+# Buckets in seconds, tuned for an API whose requests mostly take a few milliseconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+REQUEST_LATENCY = Histogram(
+    'countryapp_request_latency_seconds',
+    'Request latency by URL name',
+    ['url_name', 'method'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_COUNT = Counter(
+    'countryapp_requests',
+    'Requests by URL name and status code',
+    ['url_name', 'method', 'status'],
+)
+REQUEST_QUERY_COUNT = Histogram(
+    'countryapp_request_db_queries',
+    'Database queries per request by URL name',
+    ['url_name'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    'countryapp_cache_lookups',
+    'Cache lookups by cache name and result (hit/miss/stale/coalesced), hit ratio = hit / total',
+    ['cache', 'result'],
+)
+IMPORT_DURATION = Gauge(
+    'countryapp_import_duration_seconds',
+    'Duration of the last fetch_countries import',
+    multiprocess_mode='mostrecent',
+)
+IMPORT_ROWS_WRITTEN = Gauge(
+    'countryapp_import_rows_written',
+    'Rows written by the last fetch_countries import by table',
+    ['table'],
+    multiprocess_mode='mostrecent',
+)
+
+
+def record_request(url_name, method, status, duration, query_count=None):
+    """Record one handled request"""
+    REQUEST_LATENCY.labels(url_name, method).observe(duration)
+    REQUEST_COUNT.labels(url_name, method, str(status)).inc()
+    if query_count is not None:
+        REQUEST_QUERY_COUNT.labels(url_name).observe(query_count)
+
+
+def record_cache_lookup(cache, result):
+    """Record a lookup of the named cache: 'hit', 'miss', 'stale' or 'coalesced' (waited for another build)"""
+    CACHE_LOOKUPS.labels(cache, result).inc()
+
+
+def record_import(duration, rows_written):
+    """Record the duration and rows written per table of an import"""
+    IMPORT_DURATION.set(duration)
+    for table, rows in rows_written.items():
+        IMPORT_ROWS_WRITTEN.labels(table).set(rows)
+
+
+def render_metrics():
+    """Return the exposition payload and its content type
+
+    With PROMETHEUS_MULTIPROC_DIR set, every worker process writes its samples to
+    that directory and they are aggregated here, so any worker can answer a scrape.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,168 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from .compression import COMPRESSIBLE_TYPES, choose_encoding, get_compressed_body
+from .instrumentation import collect_metrics, current_metrics, server_timing_header, timed
+from .metrics import record_request
+from .routers import get_replica_aliases, replica_reads_enabled, use_replicas
+
+performance_logger = logging.getLogger('countryapp.performance')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    """Serve safe requests from read replicas unless the client recently wrote"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_replica_aliases():
+            return self.get_response(request)
+
+        pinned = settings.DATABASE_REPLICA_PIN_COOKIE in request.COOKIES
+        read_only = request.method in SAFE_METHODS and not pinned
+
+        with use_replicas(read_only):
+            response = self.get_response(request)
+            # A write during a safe request (e.g. a session save) counts too
+            wrote = request.method not in SAFE_METHODS or (read_only and not replica_reads_enabled())
+
+        if wrote:
+            # Keep this client on the primary until the replicas have caught up
+            response.set_cookie(
+                settings.DATABASE_REPLICA_PIN_COOKIE,
+                '1',
+                max_age=settings.DATABASE_REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class ServerTimingMiddleware:
+    """Measure DB, serializer and render time per request and report it"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PERFORMANCE_INSTRUMENTATION:
+            return self.get_response(request)
+
+        # Per-query SQL timings are only kept for a sample of requests
+        sample_rate = settings.PERFORMANCE_QUERY_SAMPLE_RATE
+        record_queries = sample_rate > 0 and random.random() < sample_rate
+
+        with collect_metrics(record_queries=record_queries) as metrics, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        total = metrics.elapsed()
+
+        if settings.PERFORMANCE_SERVER_TIMING:
+            response['Server-Timing'] = server_timing_header(metrics, total)
+        if settings.PERFORMANCE_LOG_JSON:
+            self.log_request(request, response, metrics, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called right before the response is rendered, the callback right after
+        metrics = current_metrics()
+        if metrics is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: metrics.add_duration('render', time.perf_counter() - start)
+            )
+        return response
+
+    def log_request(self, request, response, metrics, total):
+        total_ms = total * 1000
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'url_name': getattr(request.resolver_match, 'url_name', None),
+            'status': response.status_code,
+            'total_ms': round(total_ms, 3),
+            'db_ms': round(metrics.db_time * 1000, 3),
+            'queries': metrics.query_count,
+            **{f'{name}_ms': round(seconds * 1000, 3) for name, seconds in metrics.durations.items()},
+        }
+        if metrics.record_queries and total_ms >= settings.PERFORMANCE_SLOW_REQUEST_MS:
+            record['sql'] = metrics.queries
+        performance_logger.info(json.dumps(record))
+
+
+class PrometheusMetricsMiddleware:
+    """Record latency, status and query count of every request for /metrics"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        # Label by URL name, not path, to keep the number of series bounded
+        url_name = getattr(request.resolver_match, 'url_name', None) or 'unmatched'
+        request_metrics = current_metrics()
+        record_request(
+            url_name,
+            request.method,
+            response.status_code,
+            duration,
+            query_count=request_metrics.query_count if request_metrics else None,
+        )
+        return response
+
+
+class CompressionMiddleware:
+    """Compress responses with brotli or gzip, as negotiated with Accept-Encoding
+
+    Views mark responses built from cached data with `cache_compressed = True`;
+    their compressed bodies are cached too, so a cache hit isn't compressed again.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or response.get('Content-Type', '').split(';')[0].strip() not in COMPRESSIBLE_TYPES
+        ):
+            return response
+
+        patch_vary_headers(response, ['Accept-Encoding'])
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        with timed('compress'):
+            compressed = get_compressed_body(
+                response.content, encoding, cache_variant=getattr(response, 'cache_compressed', False)
+            )
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # The encoded body is a different representation, so a strong ETag must not match it
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
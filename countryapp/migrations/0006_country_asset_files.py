@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-19 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('countryapp', '0005_alter_country_postal_code_regex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='country',
+            name='coat_of_arms_file',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='country',
+            name='flag_file',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='country',
+            name='flag_sprite',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='country',
+            name='flag_thumbnail_file',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
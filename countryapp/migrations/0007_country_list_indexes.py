@@ -0,0 +1,76 @@
+# Generated by Django 5.2.1 on 2026-10-19 06:00
+
+import django.contrib.postgres.indexes
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('countryapp', '0006_country_asset_files'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(fields=['common_name', 'id'], name='country_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(fields=['region', 'common_name', 'id'], name='country_region_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(fields=['subregion', 'common_name', 'id'], name='country_subregion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(fields=['car_side', 'common_name', 'id'], name='country_car_side_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['continents'], name='country_continents_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['timezones'], name='country_timezones_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(condition=models.Q(('landlocked', True)), fields=['common_name', 'id'], name='country_landlocked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(condition=models.Q(('independent', False)), fields=['common_name', 'id'], name='country_dependent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(condition=models.Q(('un_member', False)), fields=['common_name', 'id'], name='country_non_un_member_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(models.OrderBy(models.F('population'), nulls_last=True), models.OrderBy(models.F('id')), name='country_population_asc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(models.OrderBy(models.F('population'), descending=True, nulls_last=True), models.OrderBy(models.F('id'), descending=True), name='country_population_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(models.OrderBy(models.F('area'), nulls_last=True), models.OrderBy(models.F('id')), name='country_area_asc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(models.OrderBy(models.F('area'), descending=True, nulls_last=True), models.OrderBy(models.F('id'), descending=True), name='country_area_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('population'), '/', django.db.models.functions.comparison.NullIf(models.F('area'), 0.0)), nulls_last=True), models.OrderBy(models.F('id')), name='country_density_asc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('population'), '/', django.db.models.functions.comparison.NullIf(models.F('area'), 0.0)), descending=True, nulls_last=True), models.OrderBy(models.F('id'), descending=True), name='country_density_desc_idx'),
+        ),
+    ]
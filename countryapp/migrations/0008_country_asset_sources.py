@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('countryapp', '0007_country_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='country',
+            name='coat_of_arms_source_url',
+            field=models.URLField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='country',
+            name='flag_source_url',
+            field=models.URLField(blank=True, max_length=255, null=True),
+        ),
+    ]
@@ -1,6 +1,14 @@
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
-from django.db.models import JSONField
+from django.contrib.postgres.indexes import GinIndex
+from django.db.models import F, JSONField, Q
+from django.db.models.functions import NullIf
+
+
+def population_density():
+    """People per km², NULL when the area is unknown or zero"""
+    return F('population') / NullIf(F('area'), 0.0)
+
 
 class Country(models.Model):
     """Main model to represent a country"""
@@ -46,6 +54,16 @@ class Country(models.Model):
     coat_of_arms_png_url = models.URLField(max_length=255, null=True, blank=True)
     coat_of_arms_svg_url = models.URLField(max_length=255, null=True, blank=True)
     
+    # Local copies of the images, written by `mirror_assets` (names in the default storage)
+    flag_file = models.CharField(max_length=255, null=True, blank=True)
+    flag_thumbnail_file = models.CharField(max_length=255, null=True, blank=True)
+    coat_of_arms_file = models.CharField(max_length=255, null=True, blank=True)
+    # The URLs the local copies were made from, mirrored again when the upstream URL changes
+    flag_source_url = models.URLField(max_length=255, null=True, blank=True)
+    coat_of_arms_source_url = models.URLField(max_length=255, null=True, blank=True)
+    # Where the thumbnail is in the flag sprite sheet: {file, x, y, width, height}
+    flag_sprite = JSONField(null=True, blank=True)
+    
     # Postal code information
     postal_code_format = models.CharField(max_length=255, null=True, blank=True)
     postal_code_regex = models.CharField(max_length=255, null=True, blank=True)
@@ -56,6 +74,26 @@ class Country(models.Model):
     
     class Meta:
         verbose_name_plural = "Countries"
+        # One index per filter and sort order of the country list (countryapp/filters.py)
+        indexes = [
+            models.Index(fields=['common_name', 'id'], name='country_name_idx'),
+            models.Index(fields=['region', 'common_name', 'id'], name='country_region_idx'),
+            models.Index(fields=['subregion', 'common_name', 'id'], name='country_subregion_idx'),
+            models.Index(fields=['car_side', 'common_name', 'id'], name='country_car_side_idx'),
+            GinIndex(fields=['continents'], name='country_continents_gin'),
+            GinIndex(fields=['timezones'], name='country_timezones_gin'),
+            # Most countries are independent, UN members and not landlocked: only the rare side is worth an index
+            models.Index(fields=['common_name', 'id'], condition=Q(landlocked=True), name='country_landlocked_idx'),
+            models.Index(fields=['common_name', 'id'], condition=Q(independent=False), name='country_dependent_idx'),
+            models.Index(fields=['common_name', 'id'], condition=Q(un_member=False), name='country_non_un_member_idx'),
+            # Sorting puts unknown values last in both directions, which a backward scan can't do
+            models.Index(F('population').asc(nulls_last=True), F('id').asc(), name='country_population_asc_idx'),
+            models.Index(F('population').desc(nulls_last=True), F('id').desc(), name='country_population_desc_idx'),
+            models.Index(F('area').asc(nulls_last=True), F('id').asc(), name='country_area_asc_idx'),
+            models.Index(F('area').desc(nulls_last=True), F('id').desc(), name='country_area_desc_idx'),
+            models.Index(population_density().asc(nulls_last=True), F('id').asc(), name='country_density_asc_idx'),
+            models.Index(population_density().desc(nulls_last=True), F('id').desc(), name='country_density_desc_idx'),
+        ]
     
     def __str__(self):
         return self.common_name
@@ -0,0 +1,98 @@
+"""Postal code validation against Country.postal_code_regex
+
+The regexes come from REST Countries and mostly match codes without separators
+(Portugal's matches seven digits for codes written '####-###'), so a code that doesn't
+match as given is tried again without spaces and dashes. Valid codes are then
+written the way postal_code_format shows them: '#' is a digit, '@' a letter,
+and alternatives are separated by '|'. Digits and letters are ASCII only: the
+regexes are compiled with re.ASCII, so their digit classes don't match the digits
+of other scripts.
+"""
+import re
+import string
+
+from .indexes import get_index
+from .models import Country
+
+SEPARATORS = re.compile(r'[\s\-]', re.ASCII)
+ALPHANUMERIC = frozenset(string.ascii_letters + string.digits)
+
+
+def is_slot(char):
+    return char in '#@' or char in ALPHANUMERIC
+
+
+def fits_slot(slot, char):
+    if slot == '#':
+        return char in string.digits
+    if slot == '@':
+        return char in string.ascii_letters
+    return slot == char
+
+
+def format_postal_code(compact, postal_code_format):
+    """Return compact (no separators) laid out like postal_code_format, or None when no alternative fits"""
+    for layout in postal_code_format.split('|'):
+        slots = [char for char in layout if is_slot(char)]
+        if len(slots) == len(compact) and all(map(fits_slot, slots, compact)):
+            chars = iter(compact)
+            return ''.join(next(chars) if is_slot(char) else char for char in layout)
+    return None
+
+
+class PostalCodeRules:
+    """Compiled postal code regex and format of every country, by cca2 and cca3"""
+
+    def __init__(self, rules):
+        self.rules = rules
+
+    @classmethod
+    def build(cls):
+        rules = {}
+        for cca2, cca3, regex, postal_code_format in Country.objects.values_list(
+            'cca2', 'cca3', 'postal_code_regex', 'postal_code_format'
+        ):
+            try:
+                pattern = re.compile(regex, re.ASCII) if regex else None
+            except re.error:
+                pattern = None
+            rules[cca2.upper()] = rules[cca3.upper()] = (pattern, postal_code_format or '')
+        return cls(rules)
+
+    def validate(self, country, postal_code):
+        """Return (normalized postal code, error); normalized is None when the code is invalid"""
+        rule = self.rules.get(country.strip().upper())
+        if rule is None:
+            return None, 'Unknown country code.'
+        pattern, postal_code_format = rule
+        if pattern is None:
+            return None, 'The country has no postal code format.'
+
+        candidate = postal_code.strip().upper()
+        compact = SEPARATORS.sub('', candidate)
+        if not (pattern.fullmatch(candidate) or pattern.fullmatch(compact)):
+            return None, 'Does not match the postal code format of the country.'
+        return format_postal_code(compact, postal_code_format) or candidate, None
+
+
+def get_postal_code_rules():
+    return get_index('postal-codes', PostalCodeRules.build)
+
+
+def validate_postal_codes(pairs):
+    """Return a {'country', 'postal_code', 'valid', 'normalized', 'error'} dict for each pair, in order
+
+    pairs are (country code, postal code), the country as cca2 or cca3.
+    """
+    rules = get_postal_code_rules()
+    results = []
+    for country, postal_code in pairs:
+        normalized, error = rules.validate(country, postal_code)
+        results.append({
+            'country': country,
+            'postal_code': postal_code,
+            'valid': error is None,
+            'normalized': normalized,
+            'error': error,
+        })
+    return results
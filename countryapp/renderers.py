@@ -0,0 +1,97 @@
+"""Compact response formats, chosen with the Accept header or ?format=
+
+    Accept: application/msgpack             MessagePack      ?format=msgpack
+    Accept: application/cbor                CBOR             ?format=cbor
+    Accept: application/vnd.columnar+json   columnar JSON    ?format=columnar
+
+Columnar JSON sends the field names of a list once and every item as an array
+of values: {"fields": [...], "rows": [[...], ...]}. Only lists change shape,
+including the results of a paginated response; other data is sent as JSON.
+
+The distance matrix endpoint can also answer with a NumPy .npy array
+(Accept: application/x-npy or ?format=npy).
+"""
+import io
+
+import cbor2
+import msgpack
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+# Decimals, dates, UUIDs and lazy strings become what they are in JSON responses
+_json_encoder = JSONEncoder()
+
+
+def to_columns(items):
+    """Return a list of dicts as {'fields': [...], 'rows': [[...], ...]}"""
+    fields = list(dict.fromkeys(key for item in items for key in item))
+    return {'fields': fields, 'rows': [[item.get(field) for field in fields] for item in items]}
+
+
+def columnar(data):
+    """Return data with its list, or the results list of a paginated response, in columns"""
+    if isinstance(data, list) and all(isinstance(item, dict) for item in data):
+        return to_columns(data)
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return {**data, 'results': columnar(data['results'])}
+    return data
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_json_encoder.default)
+
+
+class CBORRenderer(renderers.BaseRenderer):
+    media_type = 'application/cbor'
+    format = 'cbor'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return cbor2.dumps(data, default=lambda encoder, value: encoder.encode(_json_encoder.default(value)))
+
+
+class ColumnarJSONRenderer(renderers.JSONRenderer):
+    media_type = 'application/vnd.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(columnar(data), accepted_media_type, renderer_context)
+
+
+class NpyRenderer(renderers.BaseRenderer):
+    """The 'distances' matrix of the data as a float32 .npy array, its row countries in X-Distance-Rows
+
+    Anything else, like an error, is sent as JSON.
+    """
+    media_type = 'application/x-npy'
+    format = 'npy'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if not (isinstance(data, dict) and 'distances' in data):
+            if response is not None:
+                response['Content-Type'] = 'application/json'
+            return renderers.JSONRenderer().render(data)
+
+        # Imported here, NumPy is slow to import and only the distances endpoint needs it
+        import numpy as np
+
+        if response is not None:
+            response['X-Distance-Rows'] = ','.join(label['country'] for label in data['rows'])
+            response['X-Distance-Columns'] = ','.join(label['country'] for label in data['columns'])
+        buffer = io.BytesIO()
+        np.save(buffer, np.asarray(data['distances'], dtype=np.float32))
+        return buffer.getvalue()
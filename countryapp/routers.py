@@ -0,0 +1,64 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY_DATABASE = 'default'
+
+# Reads go to the primary unless the current request (or loader) opted in
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def get_replica_aliases():
+    """Return the database aliases configured as read replicas"""
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def replica_reads_enabled():
+    """Return True if reads in the current context may use a replica"""
+    return _replica_reads.get() and bool(get_replica_aliases())
+
+
+@contextmanager
+def use_replicas(enabled=True):
+    """Allow (or forbid) replica reads for the duration of the block"""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def pin_to_primary():
+    """Send every following read in the current context to the primary"""
+    _replica_reads.set(False)
+
+
+class PrimaryReplicaRouter:
+    """Route reads to replicas when allowed and all writes to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if not replica_reads_enabled():
+            return PRIMARY_DATABASE
+
+        # Keep related lookups on the database the instance was loaded from
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in get_replica_aliases():
+            return instance._state.db
+        return random.choice(get_replica_aliases())
+
+    def db_for_write(self, model, **hints):
+        # Once something is written, later reads must see it
+        pin_to_primary()
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY_DATABASE, *get_replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication
+        return db == PRIMARY_DATABASE
@@ -0,0 +1,52 @@
+import hashlib
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.checks import Error
+from drf_spectacular.renderers import OpenApiJsonRenderer
+from drf_spectacular.settings import spectacular_settings
+
+REGENERATE_HINT = 'Run: python manage.py spectacular --format openapi-json --file {path}'
+
+
+def generate_schema():
+    """Introspect the views and serializers and return the OpenAPI schema"""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+def render_schema(schema, renderer_class=OpenApiJsonRenderer):
+    return renderer_class().render(schema, renderer_context={})
+
+
+@lru_cache(maxsize=None)
+def get_schema():
+    """Return the schema stored in OPENAPI_SCHEMA_FILE, or generate it once per process"""
+    path = settings.OPENAPI_SCHEMA_FILE
+    if path.exists():
+        return json.loads(path.read_bytes())
+    return generate_schema()
+
+
+@lru_cache(maxsize=None)
+def get_rendered_schema(renderer_class):
+    """Return the schema rendered with renderer_class and the hash of the result"""
+    body = render_schema(get_schema(), renderer_class)
+    return body, hashlib.sha256(body).hexdigest()[:16]
+
+
+def get_schema_hash():
+    """Return a hash identifying the current schema"""
+    return get_rendered_schema(OpenApiJsonRenderer)[1]
+
+
+def check_schema_file(app_configs, **kwargs):
+    """Fail when OPENAPI_SCHEMA_FILE is missing or differs from what the views generate"""
+    path = settings.OPENAPI_SCHEMA_FILE
+    hint = REGENERATE_HINT.format(path=path.relative_to(settings.BASE_DIR))
+    if not path.exists():
+        return [Error('The OpenAPI schema file does not exist.', hint=hint, id='countryapp.E001')]
+    if path.read_bytes() != render_schema(generate_schema()):
+        return [Error('The OpenAPI schema file is out of date with the views.', hint=hint, id='countryapp.E002')]
+    return []
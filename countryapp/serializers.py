@@ -1,8 +1,13 @@
+from django.conf import settings
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from .assets import asset_url
+from .filters import COUNTRY_ORDERINGS
+from .instrumentation import TimedSerializerMixin
 from .models import (
     Country, InternationalDialingCode
 )
-class CountryListSerializer(serializers.ModelSerializer):
+class CountryListSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for list of countries with full details matching the RestCountries API format"""
     # name = serializers.SerializerMethodField()
     capital = serializers.SerializerMethodField()
@@ -12,7 +17,7 @@ class CountryListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Country
         fields = [
-            'id', 'common_name', 'cca2', 'capital', 'population', 'timezones', 'flags'
+            'id', 'common_name', 'official_name', 'cca2', 'capital', 'population', 'timezones', 'flags'
         ]
     
     # def get_name(self, obj):
@@ -35,14 +40,31 @@ class CountryListSerializer(serializers.ModelSerializer):
     def get_capital(self, obj):
         return [capital.name for capital in obj.capitals.all()]
     
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Countries annotated by localize() show their names in the requested language
+        if hasattr(instance, 'localized_common_name'):
+            data['common_name'] = instance.localized_common_name
+            data['official_name'] = instance.localized_official_name
+        return data
+    
     def get_flags(self, obj):
+        # Mirrored copies when `mirror_assets` has run; the page draws the flags from the sprite
+        sprite = obj.flag_sprite
+        if sprite:
+            sprite = {
+                'url': asset_url(sprite['file']), 'x': sprite['x'], 'y': sprite['y'],
+                'width': sprite['width'], 'height': sprite['height'],
+            }
         return {
-            'png': obj.flag_png_url,
+            'png': asset_url(obj.flag_file, obj.flag_png_url),
             'svg': obj.flag_svg_url,
-            'alt': obj.flag_alt
+            'alt': obj.flag_alt,
+            'thumbnail': asset_url(obj.flag_thumbnail_file),
+            'sprite': sprite
         }
     
-class CountryDetailSerializer(serializers.ModelSerializer):
+class CountryDetailSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for list of countries with full details matching the RestCountries API format"""
     name = serializers.SerializerMethodField()
     tld = serializers.SerializerMethodField()
@@ -85,9 +107,10 @@ class CountryDetailSerializer(serializers.ModelSerializer):
         ]
     
     def get_name(self, obj):
+        # Countries annotated by localize() show their names in the requested language
         result = {
-            'common': obj.common_name,
-            'official': obj.official_name,
+            'common': getattr(obj, 'localized_common_name', obj.common_name),
+            'official': getattr(obj, 'localized_official_name', obj.official_name),
             'nativeName': {}
         }
         
@@ -179,14 +202,14 @@ class CountryDetailSerializer(serializers.ModelSerializer):
     
     def get_flags(self, obj):
         return {
-            'png': obj.flag_png_url,
+            'png': asset_url(obj.flag_file, obj.flag_png_url),
             'svg': obj.flag_svg_url,
             'alt': obj.flag_alt
         }
     
     def get_coatOfArms(self, obj):
         return {
-            'png': obj.coat_of_arms_png_url,
+            'png': asset_url(obj.coat_of_arms_file, obj.coat_of_arms_png_url),
             'svg': obj.coat_of_arms_svg_url
         }
     
@@ -223,11 +246,90 @@ class CountryCreateUpdateSerializer(serializers.ModelSerializer):
             'coat_of_arms_svg_url', 'postal_code_format', 'postal_code_regex'
         ]
         
-class CountryListRegionSerializer(serializers.ModelSerializer):
+class CountryListRegionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for list of countries with full details matching the RestCountries API format"""
     
     class Meta:
         model = Country
         fields = [
             'id', 'common_name'
-        ]
\ No newline at end of file
+        ]
+
+class CountryListQuerySerializer(serializers.Serializer):
+    """Query parameters filtering and sorting the country list"""
+    region = serializers.CharField(required=False, help_text="Region, e.g. 'Europe'")
+    subregion = serializers.CharField(required=False, help_text="Subregion, e.g. 'Western Europe'")
+    continent = serializers.CharField(required=False, help_text="Countries on this continent")
+    timezone = serializers.CharField(required=False, help_text="Countries in this timezone, e.g. 'UTC+01:00'")
+    landlocked = serializers.BooleanField(required=False)
+    independent = serializers.BooleanField(required=False)
+    un_member = serializers.BooleanField(required=False)
+    car_side = serializers.ChoiceField(choices=['left', 'right'], required=False)
+    population_min = serializers.IntegerField(required=False, min_value=0)
+    population_max = serializers.IntegerField(required=False, min_value=0)
+    area_min = serializers.FloatField(required=False, min_value=0)
+    area_max = serializers.FloatField(required=False, min_value=0)
+    ordering = serializers.ChoiceField(
+        choices=[prefix + field for field in COUNTRY_ORDERINGS for prefix in ('', '-')],
+        default='name',
+        help_text="Sort order, '-' for descending; unknown values come last"
+    )
+    
+    def validate(self, data):
+        for field in ('population', 'area'):
+            low, high = data.get(f'{field}_min'), data.get(f'{field}_max')
+            if low is not None and high is not None and low > high:
+                raise serializers.ValidationError({f'{field}_max': f"Must be at least {field}_min."})
+        return data
+
+
+class PhoneNumberBatchSerializer(serializers.Serializer):
+    """Phone numbers in international format ('+4930123456', '0049 30 123456')"""
+    numbers = serializers.ListField(
+        child=serializers.CharField(max_length=64, trim_whitespace=False),
+        allow_empty=False,
+        max_length=settings.BULK_LOOKUP_MAX_ITEMS
+    )
+
+
+class PhoneNumberCountrySerializer(serializers.Serializer):
+    number = serializers.CharField()
+    prefix = serializers.CharField(allow_null=True, help_text="Longest matching dialing prefix")
+    countries = serializers.ListField(child=serializers.CharField(), help_text="cca3 codes using the prefix")
+
+
+@extend_schema_field(serializers.ListField(child=serializers.CharField(), min_length=2, max_length=2))
+class PostalCodePairField(serializers.Field):
+    """A [country code, postal code] pair, checked without a field per item to keep large batches fast"""
+    default_error_messages = {'invalid': 'Expected a [country code, postal code] pair of strings.'}
+    
+    def to_internal_value(self, data):
+        if not (isinstance(data, list) and len(data) == 2 and all(isinstance(value, str) for value in data)):
+            self.fail('invalid')
+        return data
+    
+    def to_representation(self, value):
+        return value
+
+
+class PostalCodeBatchSerializer(serializers.Serializer):
+    """Postal codes to validate as [country code (cca2 or cca3), postal code] pairs"""
+    items = serializers.ListField(
+        child=PostalCodePairField(),
+        allow_empty=False,
+        max_length=settings.BULK_LOOKUP_MAX_ITEMS
+    )
+
+
+class PostalCodeResultSerializer(serializers.Serializer):
+    country = serializers.CharField()
+    postal_code = serializers.CharField()
+    valid = serializers.BooleanField()
+    normalized = serializers.CharField(allow_null=True, help_text="The code written like the country's format")
+    error = serializers.CharField(allow_null=True)
+
+
+class DistanceLabelSerializer(serializers.Serializer):
+    id = serializers.IntegerField(help_text="Capital id")
+    capital = serializers.CharField()
+    country = serializers.CharField(help_text="cca3")
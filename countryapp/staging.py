@@ -0,0 +1,180 @@
+"""Blue/green imports: country data is loaded into a staging schema, then swapped in
+
+The staging schema gets its own copy of every country table, created from the
+models like the migrations would, and the import writes there through the
+search_path while the API keeps reading the live tables. Publishing moves the
+staging tables into the live schema and the live ones into PREVIOUS_SCHEMA in one
+short transaction, so readers see either the old or the new dataset and the old
+one can be swapped back with rollback(), as long as no country migration ran since.
+"""
+import time
+from contextlib import contextmanager
+
+from django.core.management.color import no_style
+from django.db import OperationalError, connection, transaction
+
+from .caching import bump_dataset_version
+from .models import (
+    AlternativeSpelling, BorderCountry, CapitalCity, Country, CountryCurrency, CountryLanguage, CountryName,
+    CountryTranslation, Currency, Demonym, InternationalDialingCode, Language,
+)
+
+STAGING_SCHEMA = 'countryapp_staging'
+PREVIOUS_SCHEMA = 'countryapp_previous'
+SWAP_SCHEMA = 'countryapp_swap'
+
+# Every table of the dataset, referenced tables first
+DATASET_MODELS = [
+    Country, Currency, Language, CapitalCity, CountryName, AlternativeSpelling, BorderCountry,
+    CountryCurrency, CountryLanguage, Demonym, CountryTranslation, InternationalDialingCode,
+]
+
+# How long a swap waits for the locks on the live tables, in ms. Readers queue
+# behind a waiting swap, so it gives up quickly and is tried again after a pause
+# doubling from SWAP_RETRY_DELAY seconds, at most SWAP_ATTEMPTS times.
+SWAP_LOCK_TIMEOUT = 100
+SWAP_ATTEMPTS = 8
+SWAP_RETRY_DELAY = 0.1
+
+# Table in PREVIOUS_SCHEMA with the names of the countryapp migrations its tables were created with
+STASHED_MIGRATIONS_TABLE = 'stashed_migrations'
+
+LOCK_NOT_AVAILABLE = '55P03'
+
+
+class RollbackError(Exception):
+    """The previous dataset can't be swapped back in"""
+
+
+def quote(name):
+    return connection.ops.quote_name(name)
+
+
+def get_live_schema(cursor):
+    cursor.execute('SELECT current_schema()')
+    return cursor.fetchone()[0]
+
+
+def schema_exists(schema):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM pg_namespace WHERE nspname = %s)', [schema])
+        return cursor.fetchone()[0]
+
+
+@contextmanager
+def use_schema(schema):
+    """Resolve unqualified table names in schema before the live schema on this connection"""
+    with connection.cursor() as cursor:
+        cursor.execute('SHOW search_path')
+        search_path = cursor.fetchone()[0]
+        cursor.execute(f'SET search_path TO {quote(schema)}, {search_path}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'SET search_path TO {search_path}')
+
+
+def create_staging(copy_live=True):
+    """Create STAGING_SCHEMA with the country tables, empty or with a copy of the live rows
+
+    Copying keeps the ids of the countries an import updates, and only reads the live tables.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        live_schema = get_live_schema(cursor)
+        cursor.execute(f'DROP SCHEMA IF EXISTS {quote(STAGING_SCHEMA)} CASCADE')
+        cursor.execute(f'CREATE SCHEMA {quote(STAGING_SCHEMA)}')
+        with use_schema(STAGING_SCHEMA):
+            with connection.schema_editor() as editor:
+                for model in DATASET_MODELS:
+                    editor.create_model(model)
+            if copy_live:
+                for model in DATASET_MODELS:
+                    table = quote(model._meta.db_table)
+                    columns = ', '.join(quote(field.column) for field in model._meta.concrete_fields)
+                    cursor.execute(
+                        f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {quote(live_schema)}.{table}'
+                    )
+                for sql in connection.ops.sequence_reset_sql(no_style(), DATASET_MODELS):
+                    cursor.execute(sql)
+
+
+def drop_staging():
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP SCHEMA IF EXISTS {quote(STAGING_SCHEMA)} CASCADE')
+
+
+def is_lock_timeout(error):
+    """Whether a database error was raised by lock_timeout, with psycopg 3 or psycopg2"""
+    cause = error.__cause__
+    return LOCK_NOT_AVAILABLE in (getattr(cause, 'sqlstate', None), getattr(cause, 'pgcode', None))
+
+
+def get_applied_migrations(cursor, schema=None):
+    """Return the names of the applied countryapp migrations, or those stashed in schema"""
+    if schema is None:
+        cursor.execute('SELECT name FROM django_migrations WHERE app = %s ORDER BY name', [Country._meta.app_label])
+    else:
+        cursor.execute(f'SELECT name FROM {quote(schema)}.{quote(STASHED_MIGRATIONS_TABLE)} ORDER BY name')
+    return [name for name, in cursor.fetchall()]
+
+
+def swap(schema, keep_as=None, lock_timeout=SWAP_LOCK_TIMEOUT, attempts=SWAP_ATTEMPTS, retry_delay=SWAP_RETRY_DELAY):
+    """Exchange the country tables of the live schema and schema in one transaction
+
+    Only renames happen while the live tables are locked, so readers wait for
+    milliseconds. A swap that doesn't get the locks within lock_timeout ms is rolled
+    back and tried again, up to attempts times; then OperationalError is raised.
+    With keep_as, schema is renamed to keep_as in the same transaction, replacing it,
+    with a record of the migrations the tables it now holds were created with.
+    """
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                live_schema = get_live_schema(cursor)
+                cursor.execute("SELECT set_config('lock_timeout', %s, true)", [str(lock_timeout)])
+                cursor.execute(f'CREATE SCHEMA {quote(SWAP_SCHEMA)}')
+                for source, target in [(live_schema, SWAP_SCHEMA), (schema, live_schema), (SWAP_SCHEMA, schema)]:
+                    for model in DATASET_MODELS:
+                        cursor.execute(
+                            f'ALTER TABLE {quote(source)}.{quote(model._meta.db_table)} SET SCHEMA {quote(target)}'
+                        )
+                cursor.execute(f'DROP SCHEMA {quote(SWAP_SCHEMA)}')
+                if keep_as:
+                    cursor.execute(f'DROP SCHEMA IF EXISTS {quote(keep_as)} CASCADE')
+                    cursor.execute(f'ALTER SCHEMA {quote(schema)} RENAME TO {quote(keep_as)}')
+                    # The app label is a constant, inlined as CREATE TABLE AS can't take parameters
+                    cursor.execute(
+                        f'CREATE TABLE {quote(keep_as)}.{quote(STASHED_MIGRATIONS_TABLE)} AS '
+                        f"SELECT name FROM django_migrations WHERE app = '{Country._meta.app_label}'"
+                    )
+            break
+        except OperationalError as e:
+            if attempt == attempts - 1 or not is_lock_timeout(e):
+                raise
+        time.sleep(retry_delay * 2 ** attempt)
+    bump_dataset_version()
+
+
+def publish(**options):
+    """Make the staging tables live, keeping the replaced ones as the previous dataset
+
+    options are passed on to swap().
+    """
+    swap(STAGING_SCHEMA, keep_as=PREVIOUS_SCHEMA, **options)
+
+
+def rollback(**options):
+    """Swap the previous dataset back in; rolling back again restores the one replaced
+
+    Raises RollbackError when countryapp migrations were applied or unapplied since the
+    previous tables were stashed, as they no longer match the models. options are passed
+    on to swap().
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s)', [f'{quote(PREVIOUS_SCHEMA)}.{quote(STASHED_MIGRATIONS_TABLE)}'])
+        if cursor.fetchone()[0] is None:
+            raise RollbackError("The previous tables have no record of their migrations.")
+        if get_applied_migrations(cursor, PREVIOUS_SCHEMA) != get_applied_migrations(cursor):
+            raise RollbackError("Country migrations changed since the previous tables were stashed.")
+    swap(PREVIOUS_SCHEMA, **options)
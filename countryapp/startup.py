@@ -0,0 +1,93 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.urls import get_resolver
+from django.urls.resolvers import RoutePattern, URLResolver
+from django.utils.module_loading import import_string
+from django.utils.translation import get_language
+
+from .routers import PRIMARY_DATABASE, get_replica_aliases, use_replicas
+
+logger = logging.getLogger('countryapp.performance')
+
+
+class LazyURLResolver(URLResolver):
+    """URLResolver of a namespaced URLconf that is imported when one of its URLs is resolved or reversed
+
+    A plain resolver imports every included URLconf the first time any URL is
+    reversed, even a login redirect. The parent only needs this one's namespace,
+    so populating it waits until the namespace itself is used.
+    """
+
+    def _populate(self):
+        # Called by the parent resolver while it populates
+        pass
+
+    def _load(self):
+        if get_language() not in self._reverse_dict:
+            super()._populate()
+
+    @property
+    def reverse_dict(self):
+        self._load()
+        return super().reverse_dict
+
+    @property
+    def namespace_dict(self):
+        self._load()
+        return super().namespace_dict
+
+    @property
+    def app_dict(self):
+        self._load()
+        return super().app_dict
+
+
+def lazy_include(route, module, namespace):
+    """Like path(route, include((module, namespace))), but module is only imported when it is used"""
+    return LazyURLResolver(RoutePattern(route, is_endpoint=False), module, app_name=namespace, namespace=namespace)
+
+
+def lazy_view(view_path, **initkwargs):
+    """Return a view that imports the class-based view at view_path on its first call
+
+    The URL can be named and reversed without importing the view's module.
+    """
+    view = None
+
+    def lazy(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(view_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    return lazy
+
+
+def warm_up():
+    """Do the work of the first request before any request arrives
+
+    Connects to the databases, loads the URLconf and the API views, and fills the
+    cache with the first page of countries. Failures are logged, never raised, so
+    a database that isn't reachable yet doesn't stop the process from starting.
+    """
+    started = time.perf_counter()
+    try:
+        for alias in [PRIMARY_DATABASE, *get_replica_aliases()]:
+            connections[alias].ensure_connection()
+        get_resolver().url_patterns
+
+        from .views import StandardResultsSetPagination, get_country_list_page
+        with use_replicas():
+            get_country_list_page(1, StandardResultsSetPagination.page_size)
+        if settings.WARMUP_SCHEMA:
+            from .schema import get_schema_hash
+            get_schema_hash()
+    except Exception:
+        logger.warning('Warm-up failed', exc_info=True)
+    else:
+        # Same as at the end of a request: pooled or expired connections are released
+        close_old_connections()
+        logger.info('Warm-up took %.1f ms', (time.perf_counter() - started) * 1000)
@@ -0,0 +1,13 @@
+"""Static files storage of deployments, see STATIC_MANIFEST in settings.py"""
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class HashedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """Hashed, precompressed static files whose hashed names are linked whatever DEBUG is
+
+    Django's manifest storage links the plain names while DEBUG is on, which
+    WhiteNoise would then serve without the long lived caching.
+    """
+
+    def url(self, name, force=False):
+        return super().url(name, force=True)
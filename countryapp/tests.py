@@ -1,3 +1,1049 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+import brotli
+import numpy as np
+import requests
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.models.deletion import Collector
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.templatetags.static import static
+from django.urls import reverse
+from PIL import Image
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework.authtoken.models import Token
+
+from .assets import source_path
+from .authentication import USER_CACHE_KEY, get_cached_user
+from .caching import _flights, bump_dataset_version, cached, get_dataset_version, take_served_version
+from .benchmarking import FORMAT_DECODERS, get_benchmark_user, get_endpoints, load_snapshot
+from .compression import choose_encoding
+from .fetching import FIELD_GROUPS, fetch_countries
+from .headers import parse_quality_header
+from .indexes import get_language_index, resolve_phone_numbers
+from .instrumentation import fingerprint_sql
+from .localization import get_accept_language
+from .management.commands.generate_countries import SYNTHETIC_STATUS
+from .metrics import record_import
+from .models import BorderCountry, Country, CountryLanguage, CountryTranslation, Language
+from .postal import format_postal_code, validate_postal_codes
+from .renderers import to_columns
+from .routers import PrimaryReplicaRouter, use_replicas
+from .schema import check_schema_file
+from .staging import (
+    PREVIOUS_SCHEMA, STAGING_SCHEMA, RollbackError, create_staging, publish, rollback, schema_exists, use_schema,
+)
+from .startup import warm_up
+
+QUERY_PROFILES_PATH = Path(__file__).resolve().parent / 'fixtures' / 'query_profiles.json'
+
+
+class SnapshotAPITestCase(TestCase):
+    """Tests against the country snapshot, each logged in and with cold caches so they don't depend on test order"""
+
+    @classmethod
+    def setUpTestData(cls):
+        load_snapshot()
+        cls.user = get_benchmark_user()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+
+# Recorded with the user cache on, as when the cache is shared through REDIS_URL
+@override_settings(AUTH_USER_CACHE_SECONDS=300)
+class QueryProfileTests(SnapshotAPITestCase):
+    """Guard the number and shape of SQL queries every endpoint runs
+
+    Each request is compared with the profile stored in fixtures/query_profiles.json:
+    a test fails when a query shape shows up more often than recorded or a new shape
+    appears. When a change is intentional, re-record the profiles with
+
+        UPDATE_QUERY_PROFILES=1 python manage.py test countryapp
+
+    and commit the updated file with the change.
+    """
+    update_profiles = os.environ.get('UPDATE_QUERY_PROFILES') == '1'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.expected_profiles = {}
+        if QUERY_PROFILES_PATH.exists():
+            cls.expected_profiles = json.loads(QUERY_PROFILES_PATH.read_text())
+        cls.recorded_profiles = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.update_profiles and cls.recorded_profiles:
+            profiles = {**cls.expected_profiles, **cls.recorded_profiles}
+            QUERY_PROFILES_PATH.write_text(json.dumps(dict(sorted(profiles.items())), indent=2) + '\n')
+        super().tearDownClass()
+
+    def assertQueryProfile(self, name, captured_queries):
+        """Check the queries of one request against the stored profile of name"""
+        fingerprints = Counter(fingerprint_sql(query['sql']) for query in captured_queries)
+        profile = {'count': len(captured_queries), 'fingerprints': dict(sorted(fingerprints.items()))}
+        if self.update_profiles:
+            self.recorded_profiles[name] = profile
+            return
+
+        expected = self.expected_profiles.get(name)
+        if expected is None:
+            self.fail(f"No query profile recorded for {name}, run with UPDATE_QUERY_PROFILES=1")
+        problems = []
+        for fingerprint, count in fingerprints.items():
+            expected_count = expected['fingerprints'].get(fingerprint)
+            if expected_count is None:
+                problems.append(f"new query ({count}x): {fingerprint}")
+            elif count > expected_count:
+                problems.append(f"{expected_count} -> {count}x: {fingerprint}")
+        if problems:
+            self.fail(
+                f"{name} ran {len(captured_queries)} queries (expected {expected['count']}):\n  "
+                + "\n  ".join(problems)
+            )
+
+    def request(self, method, path, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(path, **kwargs)
+        return response, context.captured_queries
+
+    def test_read_endpoints(self):
+        for name, path in get_endpoints():
+            with self.subTest(endpoint=name):
+                response, queries = self.request('get', path)
+                self.assertEqual(response.status_code, 200)
+                self.assertQueryProfile(name, queries)
+
+    def test_create_country(self):
+        payload = {
+            'common_name': 'Testland', 'official_name': 'Republic of Testland',
+            'cca2': 'TL', 'cca3': 'TST', 'region': 'Europe', 'population': 1000,
+        }
+        response, queries = self.request('post', reverse('country-list'), data=payload, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertQueryProfile('country-create', queries)
+
+    def test_update_country(self):
+        country = Country.objects.get(cca3='DEU')
+        response, queries = self.request(
+            'put', reverse('country-detail', args=[country.pk]),
+            data={'population': 84000000}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertQueryProfile('country-update', queries)
+
+    def test_delete_country(self):
+        country = Country.objects.get(cca3='DEU')
+        response, queries = self.request('delete', reverse('country-detail', args=[country.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertQueryProfile('country-delete', queries)
+
+    def test_token_authentication(self):
+        token = Token.objects.create(user=self.user)
+        self.client.logout()
+        headers = {'Authorization': f'Token {token.key}'}
+        self.request('get', reverse('country-list'), headers=headers)
+        # The token and its user are cached now, so the auth tables aren't queried again
+        response, queries = self.request('get', reverse('country-list'), headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertQueryProfile('country-list-token', queries)
+
+
+class ResponseFormatTests(SnapshotAPITestCase):
+    """The compact formats carry the same data as JSON"""
+
+    def test_formats_match_json(self):
+        path = reverse('country-list')
+        data = self.client.get(path).json()
+        for media_type, format_name, expected in [
+            ('application/msgpack', 'msgpack', data),
+            ('application/cbor', 'cbor', data),
+            ('application/vnd.columnar+json', 'columnar', {**data, 'results': to_columns(data['results'])}),
+        ]:
+            with self.subTest(format=format_name):
+                response = self.client.get(path, headers={'Accept': media_type})
+                self.assertEqual(response['Content-Type'], media_type)
+                self.assertIn('Accept', response['Vary'])
+                self.assertEqual(FORMAT_DECODERS[format_name](response.content), expected)
+
+
+class OpenApiSchemaTests(TestCase):
+    """The stored OpenAPI schema must match what the views generate"""
+
+    def test_schema_file_is_current(self):
+        errors = check_schema_file(None)
+        self.assertEqual(errors, [], errors[0].hint if errors else '')
+
+    def test_schema_is_served_with_etag(self):
+        response = self.client.get(reverse('schema'))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('schema'), headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+
+class WarmUpTests(TestCase):
+    """After the warm-up the first page of countries is served from the cache"""
+
+    @classmethod
+    def setUpTestData(cls):
+        load_snapshot()
+        cls.user = get_benchmark_user()
+
+    def test_warm_up_caches_first_page(self):
+        cache.clear()
+        # It would close the connection holding the test transaction
+        with mock.patch('countryapp.startup.close_old_connections'):
+            warm_up()
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('country-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in context.captured_queries if 'countryapp_country' in query['sql']])
+
+
+class CompressionTests(SnapshotAPITestCase):
+    """Responses are compressed as negotiated, cached ones only once"""
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding('gzip, deflate, br'), 'br')
+        self.assertEqual(choose_encoding('br;q=0.5, gzip'), 'gzip')
+        self.assertEqual(choose_encoding('*;q=0.1'), 'br')
+        self.assertIsNone(choose_encoding('identity'))
+        self.assertIsNone(choose_encoding('br;q=0, gzip;q=0'))
+        self.assertIsNone(choose_encoding('*, br;q=0, gzip;q=0'))
+
+    def test_parse_quality_header(self):
+        self.assertEqual(
+            parse_quality_header('gzip, br ; q=0.5,, *;q=0, deflate;q=x'),
+            [('gzip', 1.0), ('br', 0.5), ('*', 0.0), ('deflate', 0.0)],
+        )
+
+    def test_cached_response_is_compressed_once(self):
+        path = reverse('country-list') + '?page_size=100'
+        plain = self.client.get(path).content
+        with mock.patch('countryapp.compression.brotli.compress', wraps=brotli.compress) as compress:
+            for _ in range(2):
+                response = self.client.get(path, headers={'Accept-Encoding': 'gzip, br'})
+                self.assertEqual(response['Content-Encoding'], 'br')
+                self.assertIn('Accept-Encoding', response['Vary'])
+                self.assertEqual(brotli.decompress(response.content), plain)
+        self.assertEqual(compress.call_count, 1)
+
+
+class MirrorAssetsTests(SnapshotAPITestCase):
+    """mirror_assets copies the images from a local mirror and the list points at the copies"""
+
+    def setUp(self):
+        super().setUp()
+        self.source_dir = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        for index, country in enumerate(Country.objects.all()):
+            for url in (country.flag_png_url, country.coat_of_arms_png_url):
+                path = source_path(self.source_dir, url)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                Image.new('RGB', (320, 200), (index * 10 % 256, 80, 160)).save(path)
+
+    def test_list_uses_sprite(self):
+        call_command('mirror_assets', source_dir=self.source_dir, stdout=io.StringIO())
+        results = self.client.get(reverse('country-list') + '?page_size=100').json()['results']
+        sprites = [country['flags']['sprite'] for country in results]
+        self.assertEqual(len({sprite['url'] for sprite in sprites}), 1)
+        self.assertEqual(len({(sprite['x'], sprite['y']) for sprite in sprites}), len(results))
+        self.assertTrue(all(country['flags']['png'].startswith('/media/countries/flags/') for country in results))
+
+        response = self.client.get(sprites[0]['url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as sheet:
+            self.assertGreaterEqual(sheet.width, max(sprite['x'] + sprite['width'] for sprite in sprites))
+
+    def test_unreadable_images_are_skipped(self):
+        broken = Country.objects.get(cca3='DEU')
+        source_path(self.source_dir, broken.flag_png_url).write_bytes(b'<html>Not found</html>')
+        output = io.StringIO()
+        call_command('mirror_assets', source_dir=self.source_dir, stdout=output)
+        self.assertIn(f"Could not read the image at {broken.flag_png_url}", output.getvalue())
+        broken.refresh_from_db()
+        self.assertIsNone(broken.flag_file)
+        self.assertIsNotNone(broken.coat_of_arms_file)
+        self.assertFalse(Country.objects.exclude(pk=broken.pk).filter(flag_file=None).exists())
+
+    def test_missing_mirrors_changed_urls(self):
+        call_command('mirror_assets', source_dir=self.source_dir, stdout=io.StringIO())
+        country = Country.objects.get(cca3='DEU')
+        old_flag = country.flag_file
+        country.flag_png_url = 'https://flagcdn.example/w320/de-new.png'
+        country.save()
+        path = source_path(self.source_dir, country.flag_png_url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        Image.new('RGB', (320, 200), (1, 2, 3)).save(path)
+
+        output = io.StringIO()
+        call_command('mirror_assets', source_dir=self.source_dir, missing=True, stdout=output)
+        self.assertIn('Fetching 1 images', output.getvalue())
+        country.refresh_from_db()
+        self.assertNotEqual(country.flag_file, old_flag)
+        self.assertEqual(country.flag_source_url, country.flag_png_url)
+
+    def test_views_do_not_import_pillow(self):
+        script = "import sys, django; django.setup(); import countryapp.views; print('PIL' in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'config.settings'},
+        )
+        self.assertEqual(result.stdout.strip(), 'False')
+
+
+class LanguageIndexTests(SnapshotAPITestCase):
+    """Language queries answered from the index agree with the database"""
+
+    def test_languages_all_and_any(self):
+        speaks_eng = Country.objects.filter(languages__language='eng')
+        speaks_fra = Country.objects.filter(languages__language='fra')
+        for match, expected in [
+            ('all', speaks_eng.filter(pk__in=speaks_fra)),
+            ('any', speaks_eng.union(speaks_fra)),
+        ]:
+            with self.subTest(match=match):
+                response = self.client.get(reverse('country-by-languages'), {'codes': 'fra,eng', 'match': match, 'page_size': 100})
+                self.assertEqual(response.status_code, 200)
+                expected_names = sorted(country.common_name for country in expected)
+                self.assertEqual([country['common_name'] for country in response.json()['results']], expected_names)
+                self.assertEqual(response.json()['count'], len(expected_names))
+
+    def test_language_counts(self):
+        response = self.client.get(reverse('language-list'))
+        counts = {language['code']: language['countries'] for language in response.json()}
+        self.assertEqual(counts['eng'], Country.objects.filter(languages__language='eng').count())
+        self.assertEqual(len(counts), Language.objects.count())
+
+    def test_unknown_language(self):
+        response = self.client.get(reverse('country-by-languages'), {'codes': 'eng,xxx'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_rebuilt_after_cache_timeout(self):
+        # A write in another process doesn't change the version seen here without a shared cache
+        self.assertEqual(get_language_index().unknown(['zzz']), ['zzz'])
+        Language.objects.create(code='zzz', name='Test')
+        self.assertEqual(get_language_index().unknown(['zzz']), ['zzz'])
+        # Once the shared entry has expired too, the index is rebuilt
+        cache.delete(f'index-languages:{get_dataset_version()}:all')
+        later = time.monotonic() + settings.COUNTRY_CACHE_SECONDS + 1
+        with mock.patch('countryapp.indexes.time.monotonic', return_value=later):
+            self.assertEqual(get_language_index().unknown(['zzz']), [])
+
+
+class CountryFilterTests(SnapshotAPITestCase):
+    """Filters and sort orders of the country list agree with the database"""
+
+    def get_names(self, **params):
+        response = self.client.get(reverse('country-list'), {'page_size': 100, **params})
+        self.assertEqual(response.status_code, 200)
+        return [country['common_name'] for country in response.json()['results']]
+
+    def test_filters(self):
+        for params, expected in [
+            ({'region': 'Europe', 'landlocked': 'true'}, Country.objects.filter(region='Europe', landlocked=True)),
+            ({'continent': 'Asia', 'un_member': 'false'}, Country.objects.filter(continents__contains=['Asia'], un_member=False)),
+            ({'timezone': 'UTC+01:00', 'car_side': 'left'}, Country.objects.filter(timezones__contains=['UTC+01:00'], car_side='left')),
+            ({'population_min': 1000000, 'area_max': 50000}, Country.objects.filter(population__gte=1000000, area__lte=50000)),
+        ]:
+            with self.subTest(params=params):
+                self.assertEqual(self.get_names(**params), list(expected.order_by('common_name', 'id').values_list('common_name', flat=True)))
+
+    def test_ordering(self):
+        populations = [country['population'] for country in self.client.get(
+            reverse('country-list'), {'region': 'Oceania', 'ordering': '-population', 'page_size': 100}
+        ).json()['results']]
+        self.assertEqual(populations, sorted(populations, reverse=True))
+
+        names = self.get_names(region='Africa', ordering='density')
+        densities = [
+            country.population / country.area
+            for country in sorted(Country.objects.filter(region='Africa'), key=lambda country: names.index(country.common_name))
+            if country.population is not None and country.area
+        ]
+        self.assertEqual(densities, sorted(densities))
+
+    def test_invalid_parameters(self):
+        for params in [{'ordering': 'capital'}, {'population_min': 10, 'population_max': 5}, {'landlocked': 'maybe'}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(reverse('country-list'), params).status_code, 400)
+
+
+class PhoneNumberResolveTests(SnapshotAPITestCase):
+    """Phone numbers resolve to the country of their longest dialing prefix"""
+
+    def test_longest_prefix(self):
+        results = resolve_phone_numbers(['+4930123456', '0049 (30) 123-456', '+12015550123', '+19995550123', '+35112345', '+999', 'call me'])
+        self.assertEqual([(result['prefix'], result['countries']) for result in results], [
+            ('+49', ['DEU']),
+            ('+49', ['DEU']),
+            ('+1201', ['USA']),
+            ('+1', ['CAN']),
+            ('+351', ['PRT']),
+            (None, []),
+            (None, []),
+        ])
+
+    def test_endpoint(self):
+        path = reverse('phone-number-resolve')
+        response = self.client.post(path, {'numbers': ['+33 1 23 45 67 89']}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [{'number': '+33 1 23 45 67 89', 'prefix': '+33', 'countries': ['FRA']}])
+        response = self.client.post(path, {'numbers': '+33123456789'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class PostalCodeValidationTests(SnapshotAPITestCase):
+    """Postal codes are checked against the country regex and written like its format"""
+
+    def test_format(self):
+        self.assertEqual(format_postal_code('1000001', '####-###'), '1000-001')
+        self.assertEqual(format_postal_code('SW1A1AA', '@# #@@|@## #@@|@@# #@@|@@## #@@|@#@ #@@|@@#@ #@@|GIR0AA'), 'SW1A 1AA')
+        self.assertIsNone(format_postal_code('12345', '####'))
+        self.assertIsNone(format_postal_code('١٠١١٥', '#####'))
+
+    def test_validate(self):
+        results = validate_postal_codes([
+            ('DEU', '10115'), ('de', ' 10115 '), ('PRT', '1000-001'), ('GBR', 'sw1a1aa'),
+            ('NLD', '1012 AB'), ('USA', '10001-1234'), ('DEU', '1011'), ('XXX', '10115'), ('DEU', '١٠١١٥'),
+        ])
+        self.assertEqual([(result['valid'], result['normalized']) for result in results], [
+            (True, '10115'), (True, '10115'), (True, '1000-001'), (True, 'SW1A 1AA'),
+            (True, '1012 AB'), (True, '10001-1234'), (False, None), (False, None), (False, None),
+        ])
+
+    def test_endpoint(self):
+        path = reverse('postal-code-validate')
+        response = self.client.post(path, {'items': [['FRA', '75001'], ['FRA', '7500']]}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['valid'] for result in response.json()['results']], [True, False])
+        response = self.client.post(path, {'items': [['FRA']]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class LocalizationTests(SnapshotAPITestCase):
+    """Country names come in the language of ?lang= or Accept-Language"""
+
+    def test_list_sorted_by_localized_name(self):
+        expected = sorted(
+            CountryTranslation.objects.filter(language_code='deu').values_list('common_name', flat=True)
+        )
+        for params, headers in [({'lang': 'de'}, {}), ({}, {'Accept-Language': 'de-CH, en;q=0.8'})]:
+            with self.subTest(params=params, headers=headers):
+                response = self.client.get(reverse('country-list'), {'page_size': 100, **params}, headers=headers)
+                self.assertIn('Accept-Language', response['Vary'])
+                self.assertEqual([country['common_name'] for country in response.json()['results']], expected)
+        english = self.client.get(reverse('country-list'), {'page_size': 100}).json()['results']
+        self.assertEqual([country['common_name'] for country in english], sorted(Country.objects.values_list('common_name', flat=True)))
+        self.assertEqual(english[0]['official_name'], Country.objects.get(pk=english[0]['id']).official_name)
+
+    def test_accept_language(self):
+        self.assertEqual(get_accept_language('xx, en;q=0.5, fr;q=0.9'), 'fra')
+        self.assertEqual(get_accept_language('de;q=0, fr-CA;q=0.1'), 'fra')
+        self.assertEqual(get_accept_language('de;q=x, *'), 'eng')
+        self.assertEqual(get_accept_language(None), 'eng')
+
+    def test_detail_and_search(self):
+        country = Country.objects.get(cca3='DEU')
+        response = self.client.get(reverse('country-detail', args=[country.pk]), {'lang': 'fra'})
+        self.assertEqual(response.json()['name']['common'], 'Allemagne')
+        response = self.client.get(reverse('country-search'), {'q': 'Deutsch', 'lang': 'deu'})
+        self.assertEqual([country['common_name'] for country in response.json()['results']], ['Deutschland'])
+
+    def test_unknown_language(self):
+        self.assertEqual(self.client.get(reverse('country-list'), {'lang': 'xx'}).status_code, 400)
+        response = self.client.get(reverse('country-list'), headers={'Accept-Language': 'xx'})
+        self.assertEqual(response.status_code, 200)
+
+
+class DistanceMatrixTests(SnapshotAPITestCase):
+    """Distances between capitals are great-circle distances in km"""
+
+    def test_matrix(self):
+        response = self.client.get(reverse('distance-matrix'), {'countries': 'DEU,FRA', 'to_countries': 'ESP,FRA,USA'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([label['country'] for label in data['rows']], ['DEU', 'FRA'])
+        self.assertEqual([label['country'] for label in data['columns']], ['ESP', 'FRA', 'USA'])
+        # Berlin - Paris is about 880 km
+        self.assertAlmostEqual(data['distances'][0][1], 878, delta=10)
+        self.assertEqual(data['distances'][1][1], 0)
+
+    def test_full_matrix_as_npy(self):
+        response = self.client.get(reverse('distance-matrix'), headers={'Accept': 'application/x-npy'})
+        self.assertEqual(response.status_code, 200)
+        matrix = np.load(io.BytesIO(response.content))
+        countries = response['X-Distance-Rows'].split(',')
+        self.assertEqual(matrix.shape, (len(countries), len(countries)))
+        self.assertEqual(len(countries), Country.objects.filter(capitals__latitude__isnull=False).distinct().count())
+        np.testing.assert_allclose(matrix, matrix.T)
+        np.testing.assert_array_equal(np.diag(matrix), 0)
+
+    def test_unknown_and_too_large(self):
+        self.assertEqual(self.client.get(reverse('distance-matrix'), {'countries': 'DEU,XXX'}).status_code, 404)
+        with self.settings(DISTANCE_MATRIX_MAX_CELLS=10):
+            self.assertEqual(self.client.get(reverse('distance-matrix')).status_code, 400)
+
+
+class CacheCoalescingTests(TestCase):
+    """Concurrent misses of a cached entry share one build"""
+
+    def setUp(self):
+        cache.clear()
+        self.release = threading.Event()
+        self.builds = []
+
+    def slow_build(self, value):
+        def build():
+            self.builds.append(value)
+            self.release.wait(5)
+            return value
+        return build
+
+    def start_leader(self, value):
+        results = []
+        leader = threading.Thread(target=lambda: results.append(cached('test', 'key', self.slow_build(value))))
+        leader.start()
+        while not self.builds:
+            time.sleep(0.001)
+        return leader, results
+
+    def test_concurrent_misses_build_once(self):
+        leader, results = self.start_leader('built')
+        flight = _flights[f'test:{get_dataset_version()}:key']
+        wait = self.enterContext(mock.patch.object(flight.done, 'wait', wraps=flight.done.wait))
+        follower = threading.Thread(target=lambda: results.append(cached('test', 'key', self.slow_build('again'))))
+        follower.start()
+        # Only finish the build once the follower waits for it
+        while not wait.called:
+            time.sleep(0.001)
+        self.release.set()
+        leader.join()
+        follower.join()
+        self.assertEqual(results, ['built', 'built'])
+        self.assertEqual(self.builds, ['built'])
+
+    def test_stale_while_revalidate(self):
+        cached('test', 'key', lambda: 'old')
+        old_version = get_dataset_version()
+        bump_dataset_version()
+        leader, results = self.start_leader('new')
+        self.assertEqual(cached('test', 'key', self.slow_build('again')), 'old')
+        self.assertEqual(take_served_version(), old_version)
+        self.release.set()
+        leader.join()
+        self.assertEqual(results, ['new'])
+        self.assertEqual(cached('test', 'key', self.slow_build('again')), 'new')
+        self.assertIsNone(take_served_version())
+
+    @override_settings(CACHE_COALESCE_LOCK_SECONDS=5)
+    def test_waits_for_other_process(self):
+        cache_key = f'test:{get_dataset_version()}:key'
+        cache.add(f'{cache_key}:lock', 1)
+        threading.Timer(0.1, lambda: cache.set(cache_key, 'built elsewhere')).start()
+        self.assertEqual(cached('test', 'key', self.slow_build('here')), 'built elsewhere')
+        self.assertEqual(self.builds, [])
+
+
+class FetchCountriesTests(TestCase):
+    """fetch_countries fetches the field groups from a stub API, retrying failures, and merges them"""
+
+    def setUp(self):
+        with open(settings.BASE_DIR / 'countryapp' / 'fixtures' / 'countries_snapshot.json', encoding='utf-8') as f:
+            self.snapshot = json.load(f)
+        self.requests = []
+        self.failures = Counter()
+        test = self
+
+        class StubAPI(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fields = parse_qs(urlsplit(self.path).query)['fields'][0].split(',')
+                test.requests.append((fields, self.headers.get('Accept-Encoding', '')))
+                if test.failures[fields[1]] > 0:
+                    test.failures[fields[1]] -= 1
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = gzip.compress(json.dumps(
+                    [{field: country[field] for field in fields if field in country} for country in test.snapshot]
+                ).encode())
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubAPI)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = f'http://127.0.0.1:{server.server_port}/v3.1/all'
+
+    def test_merges_field_groups(self):
+        self.failures[FIELD_GROUPS[0][1]] = 2
+        countries = fetch_countries(self.url, backoff=0)
+        self.assertEqual(
+            sorted(countries, key=lambda country: country['cca3']),
+            sorted(self.snapshot, key=lambda country: country['cca3']),
+        )
+        self.assertEqual(len(self.requests), len(FIELD_GROUPS) + 2)
+        self.assertTrue(all(len(fields) <= 10 and 'gzip' in encoding for fields, encoding in self.requests))
+
+    def test_gives_up_after_retries(self):
+        self.failures[FIELD_GROUPS[-1][1]] = 3
+        with self.assertRaises(requests.RequestException):
+            fetch_countries(self.url, retries=2, backoff=0)
+
+    def test_command_imports_from_api(self):
+        call_command('fetch_countries', api_url=self.url, backoff=0, stdout=io.StringIO())
+        self.assertEqual(Country.objects.count(), len(self.snapshot))
+        codes = {country['cca3'] for country in self.snapshot}
+        self.assertEqual(
+            BorderCountry.objects.count(),
+            sum(border in codes for country in self.snapshot for border in country.get('borders', [])),
+        )
+
+
+class StagedImportTests(TestCase):
+    """fetch_countries --staging loads staging tables and swaps them in, keeping the old data for --rollback"""
+
+    @classmethod
+    def setUpTestData(cls):
+        load_snapshot()
+
+    def test_staging_is_invisible_until_published(self):
+        populations = dict(Country.objects.values_list('cca3', 'population'))
+        ids = dict(Country.objects.values_list('cca3', 'id'))
+        create_staging()
+        with use_schema(STAGING_SCHEMA):
+            Country.objects.update(population=1)
+            Country.objects.create(cca3='ZZZ', cca2='ZZ', common_name='Staged', official_name='Staged', population=1)
+        self.assertEqual(dict(Country.objects.values_list('cca3', 'population')), populations)
+
+        version = get_dataset_version()
+        publish()
+        self.assertNotEqual(get_dataset_version(), version)
+        self.assertEqual(set(Country.objects.values_list('population', flat=True)), {1})
+        self.assertEqual(Country.objects.get(cca3='ZZZ').id, max(ids.values()) + 1)
+        self.assertLessEqual(ids.items(), dict(Country.objects.values_list('cca3', 'id')).items())
+
+        rollback()
+        self.assertEqual(dict(Country.objects.values_list('cca3', 'population')), populations)
+        rollback()
+        self.assertEqual(set(Country.objects.values_list('population', flat=True)), {1})
+
+    def test_command_reset_and_rollback(self):
+        snapshot = settings.BASE_DIR / 'countryapp' / 'fixtures' / 'countries_snapshot.json'
+        countries = Country.objects.count()
+        Country.objects.filter(cca3='DEU').update(population=1)
+        call_command('fetch_countries', file=str(snapshot), staging=True, reset=True, stdout=io.StringIO())
+        self.assertEqual(Country.objects.count(), countries)
+        self.assertNotEqual(Country.objects.get(cca3='DEU').population, 1)
+
+        call_command('fetch_countries', rollback=True, stdout=io.StringIO())
+        self.assertEqual(Country.objects.get(cca3='DEU').population, 1)
+        self.assertEqual(Country.objects.count(), countries)
+
+    def test_rollback_refuses_after_migrations(self):
+        create_staging()
+        publish()
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO django_migrations (app, name, applied) VALUES ('countryapp', '9999_new', now())")
+        with self.assertRaises(RollbackError):
+            rollback()
+        with self.assertRaisesMessage(CommandError, 'Country migrations changed'):
+            call_command('fetch_countries', rollback=True, stdout=io.StringIO())
+
+    def test_swap_retries_while_tables_are_locked(self):
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            other = connections.create_connection('default')
+            with other.cursor() as cursor:
+                cursor.execute('BEGIN')
+                cursor.execute(f'LOCK TABLE {Country._meta.db_table} IN ACCESS SHARE MODE')
+                locked.set()
+                release.wait(5)
+                cursor.execute('COMMIT')
+            other.close()
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        locked.wait(5)
+        create_staging()
+        threading.Timer(0.3, release.set).start()
+        with mock.patch('countryapp.staging.time.sleep', wraps=time.sleep) as sleep:
+            publish(lock_timeout=50)
+        holder.join()
+        self.assertGreaterEqual(sleep.call_count, 1)
+        self.assertTrue(schema_exists(PREVIOUS_SCHEMA))
+        self.assertFalse(schema_exists(STAGING_SCHEMA))
+
+
+class GenerateCountriesTests(TestCase):
+    """generate_countries COPYs synthetic countries in and --clear removes them"""
+
+    def test_generate_and_clear(self):
+        call_command('generate_countries', 30, seed=1, stdout=io.StringIO())
+        countries = Country.objects.filter(status=SYNTHETIC_STATUS)
+        self.assertEqual(countries.count(), 30)
+        country = countries.order_by('id').first()
+        self.assertIsInstance(country.gini, dict)
+        self.assertEqual(country.tlds, [f'.{country.cca2.lower()}'])
+        self.assertEqual(country.demonyms.count(), 2)
+        self.assertEqual(Country.objects.create(cca3='ZZZ', cca2='ZZ').id, countries.order_by('-id').first().id + 1)
+
+        call_command('generate_countries', 0, clear=True, stdout=io.StringIO())
+        self.assertFalse(Country.objects.filter(status=SYNTHETIC_STATUS).exists())
+
+
+class UserCacheTests(TestCase):
+    """The cached user has no password hash and is dropped when the user changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('cached', password='first password')
+        self.client.force_login(self.user)
+
+    @override_settings(AUTH_USER_CACHE_SECONDS=300)
+    def test_password_change_ends_sessions(self):
+        self.assertEqual(self.client.get(reverse('country-list')).status_code, 200)
+        entry = cache.get(USER_CACHE_KEY.format(self.user.pk))
+        self.assertNotIn('password', entry['fields'])
+        self.assertNotIn(self.user.password, repr(entry))
+
+        self.user.set_password('second password')
+        self.user.save()
+        self.assertIsNone(cache.get(USER_CACHE_KEY.format(self.user.pk)))
+        self.assertEqual(self.client.get(reverse('country-list')).status_code, 401)
+
+    @override_settings(AUTH_USER_CACHE_SECONDS=300)
+    def test_saving_cached_user_keeps_password(self):
+        get_cached_user(self.user.pk)
+        user = get_cached_user(self.user.pk)
+        user.first_name = 'Cached'
+        user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Cached')
+        self.assertTrue(self.user.check_password('first password'))
+
+    @override_settings(AUTH_USER_CACHE_SECONDS=300)
+    def test_changing_own_password_keeps_session(self):
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('admin:index')).status_code, 200)
+        response = self.client.post(reverse('admin:password_change'), {
+            'old_password': 'first password', 'new_password1': 'second Password 2', 'new_password2': 'second Password 2',
+        })
+        self.assertRedirects(response, reverse('admin:password_change_done'))
+        self.assertEqual(self.client.get(reverse('admin:index')).status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('second Password 2'))
+
+    def test_not_cached_without_shared_cache(self):
+        self.assertEqual(get_cached_user(self.user.pk), self.user)
+        self.assertIsNone(cache.get(USER_CACHE_KEY.format(self.user.pk)))
+
+
+@override_settings(ALLOWED_HOSTS=['.example', 'testserver'])
+class BulkListCacheTests(SnapshotAPITestCase):
+    """The bulk list is cached by cursor and limit alone"""
+
+    def test_hosts_and_other_parameters_share_the_entry(self):
+        path = reverse('country-bulk-list')
+        first = self.client.get(path + '?limit=5', headers={'Host': 'one.example'})
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(path + '?limit=5&junk=1', headers={'Host': 'two.example'})
+        self.assertFalse([query for query in queries if 'countryapp_country' in query['sql']])
+        self.assertEqual(first.json()['rows'], second.json()['rows'])
+        self.assertTrue(first.json()['next'].startswith('http://one.example/'))
+        self.assertTrue(second.json()['next'].startswith('http://two.example/'))
+
+        following = self.client.get(second.json()['next']).json()
+        self.assertEqual(len(following['rows']), 5)
+        self.assertNotEqual(following['rows'][0], first.json()['rows'][0])
+
+
+class LazyURLConfTests(TestCase):
+    """The admin and the documentation views are imported when their URLs are used, not before"""
+
+    def test_reversing_other_urls_imports_neither(self):
+        script = (
+            "import sys, django; django.setup(); from django.urls import resolve, reverse; "
+            "reverse('login'); reverse('swagger-ui'); resolve('/api/countries/'); "
+            "print([m for m in ('config.admin_urls', 'countryapp.admin', 'countryapp.docs') if m in sys.modules])"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'config.settings'},
+        )
+        self.assertEqual(result.stdout.strip(), '[]')
+
+    def test_lazy_urls_work(self):
+        self.assertEqual(reverse('admin:index'), '/admin/')
+        self.client.force_login(User.objects.create_superuser('admin', password='admin'))
+        self.assertEqual(self.client.get(reverse('admin:index')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('swagger-ui')).status_code, 200)
+
+
+class StaticFilesStorageTests(TestCase):
+    """With STATIC_MANIFEST's storage collected files are hashed and precompressed, and linked even with DEBUG on"""
+
+    def test_collected_files_are_hashed(self):
+        static_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(
+            DEBUG=True, STATIC_ROOT=static_root,
+            STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'countryapp.storage.HashedStaticFilesStorage'}},
+            # Only the project's own files, compressing the admin's and the docs' takes a while
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+        ))
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+        url = static('js/base.js')
+        self.assertRegex(url, r'^/static/js/base\.[0-9a-f]{12}\.js$')
+        hashed = Path(static_root, url.removeprefix('/static/'))
+        self.assertTrue(hashed.exists())
+        self.assertTrue(hashed.with_name(hashed.name + '.br').exists())
+
+
+@override_settings(ALLOWED_HOSTS=['.example', 'testserver'])
+class SearchCacheTests(SnapshotAPITestCase):
+    """Search results are cached by language, term, page and page size alone"""
+
+    def test_hosts_and_other_parameters_share_the_entry(self):
+        path = reverse('country-search') + '?q=a&page_size=2'
+        first = self.client.get(path, headers={'Host': 'one.example'})
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(path + '&junk=1', headers={'Host': 'two.example'})
+        self.assertFalse([query for query in queries if 'countryapp_country' in query['sql']])
+        self.assertEqual(first.json()['results'], second.json()['results'])
+        self.assertTrue(first.json()['next'].startswith('http://one.example/'))
+        self.assertTrue(second.json()['next'].startswith('http://two.example/'))
+        self.assertEqual(self.client.get(path + '&page=99').status_code, 404)
+
+
+class DatasetVersionTests(SnapshotAPITestCase):
+    """Writes change the dataset version explicitly, leaving Django's fast deletes in place"""
+
+    def test_related_rows_are_fast_deleted(self):
+        for queryset in (Session.objects.all(), CountryLanguage.objects.all()):
+            self.assertTrue(Collector(using='default').can_fast_delete(queryset), queryset.model)
+
+    def test_write_views_change_the_version(self):
+        country = Country.objects.get(cca3='DEU')
+        version = get_dataset_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('country-detail', args=[country.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertNotEqual(get_dataset_version(), version)
+
+
+REPLICA_ALIAS = 'replica_test'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA_ALIAS])
+class ReplicaRoutingTests(TransactionTestCase):
+    """Safe requests read from a replica until the client writes, then stay on the primary
+
+    The replica is a second connection to the test database, like a TEST MIRROR, so the
+    rows it reads have to be committed, hence a TransactionTestCase. It is added once the
+    test runner has set up the databases, which only knows the configured aliases.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        primary = connections['default'].settings_dict
+        connections.settings[REPLICA_ALIAS] = {**primary, 'TEST': {**primary['TEST'], 'MIRROR': 'default'}}
+        cls.databases = {*cls.databases, REPLICA_ALIAS}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.databases = cls.databases - {REPLICA_ALIAS}
+        connections[REPLICA_ALIAS].close()
+        del connections[REPLICA_ALIAS]
+        del connections.settings[REPLICA_ALIAS]
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(get_benchmark_user())
+
+    def get_country_list(self):
+        """Return the aliases the country list was read from"""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica:
+            response = self.client.get(reverse('country-list'))
+        self.assertEqual(response.status_code, 200)
+        return {
+            alias for alias, queries in (('default', primary), (REPLICA_ALIAS, replica))
+            if any('countryapp_country' in query['sql'] for query in queries)
+        }
+
+    def test_reads_use_replica_until_a_write(self):
+        self.assertEqual(self.get_country_list(), {REPLICA_ALIAS})
+        self.assertNotIn(settings.DATABASE_REPLICA_PIN_COOKIE, self.client.cookies)
+
+        cache.clear()
+        payload = {'common_name': 'Testland', 'official_name': 'Testland', 'cca2': 'TL', 'cca3': 'TST'}
+        response = self.client.post(reverse('country-list'), payload, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.cookies[settings.DATABASE_REPLICA_PIN_COOKIE]['max-age'], settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+        cache.clear()
+        self.assertEqual(self.get_country_list(), {'default'})
+        self.client.cookies.pop(settings.DATABASE_REPLICA_PIN_COOKIE)
+        cache.clear()
+        self.assertEqual(self.get_country_list(), {REPLICA_ALIAS})
+
+    def test_write_pins_the_context_to_primary(self):
+        router = PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_read(Country), 'default')
+        with use_replicas():
+            self.assertEqual(router.db_for_read(Country), REPLICA_ALIAS)
+            self.assertEqual(router.db_for_write(Country), 'default')
+            self.assertEqual(router.db_for_read(Country), 'default')
+
+
+class ReplicaSettingsTests(TestCase):
+    """DATABASE_REPLICAS entries become replica aliases, missing parts taken from the primary"""
+
+    def test_parsing(self):
+        script = (
+            "import json; from django.conf import settings; "
+            "print(json.dumps([settings.DATABASE_REPLICAS] + [{key: settings.DATABASES[alias][key] for key in "
+            "('NAME', 'USER', 'PASSWORD', 'HOST', 'PORT')} for alias in ('default', *settings.DATABASE_REPLICAS)]))"
+        )
+        env = {
+            **os.environ, 'DJANGO_SETTINGS_MODULE': 'config.settings',
+            'DATABASE_NAME': 'countries', 'DATABASE_USER': 'app', 'DATABASE_PASSWORD': 'secret',
+            'DATABASE_HOST': 'primary.example', 'DATABASE_PORT': '5432',
+            'DATABASE_REPLICAS': 'postgres://reader:pw@replica.example:6543/copy, replica2.example,/?host=/run/pg',
+        }
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True, env=env,
+        )
+        aliases, primary, *replicas = json.loads(result.stdout)
+        self.assertEqual(aliases, ['replica_1', 'replica_2', 'replica_3'])
+        self.assertEqual(replicas, [
+            {'NAME': 'copy', 'USER': 'reader', 'PASSWORD': 'pw', 'HOST': 'replica.example', 'PORT': 6543},
+            {**primary, 'HOST': 'replica2.example'},
+            {**primary, 'HOST': '/run/pg'},
+        ])
+
+
+class ServerTimingTests(SnapshotAPITestCase):
+    """Responses report where their time went in a Server-Timing header"""
+
+    def get_timings(self, response):
+        entries = [entry.strip() for entry in response['Server-Timing'].split(',')]
+        return {entry.split(';')[0]: entry for entry in entries}
+
+    @override_settings(PERFORMANCE_SERVER_TIMING=True)
+    def test_header(self):
+        response = self.client.get(reverse('country-list') + '?page_size=100', headers={'Accept-Encoding': 'br'})
+        self.assertEqual(response['Content-Encoding'], 'br')
+        timings = self.get_timings(response)
+        self.assertEqual(list(timings), ['db', 'serialize', 'render', 'compress', 'total'])
+        self.assertRegex(timings['db'], r'^db;dur=\d+\.\d{2};desc="[1-9]\d* queries"$')
+        for name in ('serialize', 'render', 'compress', 'total'):
+            self.assertRegex(timings[name], rf'^{name};dur=\d+\.\d{{2}}$')
+
+    @override_settings(PERFORMANCE_SERVER_TIMING=False)
+    def test_disabled(self):
+        response = self.client.get(reverse('country-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_fingerprint_sql(self):
+        self.assertEqual(
+            fingerprint_sql(
+                'SELECT "country"."id" FROM "country"\n  WHERE "country"."cca2" = \'D\'\'E\' AND "country"."area" > -1.5e3'
+                ' AND "country"."id" IN (1, 2, 3) LIMIT 21 '
+            ),
+            'SELECT "country"."id" FROM "country" WHERE "country"."cca2" = ? AND "country"."area" > ?'
+            ' AND "country"."id" IN (...) LIMIT ?',
+        )
+        self.assertEqual(
+            fingerprint_sql('SAVEPOINT "s140_x12"; DECLARE "_django_curs_140_sync_3" CURSOR FOR SELECT %s, $2'),
+            'SAVEPOINT "savepoint"; DECLARE "_django_curs_sync" CURSOR FOR SELECT ?, ?',
+        )
+        self.assertEqual(
+            fingerprint_sql('SELECT "t"."id" FROM "t" WHERE "t"."id" IN (4, 5)'),
+            fingerprint_sql('SELECT "t"."id" FROM "t" WHERE "t"."id" IN (6)'),
+        )
+
+
+class MetricsTests(SnapshotAPITestCase):
+    """/metrics exposes request, query and import metrics to Prometheus"""
+
+    def scrape(self, **headers):
+        response = self.client.get(reverse('metrics'), headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        return {
+            (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+            for family in text_string_to_metric_families(response.content.decode())
+            for sample in family.samples
+        }
+
+    def test_request_metrics(self):
+        labels = (('method', 'GET'), ('url_name', 'country-list'))
+        before = self.scrape()
+        self.assertEqual(self.client.get(reverse('country-list')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('country-list') + '?page=999').status_code, 404)
+        after = self.scrape()
+
+        def increase(name, labels):
+            return after[(name, labels)] - before.get((name, labels), 0)
+
+        self.assertEqual(increase('countryapp_requests_total', (*labels[:1], ('status', '200'), *labels[1:])), 1)
+        self.assertEqual(increase('countryapp_requests_total', (*labels[:1], ('status', '404'), *labels[1:])), 1)
+        self.assertEqual(increase('countryapp_request_latency_seconds_count', labels), 2)
+        self.assertEqual(increase('countryapp_request_latency_seconds_bucket', (('le', '+Inf'), *labels)), 2)
+        self.assertIn(('countryapp_request_latency_seconds_bucket', (('le', '0.005'), *labels)), after)
+        self.assertEqual(increase('countryapp_request_db_queries_count', (('url_name', 'country-list'),)), 2)
+        self.assertGreater(increase('countryapp_request_db_queries_sum', (('url_name', 'country-list'),)), 0)
+
+    def test_record_import(self):
+        record_import(1.5, {'countryapp_country': 250, 'countryapp_currency': 0})
+        metrics = self.scrape()
+        self.assertEqual(metrics[('countryapp_import_duration_seconds', ())], 1.5)
+        self.assertEqual(metrics[('countryapp_import_rows_written', (('table', 'countryapp_country'),))], 250)
+        self.assertEqual(metrics[('countryapp_import_rows_written', (('table', 'countryapp_currency'),))], 0)
+
+    @override_settings(METRICS_AUTH_TOKEN='scrape-secret')
+    def test_auth_token(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer wrong'})
+        self.assertEqual(response.status_code, 401)
+        metrics = self.scrape(Authorization='Bearer scrape-secret')
+        self.assertTrue(any(name == 'countryapp_requests_total' for name, labels in metrics))
@@ -2,14 +2,20 @@
 from django.urls import path
 
 from django.contrib.auth import views as auth_views
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+
+from .startup import lazy_view
 
 from .views import (
     # API views
     CountryListAPIView, CountryDetailAPIView, CountryByRegionAPIView,
-    CountryByLanguageAPIView, CountrySearchAPIView,
+    CountryByLanguageAPIView, CountryByLanguagesAPIView, CountrySearchAPIView, CountryBulkListAPIView,
+    LanguageListAPIView, PhoneNumberResolveAPIView, PostalCodeValidateAPIView, DistanceMatrixAPIView,
     # Template views
     HomeView, AboutView,
+    # Mirrored flag and coat of arms images
+    MirroredAssetView,
+    # Monitoring views
+    MetricsView,
     # Authentication views
     RegisterView
 )
@@ -23,15 +29,27 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     
     path('api/countries/', CountryListAPIView.as_view(), name='country-list'),
+    path('api/countries/bulk/', CountryBulkListAPIView.as_view(), name='country-bulk-list'),
     path('api/countries/<int:pk>/', CountryDetailAPIView.as_view(), name='country-detail'),
     path('api/countries/<int:pk>/region/', CountryByRegionAPIView.as_view(), name='country-by-region'),
     path('api/countries/language/<str:language_code>/', CountryByLanguageAPIView.as_view(), name='country-by-language'),
+    path('api/countries/languages/', CountryByLanguagesAPIView.as_view(), name='country-by-languages'),
+    path('api/languages/', LanguageListAPIView.as_view(), name='language-list'),
     path('api/countries/search/', CountrySearchAPIView.as_view(), name='country-search'),
+    path('api/phone-numbers/resolve/', PhoneNumberResolveAPIView.as_view(), name='phone-number-resolve'),
+    path('api/postal-codes/validate/', PostalCodeValidateAPIView.as_view(), name='postal-code-validate'),
+    path('api/distances/', DistanceMatrixAPIView.as_view(), name='distance-matrix'),
+    
+    # API Documentation URLs (schema, swagger-ui and redoc), imported on their first request
+    path('api/schema/', lazy_view('countryapp.docs.CachedSchemaView'), name='schema'),
+    path('api/schema/swagger-ui/', lazy_view('countryapp.docs.SchemaSwaggerView', url_name='schema'), name='swagger-ui'),
+    path('api/schema/redoc/', lazy_view('countryapp.docs.SchemaRedocView', url_name='schema'), name='redoc'),
+    
+    # Images copied by `mirror_assets`, under MEDIA_URL
+    path('media/countries/<path:name>', MirroredAssetView.as_view(), name='mirrored-asset'),
     
-    # API Documentation URLs
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    # Monitoring
+    path('metrics', MetricsView.as_view(), name='metrics'),
     
     # Template URL patterns
     path('', HomeView.as_view(), name='home'),
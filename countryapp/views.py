@@ -1,23 +1,43 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import serializers, status
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.core.paginator import InvalidPage, Paginator
 from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import constant_time_compare
+from django.views import View
 from django.views.generic import TemplateView
 from django.contrib.auth.forms import UserCreationForm
 from django.views.generic.edit import CreateView
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
-from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from urllib.parse import parse_qs, urlencode, urlsplit
+from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiParameter, OpenApiResponse
 
-from .models import (
-    Country, Language
-)
+from .assets import ASSET_PREFIX, asset_url
+from .caching import bump_dataset_version_on_commit, cached, get_dataset_version, take_served_version
+from .filters import filter_countries
+from .indexes import get_language_index, resolve_phone_numbers
+from .localization import DEFAULT_LANGUAGE, get_accept_language, get_request_language, localize
+from .metrics import render_metrics
+from .models import Country
+from .postal import validate_postal_codes
+from .renderers import NpyRenderer
 from .serializers import (
-    CountryDetailSerializer, CountryListRegionSerializer, CountryListSerializer, CountryCreateUpdateSerializer
+    CountryDetailSerializer, CountryListQuerySerializer, CountryListRegionSerializer, CountryListSerializer,
+    CountryCreateUpdateSerializer, DistanceLabelSerializer, PhoneNumberBatchSerializer, PhoneNumberCountrySerializer,
+    PostalCodeBatchSerializer, PostalCodeResultSerializer
 )
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -26,16 +46,104 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class CountryListAPIView(APIView):
+    def get_page_data(self, url, page_number, page_size, count, results):
+        """Return the paginated response data of a page loaded without paginate_queryset()"""
+        num_pages = max(1, -(-count // page_size))
+        next_link = previous_link = None
+        if page_number < num_pages:
+            next_link = replace_query_param(url, self.page_query_param, page_number + 1)
+        if page_number == 2:
+            previous_link = remove_query_param(url, self.page_query_param)
+        elif page_number > 2:
+            previous_link = replace_query_param(url, self.page_query_param, page_number - 1)
+        return {'count': count, 'next': next_link, 'previous': previous_link, 'results': results}
+
+
+class BulkCountryPagination(CursorPagination):
+    """Keyset pagination for the bulk country list, stable however deep the client scrolls"""
+    ordering = ('common_name', 'id')
+    page_size = 200
+    page_size_query_param = 'limit'
+    max_page_size = 1000
+
+
+class DatasetVersionMixin:
+    """Send the dataset version a response was built from in the X-Dataset-Version header
+
+    Clients key their caches by it and drop them when it changes; a response with
+    stale data from cached() carries the older version it came from. Responses also
+    vary by Accept, which selects the format (see countryapp/renderers.py).
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self.dataset_version = get_dataset_version()
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        served_version = take_served_version()
+        if getattr(self, 'dataset_version', None) is not None:
+            response['X-Dataset-Version'] = served_version or self.dataset_version
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+
+def get_country_list_page(page_number, page_size, filters=None, ordering='name', lang=DEFAULT_LANGUAGE):
+    """Return the count and serialized countries of one page of the country list
+
+    Shared by the list API and the home page, and cached per dataset version and
+    language. filters and ordering are validated by CountryListQuerySerializer.
+    Raises InvalidPage for pages that don't exist.
+    """
+    filters = filters or {}
+
+    def build():
+        countries = filter_countries(Country.objects.prefetch_related('capitals'), filters, ordering, lang)
+        paginator = Paginator(countries, page_size)
+        page = paginator.page(page_number)
+        return paginator.count, list(CountryListSerializer(page.object_list, many=True).data)
+
+    key = f'{lang}:{page_number}:{page_size}:{ordering}:{urlencode(sorted(filters.items()))}'
+    return cached('country-list', key, build)
+
+class LanguageMixin:
+    """Name countries in the language of ?lang= or Accept-Language, see countryapp/localization.py
+
+    Responses vary by Accept-Language since it can change the names.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        patch_vary_headers(response, ['Accept-Language'])
+        return response
+
+
+LANG_PARAMETER = OpenApiParameter(
+    name="lang",
+    description="Language of the country names, e.g. 'de' or 'deu' (defaults to the Accept-Language header)",
+    required=False,
+    type=str
+)
+
+
+class CountryListAPIView(LanguageMixin, DatasetVersionMixin, APIView):
     """List all countries or create a new one"""
     permission_classes = [IsAuthenticated]
     pagination_class = StandardResultsSetPagination
     
     @extend_schema(
         summary="List all countries",
-        description="Returns a paginated list of all countries",
-        responses={200: CountryListSerializer(many=True)},
+        description=(
+            "Returns a paginated list of all countries, optionally filtered and sorted. "
+            "In another language than English, names are translated and items are sorted by the localized name."
+        ),
+        responses={
+            200: CountryListSerializer(many=True),
+            400: OpenApiResponse(description="Invalid filter, ordering or language")
+        },
         parameters=[
+            CountryListQuerySerializer,
+            LANG_PARAMETER,
             OpenApiParameter(name="page", description="Page number", required=False, type=int),
             OpenApiParameter(name="page_size", description="Number of results per page", required=False, type=int)
         ],
@@ -43,15 +151,24 @@ class CountryListAPIView(APIView):
     )
     def get(self, request):
         """Get all countries with pagination"""
-        countries = Country.objects.all().order_by('common_name')
+        query = CountryListQuerySerializer(data=request.query_params.dict())
+        query.is_valid(raise_exception=True)
+        filters = dict(query.validated_data)
+        ordering = filters.pop('ordering')
+        lang = get_request_language(request)
         
-        # Implement pagination
         paginator = self.pagination_class()
-        result_page = paginator.paginate_queryset(countries, request)
-        serializer = CountryListSerializer(result_page, many=True)
+        page_size = paginator.get_page_size(request)
+        try:
+            page_number = int(request.query_params.get(paginator.page_query_param, 1))
+            count, results = get_country_list_page(page_number, page_size, filters, ordering, lang)
+        except (ValueError, InvalidPage):
+            raise NotFound(paginator.invalid_page_message)
         
         # Create response with pagination metadata
-        return paginator.get_paginated_response(serializer.data)
+        response = Response(paginator.get_page_data(request.build_absolute_uri(), page_number, page_size, count, results))
+        response.cache_compressed = True
+        return response
     
     @extend_schema(
         summary="Create a new country",
@@ -68,6 +185,7 @@ class CountryListAPIView(APIView):
         serializer = CountryCreateUpdateSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
+            bump_dataset_version_on_commit()
             # Return the newly created country with full details
             country = Country.objects.get(pk=serializer.instance.pk)
             response_serializer = CountryCreateUpdateSerializer(country)
@@ -75,30 +193,35 @@ class CountryListAPIView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CountryDetailAPIView(APIView):
+class CountryDetailAPIView(LanguageMixin, DatasetVersionMixin, APIView):
     """Retrieve, update or delete a country"""
     permission_classes = [IsAuthenticated]
     
-    def get_object(self, pk):
-        return get_object_or_404(Country, pk=pk)
+    def get_object(self, pk, lang=DEFAULT_LANGUAGE):
+        return get_object_or_404(localize(Country.objects.all(), lang), pk=pk)
     
     @extend_schema(
         summary="Get country details",
         description="Retrieves detailed information about a specific country",
         responses={
             200: CountryDetailSerializer,
+            400: OpenApiResponse(description="Unknown language"),
             404: OpenApiResponse(description="Country not found")
         },
         parameters=[
-            OpenApiParameter(name="id", location=OpenApiParameter.PATH, description="Country ID", required=True, type=int)
+            OpenApiParameter(name="id", location=OpenApiParameter.PATH, description="Country ID", required=True, type=int),
+            LANG_PARAMETER
         ],
         tags=["Countries"]
     )
     def get(self, request, pk):
         """Get details of a specific country"""
-        country = self.get_object(pk)
-        serializer = CountryDetailSerializer(country)
-        return Response(serializer.data)
+        lang = get_request_language(request)
+        
+        def build():
+            return CountryDetailSerializer(self.get_object(pk, lang)).data
+        
+        return Response(cached('country-detail', f'{lang}:{pk}', build))
     
     @extend_schema(
         summary="Update a country",
@@ -120,6 +243,7 @@ class CountryDetailAPIView(APIView):
         serializer = CountryCreateUpdateSerializer(country, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            bump_dataset_version_on_commit()
             # Return the updated country with full details
             updated_country = self.get_object(pk)
             response_serializer = CountryCreateUpdateSerializer(updated_country)
@@ -142,10 +266,11 @@ class CountryDetailAPIView(APIView):
         """Delete an existing country"""
         country = self.get_object(pk)
         country.delete()
+        bump_dataset_version_on_commit()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class CountryByRegionAPIView(APIView):
+class CountryByRegionAPIView(DatasetVersionMixin, APIView):
     """List countries in the same region as a specified country"""
     permission_classes = [IsAuthenticated]
     
@@ -176,7 +301,7 @@ class CountryByRegionAPIView(APIView):
         return Response(serializer.data)
 
 
-class CountryByLanguageAPIView(APIView):
+class CountryByLanguageAPIView(DatasetVersionMixin, APIView):
     """List countries that speak a specific language"""
     permission_classes = [IsAuthenticated]
     
@@ -194,16 +319,222 @@ class CountryByLanguageAPIView(APIView):
     )
     def get(self, request, language_code):
         """Get countries speaking the specified language"""
-        # Check if language exists
-        language = get_object_or_404(Language, code=language_code)
+        index = get_language_index()
+        if index.unknown([language_code]):
+            raise NotFound("No Language matches the given query.")
         
-        # Get countries that speak this language
-        countries = Country.objects.filter(languages__language=language)
-        serializer = CountryListSerializer(countries, many=True)
-        return Response(serializer.data)
+        country_ids = index.country_ids_in(index.match([language_code]))
+        return Response(get_countries_by_id(country_ids))
+
+
+def get_countries_by_id(country_ids):
+    """Return the serialized countries with country_ids, in that order"""
+    countries = Country.objects.filter(pk__in=country_ids).prefetch_related('capitals').in_bulk()
+    return CountryListSerializer([countries[pk] for pk in country_ids if pk in countries], many=True).data
 
 
-class CountrySearchAPIView(APIView):
+class CountryByLanguagesAPIView(DatasetVersionMixin, APIView):
+    """List countries that speak several languages, or any of them"""
+    permission_classes = [IsAuthenticated]
+    pagination_class = StandardResultsSetPagination
+    
+    @extend_schema(
+        summary="List countries by languages",
+        description=(
+            "Returns the countries that speak all of the given languages (`match=all`, the default) "
+            "or any of them (`match=any`), ordered by name"
+        ),
+        responses={
+            200: CountryListSerializer(many=True),
+            400: OpenApiResponse(description="Missing language codes or invalid match"),
+            404: OpenApiResponse(description="Unknown language code")
+        },
+        parameters=[
+            OpenApiParameter(name="codes", description="Comma separated language codes (e.g. 'eng,fra')", required=True, type=str),
+            OpenApiParameter(name="match", description="'all' or 'any'", required=False, type=str, enum=['all', 'any']),
+            OpenApiParameter(name="page", description="Page number", required=False, type=int),
+            OpenApiParameter(name="page_size", description="Number of results per page", required=False, type=int)
+        ],
+        tags=["Countries"]
+    )
+    def get(self, request):
+        """Get countries by a combination of languages"""
+        codes = sorted({code.strip() for code in request.query_params.get('codes', '').split(',') if code.strip()})
+        match = request.query_params.get('match', 'all')
+        if not codes or match not in ('all', 'any'):
+            return Response(
+                {"error": "Please provide language codes with 'codes' and 'all' or 'any' as 'match'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        index = get_language_index()
+        unknown = index.unknown(codes)
+        if unknown:
+            raise NotFound(f"Unknown language codes: {', '.join(unknown)}")
+        
+        paginator = self.pagination_class()
+        page_size = paginator.get_page_size(request)
+        try:
+            page_number = int(request.query_params.get(paginator.page_query_param, 1))
+        except ValueError:
+            raise NotFound(paginator.invalid_page_message)
+        
+        def build():
+            mask = index.match(codes, match_all=match == 'all')
+            count = mask.bit_count()
+            if page_number < 1 or (page_number - 1) * page_size >= max(count, 1):
+                raise InvalidPage
+            country_ids = index.country_ids_in(mask, (page_number - 1) * page_size, page_size)
+            return count, list(get_countries_by_id(country_ids))
+        
+        try:
+            count, results = cached('country-languages', f"{match}:{','.join(codes)}:{page_number}:{page_size}", build)
+        except InvalidPage:
+            raise NotFound(paginator.invalid_page_message)
+        return Response(paginator.get_page_data(request.build_absolute_uri(), page_number, page_size, count, results))
+
+
+class LanguageListAPIView(DatasetVersionMixin, APIView):
+    """List languages with the number of countries speaking them"""
+    permission_classes = [IsAuthenticated]
+    
+    @extend_schema(
+        summary="List languages",
+        description="Returns every language with the number of countries that speak it, most widely spoken first",
+        responses={200: inline_serializer('LanguageCount', {
+            'code': serializers.CharField(),
+            'name': serializers.CharField(),
+            'countries': serializers.IntegerField(),
+        }, many=True)},
+        tags=["Languages"]
+    )
+    def get(self, request):
+        """Get all languages with country counts"""
+        counts = sorted(get_language_index().counts(), key=lambda item: (-item[2], item[0]))
+        return Response([{'code': code, 'name': name, 'countries': count} for code, name, count in counts])
+
+
+class PhoneNumberResolveAPIView(DatasetVersionMixin, APIView):
+    """Find the countries of a batch of phone numbers"""
+    permission_classes = [IsAuthenticated]
+    
+    @extend_schema(
+        summary="Resolve phone numbers to countries",
+        description=(
+            "Returns, for each number in order, the longest dialing prefix (IDD root + suffix) it starts "
+            "with and the countries using that prefix. Numbers must be in international format "
+            "('+' or '00'); separators are ignored."
+        ),
+        request=PhoneNumberBatchSerializer,
+        responses={
+            200: inline_serializer('PhoneNumberResolution', {'results': PhoneNumberCountrySerializer(many=True)}),
+            400: OpenApiResponse(description="Invalid input")
+        },
+        tags=["Phone numbers"]
+    )
+    def post(self, request):
+        """Resolve a batch of phone numbers"""
+        serializer = PhoneNumberBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': resolve_phone_numbers(serializer.validated_data['numbers'])})
+
+
+class PostalCodeValidateAPIView(DatasetVersionMixin, APIView):
+    """Validate a batch of postal codes"""
+    permission_classes = [IsAuthenticated]
+    
+    @extend_schema(
+        summary="Validate postal codes",
+        description=(
+            "Checks each [country code, postal code] pair against the country's postal code regex and "
+            "returns, in order, whether it is valid and the code written like the country's format "
+            "(e.g. ['PRT', '1000001'] -> '1000-001')."
+        ),
+        request=PostalCodeBatchSerializer,
+        responses={
+            200: inline_serializer('PostalCodeValidation', {'results': PostalCodeResultSerializer(many=True)}),
+            400: OpenApiResponse(description="Invalid input")
+        },
+        tags=["Postal codes"]
+    )
+    def post(self, request):
+        """Validate a batch of postal codes"""
+        serializer = PostalCodeBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': validate_postal_codes(serializer.validated_data['items'])})
+
+
+def split_list(value, convert=str):
+    """Return the comma separated items of a query parameter, or None when it is absent"""
+    if value is None:
+        return None
+    return [convert(item.strip()) for item in value.split(',') if item.strip()]
+
+
+class DistanceMatrixAPIView(DatasetVersionMixin, APIView):
+    """Great-circle distances between capitals"""
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NpyRenderer]
+    
+    @extend_schema(
+        summary="Distance matrix between capitals",
+        description=(
+            "Returns the great-circle distances in km between two sets of capitals, given as countries "
+            "(cca3, located at their first capital) or capital ids. Without `to_countries` or `to_capitals` "
+            "the matrix is square, and without any set it covers all countries. Rows and columns follow the "
+            "order of the request. With `Accept: application/x-npy` (or `?format=npy`) the matrix is sent "
+            "as a float32 NumPy array, with the row and column countries in the `X-Distance-Rows` and "
+            "`X-Distance-Columns` headers."
+        ),
+        responses={
+            200: inline_serializer('DistanceMatrix', {
+                'rows': DistanceLabelSerializer(many=True),
+                'columns': DistanceLabelSerializer(many=True),
+                'distances': serializers.ListField(child=serializers.ListField(child=serializers.FloatField())),
+            }),
+            400: OpenApiResponse(description="Invalid capital ids or too large a matrix"),
+            404: OpenApiResponse(description="Unknown country or capital")
+        },
+        parameters=[
+            OpenApiParameter(name="countries", description="Comma separated cca3 codes (e.g. 'DEU,FRA')", required=False, type=str),
+            OpenApiParameter(name="capitals", description="Comma separated capital ids", required=False, type=str),
+            OpenApiParameter(name="to_countries", description="Comma separated cca3 codes of the columns", required=False, type=str),
+            OpenApiParameter(name="to_capitals", description="Comma separated capital ids of the columns", required=False, type=str)
+        ],
+        tags=["Distances"]
+    )
+    def get(self, request):
+        """Get the distances between capitals"""
+        # Imported here, NumPy is slow to import and only this endpoint needs it
+        from .distances import distance_matrix
+
+        params = request.query_params
+        try:
+            capitals = split_list(params.get('capitals'), int)
+            to_capitals = split_list(params.get('to_capitals'), int)
+        except ValueError:
+            return Response({"error": "Capital ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            labels, columns, distances = distance_matrix(
+                countries=split_list(params.get('countries'), str.upper),
+                capitals=capitals,
+                to_countries=split_list(params.get('to_countries'), str.upper),
+                to_capitals=to_capitals,
+                max_cells=settings.DISTANCE_MATRIX_MAX_CELLS,
+            )
+        except KeyError as e:
+            raise NotFound(f"Unknown countries or capitals: {', '.join(map(str, e.args[0]))}")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # JSON gets distances to 0.1 km, .npy the float32 values
+        if request.accepted_renderer.format != NpyRenderer.format:
+            distances = distances.round(1)
+        return Response({'rows': labels, 'columns': columns, 'distances': distances})
+
+
+class CountrySearchAPIView(LanguageMixin, DatasetVersionMixin, APIView):
     """Search countries by name (supports partial search)"""
     permission_classes = [IsAuthenticated]
     pagination_class = StandardResultsSetPagination
@@ -217,6 +548,7 @@ class CountrySearchAPIView(APIView):
         },
         parameters=[
             OpenApiParameter(name="q", description="Search term", required=True, type=str),
+            LANG_PARAMETER,
             OpenApiParameter(name="page", description="Page number", required=False, type=int),
             OpenApiParameter(name="page_size", description="Number of results per page", required=False, type=int)
         ],
@@ -225,6 +557,7 @@ class CountrySearchAPIView(APIView):
     def get(self, request, name=None):
         """Search countries by name"""
         search_term = name or request.query_params.get('q', '')
+        lang = get_request_language(request)
         
         if not search_term:
             return Response(
@@ -239,15 +572,81 @@ class CountrySearchAPIView(APIView):
             Q(alt_spellings__spelling__icontains=search_term) |
             Q(translations__common_name__icontains=search_term) |
             Q(translations__official_name__icontains=search_term)
-        ).distinct().order_by('common_name')
+        ).distinct()
+        countries = filter_countries(countries, {}, 'name', lang)
         
-        # Implement pagination
         paginator = self.pagination_class()
-        result_page = paginator.paginate_queryset(countries, request)
-        serializer = CountryListSerializer(result_page, many=True)
-        
-        # Create response with pagination metadata
-        return paginator.get_paginated_response(serializer.data)
+        page_size = paginator.get_page_size(request)
+        try:
+            page_number = int(request.query_params.get(paginator.page_query_param, 1))
+        except ValueError:
+            raise NotFound(paginator.invalid_page_message)
+
+        def build():
+            page = Paginator(countries, page_size).page(page_number)
+            return page.paginator.count, list(CountryListSerializer(page.object_list, many=True).data)
+
+        # Keyed by what selects the page, the links are built per request
+        try:
+            count, results = cached('country-search', f'{lang}:{page_number}:{page_size}:{search_term}', build)
+        except InvalidPage:
+            raise NotFound(paginator.invalid_page_message)
+        return Response(paginator.get_page_data(request.build_absolute_uri(), page_number, page_size, count, results))
+
+class CountryBulkListAPIView(DatasetVersionMixin, APIView):
+    """Compact list of all countries for infinite scrolling"""
+    permission_classes = [IsAuthenticated]
+    row_fields = ['id', 'common_name', 'cca2', 'capital', 'population', 'timezones', 'flag']
+
+    @extend_schema(
+        summary="Bulk list countries",
+        description=(
+            "Returns countries ordered by name as rows of values in the order given by `fields`. "
+            "Follow `next` to load the following rows."
+        ),
+        responses={200: inline_serializer('CountryBulkList', {
+            'next': serializers.URLField(allow_null=True),
+            'fields': serializers.ListField(child=serializers.CharField()),
+            'rows': serializers.ListField(child=serializers.ListField()),
+        })},
+        parameters=[
+            OpenApiParameter(name="cursor", description="Position returned in the previous `next` link", required=False, type=str),
+            OpenApiParameter(name="limit", description="Number of rows (max 1000)", required=False, type=int)
+        ],
+        tags=["Countries"]
+    )
+    def get(self, request):
+        """Get a slice of all countries as compact rows"""
+        paginator = BulkCountryPagination()
+        cursor = request.query_params.get(paginator.cursor_query_param, '')
+        limit = paginator.get_page_size(request)
+
+        def build():
+            countries = paginator.paginate_queryset(Country.objects.prefetch_related('capitals'), request, view=self)
+            rows = [
+                [
+                    country.id, country.common_name, country.cca2,
+                    [capital.name for capital in country.capitals.all()],
+                    country.population, country.timezones or [],
+                    asset_url(country.flag_thumbnail_file, country.flag_png_url),
+                ]
+                for country in countries
+            ]
+            next_link = paginator.get_next_link()
+            next_cursor = parse_qs(urlsplit(next_link).query)[paginator.cursor_query_param][0] if next_link else None
+            return {'next_cursor': next_cursor, 'fields': self.row_fields, 'rows': rows}
+
+        # Keyed by the position alone, so hosts and other query parameters share the entry
+        page = cached('country-bulk', f'{cursor}:{limit}', build)
+        next_link = None
+        if page['next_cursor']:
+            next_link = replace_query_param(
+                request.build_absolute_uri(), paginator.cursor_query_param, page['next_cursor']
+            )
+        response = Response({'next': next_link, 'fields': page['fields'], 'rows': page['rows']})
+        response.cache_compressed = True
+        return response
+
 
 class RegisterView(CreateView):
     """View for user registration"""
@@ -265,7 +664,55 @@ class HomeView(LoginRequiredMixin, TemplateView):
     template_name = 'countryapp/country_list.html'
     login_url = 'login'  # Redirect to login page if user is not authenticated
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Embed the first page so the table renders without waiting for another request
+        paginator = StandardResultsSetPagination()
+        count, results = get_country_list_page(
+            1, paginator.page_size, lang=get_accept_language(self.request.headers.get('Accept-Language'))
+        )
+        context['dataset_version'] = take_served_version() or get_dataset_version()
+        context['initial_countries'] = paginator.get_page_data(
+            reverse('country-list'), 1, paginator.page_size, count, results
+        )
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        # The embedded page is in the language of Accept-Language
+        patch_vary_headers(response, ['Accept-Language'])
+        return response
+
 class AboutView(LoginRequiredMixin, TemplateView):
     """About page view"""
     template_name = 'countryapp/about.html'
-    login_url = 'login'
\ No newline at end of file
+    login_url = 'login'
+
+class MirroredAssetView(View):
+    """Serve the images copied by `mirror_assets`
+
+    Their names change with their content, so browsers may keep them forever.
+    """
+
+    def get(self, request, name):
+        try:
+            file = default_storage.open(f'{ASSET_PREFIX}/{name}')
+        except (OSError, SuspiciousFileOperation):
+            raise Http404
+        response = FileResponse(file)
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
+
+class MetricsView(View):
+    """Prometheus scrape endpoint"""
+
+    def get(self, request):
+        token = settings.METRICS_AUTH_TOKEN
+        if token and not constant_time_compare(
+            request.headers.get('Authorization', ''), f'Bearer {token}'
+        ):
+            return HttpResponse(status=401)
+
+        payload, content_type = render_metrics()
+        return HttpResponse(payload, content_type=content_type)
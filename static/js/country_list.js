@@ -0,0 +1,636 @@
+// Global variables
+let currentPage = 1;
+let nextPageUrl = null;
+let prevPageUrl = null;
+let isSearchMode = false;
+let lastSearchTerm = '';
+let bulkNextUrl = null;
+let bulkLoading = false;
+let scrollObserver = null;
+let prefetchTimer = null;
+
+// Map that forgets the least recently used entries beyond its limit
+class LRUCache {
+    constructor(limit) {
+        this.limit = limit;
+        this.entries = new Map();
+    }
+    
+    get(key) {
+        if (!this.entries.has(key)) {
+            return undefined;
+        }
+        const value = this.entries.get(key);
+        this.entries.delete(key);
+        this.entries.set(key, value);
+        return value;
+    }
+    
+    set(key, value) {
+        this.entries.delete(key);
+        this.entries.set(key, value);
+        if (this.entries.size > this.limit) {
+            this.entries.delete(this.entries.keys().next().value);
+        }
+    }
+    
+    clear() {
+        this.entries.clear();
+    }
+}
+
+// API responses already loaded, valid for one dataset version
+const countryStore = {
+    version: String(JSON.parse(document.getElementById('datasetVersion').textContent)),
+    pages: new LRUCache(50),
+    details: new LRUCache(200),
+    regions: new Map(),
+    inflight: new Map()
+};
+
+// Drop everything cached when the server answers from a newer dataset
+function checkDatasetVersion(response) {
+    const version = response.headers.get('X-Dataset-Version');
+    if (version && version !== countryStore.version) {
+        countryStore.version = version;
+        countryStore.pages.clear();
+        countryStore.details.clear();
+        countryStore.regions.clear();
+    }
+}
+
+// Fetch JSON from the API; concurrent calls for the same URL share one request
+function getJSON(url) {
+    if (countryStore.inflight.has(url)) {
+        return countryStore.inflight.get(url);
+    }
+    const request = fetch(url)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`${response.status} ${response.statusText}`);
+            }
+            checkDatasetVersion(response);
+            return response.json();
+        })
+        .finally(() => countryStore.inflight.delete(url));
+    countryStore.inflight.set(url, request);
+    return request;
+}
+
+function pageKey(url) {
+    return new URL(url, window.location.origin).href;
+}
+
+// Show the first page embedded by the server, the API is only called for other pages
+document.addEventListener('DOMContentLoaded', function() {
+    const initialCountries = document.getElementById('initialCountries');
+    if (initialCountries) {
+        const data = JSON.parse(initialCountries.textContent);
+        countryStore.pages.set(pageKey('/api/countries/'), data);
+        showPage(data);
+    } else {
+        fetchCountries('/api/countries/');
+    }
+    
+    // Set up event listeners
+    document.getElementById('searchButton').addEventListener('click', searchCountries);
+    document.getElementById('countrySearch').addEventListener('keyup', function(event) {
+        if (event.key === 'Enter') {
+            searchCountries();
+        }
+    });
+    
+    document.getElementById('infiniteScroll').addEventListener('change', function() {
+        if (this.checked) {
+            startInfiniteScroll();
+        } else {
+            stopInfiniteScroll();
+            fetchCountries('/api/countries/');
+        }
+    });
+    
+    // Details buttons: open on click, start loading the country when hovered
+    const tableBody = document.getElementById('countriesTableBody');
+    tableBody.addEventListener('click', function(event) {
+        const button = event.target.closest('.details-button');
+        if (button) {
+            showCountryDetails(button);
+        }
+    });
+    tableBody.addEventListener('mouseover', function(event) {
+        const button = event.target.closest('.details-button');
+        if (button && !button.contains(event.relatedTarget)) {
+            clearTimeout(prefetchTimer);
+            prefetchTimer = setTimeout(() => loadCountry(button.getAttribute('data-id')).catch(() => {}), 100);
+        }
+    });
+    tableBody.addEventListener('mouseout', function(event) {
+        const button = event.target.closest('.details-button');
+        if (button && !button.contains(event.relatedTarget)) {
+            clearTimeout(prefetchTimer);
+        }
+    });
+    
+    document.getElementById('closeModal').addEventListener('click', closeModal);
+    document.getElementById('closeModalButton').addEventListener('click', closeModal);
+    
+    // Tab switching
+    document.querySelectorAll('.tabs a').forEach(tab => {
+        tab.addEventListener('click', function(e) {
+            e.preventDefault();
+            const tabId = this.getAttribute('data-tab');
+            
+            // Deactivate all tabs
+            document.querySelectorAll('.tabs li').forEach(item => {
+                item.classList.remove('is-active');
+            });
+            document.querySelectorAll('.tab-content').forEach(item => {
+                item.style.display = 'none';
+            });
+            
+            // Activate the selected tab
+            this.parentElement.classList.add('is-active');
+            document.getElementById(tabId + 'Tab').style.display = 'block';
+        });
+    });
+    
+    // Pagination event listeners
+    document.getElementById('prevPage').addEventListener('click', function() {
+        if (prevPageUrl) {
+            fetchCountries(prevPageUrl);
+        }
+    });
+    
+    document.getElementById('nextPage').addEventListener('click', function() {
+        if (nextPageUrl) {
+            fetchCountries(nextPageUrl);
+        }
+    });
+});
+
+// Show loading indicator
+function showLoading() {
+    document.getElementById('loadingIndicator').style.display = 'block';
+    document.getElementById('countriesTableBody').innerHTML = '';
+}
+
+// Hide loading indicator
+function hideLoading() {
+    document.getElementById('loadingIndicator').style.display = 'none';
+}
+
+// Fetch countries from the API, or from the pages already loaded
+function fetchCountries(url) {
+    const key = pageKey(url);
+    const cachedPage = countryStore.pages.get(key);
+    if (cachedPage) {
+        showPage(cachedPage);
+        return;
+    }
+    
+    showLoading();
+    
+    getJSON(key)
+        .then(data => {
+            countryStore.pages.set(key, data);
+            showPage(data);
+            hideLoading();
+        })
+        .catch(error => {
+            console.error('Error fetching countries:', error);
+            alert('Error loading countries. Please try again later.');
+            hideLoading();
+        });
+}
+
+function showPage(data) {
+    displayCountries(data.results);
+    updatePagination(data);
+}
+
+// Switch from numbered pages to loading rows from the bulk list while scrolling
+function startInfiniteScroll() {
+    isSearchMode = false;
+    document.getElementById('countrySearch').value = '';
+    document.getElementById('countriesTableBody').innerHTML = '';
+    document.querySelector('.pagination').style.display = 'none';
+    bulkNextUrl = '/api/countries/bulk/?limit=100';
+    
+    scrollObserver = new IntersectionObserver(entries => {
+        if (entries[0].isIntersecting) {
+            loadMoreCountries();
+        }
+    });
+    scrollObserver.observe(document.getElementById('scrollSentinel'));
+}
+
+function stopInfiniteScroll() {
+    if (scrollObserver) {
+        scrollObserver.disconnect();
+        scrollObserver = null;
+    }
+    bulkNextUrl = null;
+    document.getElementById('infiniteScroll').checked = false;
+    document.querySelector('.pagination').style.display = '';
+}
+
+function loadMoreCountries() {
+    if (!bulkNextUrl || bulkLoading) {
+        return;
+    }
+    bulkLoading = true;
+    
+    getJSON(bulkNextUrl)
+        .then(data => {
+            // Rows are arrays of values in the order of data.fields
+            appendCountries(data.rows.map(row => {
+                const values = Object.fromEntries(data.fields.map((field, index) => [field, row[index]]));
+                return {...values, flags: {png: values.flag}};
+            }));
+            bulkNextUrl = data.next;
+        })
+        .catch(error => {
+            console.error('Error fetching countries:', error);
+            bulkNextUrl = null;
+        })
+        .finally(() => {
+            bulkLoading = false;
+            // The observer only fires on changes, keep loading while the end is still visible
+            const sentinel = document.getElementById('scrollSentinel');
+            if (scrollObserver && sentinel.getBoundingClientRect().top < window.innerHeight) {
+                loadMoreCountries();
+            }
+        });
+}
+
+// Display countries
+function displayCountries(countries) {
+    const tableBody = document.getElementById('countriesTableBody');
+    tableBody.innerHTML = '';
+    
+    if (countries.length === 0) {
+        const row = document.createElement('tr');
+        row.innerHTML = '<td colspan="7" class="has-text-centered">No countries found</td>';
+        tableBody.appendChild(row);
+        return;
+    }
+    
+    appendCountries(countries);
+}
+
+// Flag of a table row: a cell of the sprite sheet when the flags are mirrored, so the
+// whole list loads a single image
+function flagImage(country) {
+    const sprite = country.flags.sprite;
+    if (sprite) {
+        return `<span class="flag-sprite" role="img" aria-label="${country.common_name} flag" style="
+            background-image: url('${sprite.url}');
+            background-position: -${sprite.x}px -${sprite.y}px;
+            width: ${sprite.width}px;
+            height: ${sprite.height}px;"></span>`;
+    }
+    const src = country.flags.thumbnail || country.flags.png || '/static/images/placeholder-flag.png';
+    return `<img src="${src}" alt="${country.common_name} flag">`;
+}
+
+// Add a table row per country
+function appendCountries(countries) {
+    const tableBody = document.getElementById('countriesTableBody');
+    
+    countries.forEach(country => {
+        const row = document.createElement('tr');
+        
+        // Format population with commas
+        const formattedPopulation = country.population ? country.population.toLocaleString() : 'N/A';
+        
+        // Get first capital if available
+        const capital = country.capital && country.capital.length > 0 ? country.capital[0] : 'N/A';
+        
+        // Get first timezone if available
+        const timezone = country.timezones && country.timezones.length > 0 ? country.timezones[0] : 'N/A';
+        
+        row.innerHTML = `
+            <td>
+                <figure class="image is-48x48">
+                    ${flagImage(country)}
+                </figure>
+            </td>
+            <td>${country.common_name}</td>
+            <td>${country.cca2}</td>
+            <td>${capital}</td>
+            <td>${formattedPopulation}</td>
+            <td>${timezone}</td>
+            <td>
+                <button class="button is-info is-small details-button" data-id="${country.id}">
+                    Details
+                </button>
+            </td>
+        `;
+        
+        tableBody.appendChild(row);
+    });
+}
+
+// Load a country's details, from the cache when it was opened or hovered before
+function loadCountry(countryId) {
+    const cachedCountry = countryStore.details.get(countryId);
+    if (cachedCountry) {
+        return Promise.resolve(cachedCountry);
+    }
+    return getJSON(`/api/countries/${countryId}/`).then(data => {
+        countryStore.details.set(countryId, data);
+        return data;
+    });
+}
+
+// Open the details of the country of a Details button
+function showCountryDetails(button) {
+    const countryId = button.getAttribute('data-id');
+    const cachedCountry = countryStore.details.get(countryId);
+    if (cachedCountry) {
+        openCountryDetails(cachedCountry);
+        return;
+    }
+    
+    // Show loading state on the button
+    const originalButtonText = button.innerHTML;
+    button.innerHTML = '<span class="icon is-small"><i class="fas fa-spinner fa-pulse"></i></span><span>Loading...</span>';
+    button.disabled = true;
+    
+    loadCountry(countryId)
+        .then(openCountryDetails)
+        .catch(error => {
+            console.error('Error fetching country:', error);
+            alert('Error loading country details. Please try again later.');
+        })
+        .finally(() => {
+            // Restore button state
+            button.innerHTML = originalButtonText;
+            button.disabled = false;
+        });
+}
+
+// Update pagination controls based on API response
+function updatePagination(data) {
+    const prevButton = document.getElementById('prevPage');
+    const nextButton = document.getElementById('nextPage');
+    const paginationList = document.getElementById('paginationList');
+    
+    // Update pagination URLs
+    nextPageUrl = data.next;
+    prevPageUrl = data.previous;
+    
+    // Update previous/next buttons
+    prevButton.classList.toggle('is-disabled', !prevPageUrl);
+    prevButton.setAttribute('aria-disabled', !prevPageUrl);
+    
+    nextButton.classList.toggle('is-disabled', !nextPageUrl);
+    nextButton.setAttribute('aria-disabled', !nextPageUrl);
+    
+    // Extract current page number and total pages
+    let currentPage = 1;
+    let totalPages = 1;
+    
+    if (data.count > 0 && data.results.length > 0) {
+        const pageSize = data.results.length;
+        totalPages = Math.ceil(data.count / pageSize);
+        
+        // Calculate current page from next/prev URLs
+        if (nextPageUrl) {
+            const nextPageMatch = nextPageUrl.match(/page=(\d+)/);
+            if (nextPageMatch) {
+                currentPage = parseInt(nextPageMatch[1]) - 1;
+            }
+        } else if (prevPageUrl) {
+            const prevPageMatch = prevPageUrl.match(/page=(\d+)/);
+            if (prevPageMatch) {
+                currentPage = parseInt(prevPageMatch[1]) + 1;
+            }
+        }
+    }
+    
+    // Clear pagination list
+    paginationList.innerHTML = '';
+    
+    // Add pagination numbers
+    addPaginationNumbers(paginationList, currentPage, totalPages);
+}
+
+// Add pagination numbers to the list
+function addPaginationNumbers(container, currentPage, totalPages) {
+    // Maximum number of page links to show
+    const maxVisiblePages = 5;
+    let startPage = Math.max(1, currentPage - Math.floor(maxVisiblePages / 2));
+    let endPage = Math.min(totalPages, startPage + maxVisiblePages - 1);
+    
+    // Adjust start page if we're near the end
+    if (endPage - startPage + 1 < maxVisiblePages) {
+        startPage = Math.max(1, endPage - maxVisiblePages + 1);
+    }
+    
+    // First page link
+    if (startPage > 1) {
+        addPageLink(container, 1, currentPage);
+        
+        // Add ellipsis if there's a gap
+        if (startPage > 2) {
+            addEllipsis(container);
+        }
+    }
+    
+    // Page links
+    for (let i = startPage; i <= endPage; i++) {
+        addPageLink(container, i, currentPage);
+    }
+    
+    // Last page link
+    if (endPage < totalPages) {
+        // Add ellipsis if there's a gap
+        if (endPage < totalPages - 1) {
+            addEllipsis(container);
+        }
+        
+        addPageLink(container, totalPages, currentPage);
+    }
+}
+
+// Add a page link to the pagination container
+function addPageLink(container, pageNum, currentPage) {
+    const li = document.createElement('li');
+    const a = document.createElement('a');
+    
+    a.className = 'pagination-link';
+    if (pageNum === currentPage) {
+        a.className += ' is-current';
+        a.setAttribute('aria-current', 'page');
+    }
+    a.setAttribute('aria-label', `Page ${pageNum}`);
+    a.innerText = pageNum;
+    
+    a.addEventListener('click', function() {
+        let url;
+        if (isSearchMode) {
+            url = `/api/countries/search/?q=${encodeURIComponent(lastSearchTerm)}&page=${pageNum}`;
+        } else {
+            url = `/api/countries/?page=${pageNum}`;
+        }
+        fetchCountries(url);
+    });
+    
+    li.appendChild(a);
+    container.appendChild(li);
+}
+
+// Add ellipsis to pagination
+function addEllipsis(container) {
+    const li = document.createElement('li');
+    const span = document.createElement('span');
+    span.className = 'pagination-ellipsis';
+    span.innerHTML = '&hellip;';
+    li.appendChild(span);
+    container.appendChild(li);
+}
+
+// Search countries by name
+function searchCountries() {
+    const searchTerm = document.getElementById('countrySearch').value.trim();
+    stopInfiniteScroll();
+    
+    if (searchTerm === '') {
+        // If search is empty, show all countries
+        isSearchMode = false;
+        fetchCountries('/api/countries/');
+        return;
+    }
+    
+    // Set search mode and save search term
+    isSearchMode = true;
+    lastSearchTerm = searchTerm;
+    
+    // Fetch search results
+    fetchCountries(`/api/countries/search/?q=${encodeURIComponent(searchTerm)}`);
+}
+
+// Open country details modal
+function openCountryDetails(country) {
+    // Set basic information
+    document.getElementById('modalCountryName').textContent = country.name.common;
+    document.getElementById('modalOfficialName').textContent = country.name.official;
+    document.getElementById('modalRegion').textContent = country.region || 'N/A';
+    document.getElementById('modalSubregion').textContent = country.subregion || 'N/A';
+    document.getElementById('modalPopulation').textContent = country.population ? country.population.toLocaleString() : 'N/A';
+    document.getElementById('modalArea').textContent = country.area ? country.area.toLocaleString() : 'N/A';
+    
+    // Set flag
+    const flagImg = document.getElementById('modalFlag');
+    flagImg.src = country.flags.png || '/static/images/placeholder-flag.png';
+    flagImg.alt = country.flags.alt || `${country.name.common} flag`;
+    
+    // Set currencies
+    const currenciesSpan = document.getElementById('modalCurrencies');
+    if (country.currencies && Object.keys(country.currencies).length > 0) {
+        const currencyList = Object.entries(country.currencies).map(([code, currency]) => {
+            return `${currency.name} (${currency.symbol || code})`;
+        }).join(', ');
+        currenciesSpan.textContent = currencyList;
+    } else {
+        currenciesSpan.textContent = 'N/A';
+    }
+    
+    // Set timezones
+    document.getElementById('modalTimezones').textContent = 
+        country.timezones && country.timezones.length > 0 ? country.timezones.join(', ') : 'N/A';
+        
+    // Set borders
+    const bordersSpan = document.getElementById('modalBorders');
+    if (country.borders && country.borders.length > 0) {
+        bordersSpan.textContent = country.borders.join(', ');
+    } else {
+        bordersSpan.textContent = 'None (Island or no land borders)';
+    }
+    
+    // Set Google Maps link
+    const mapsLink = document.getElementById('modalGoogleMaps');
+    if (country.maps && country.maps.googleMaps) {
+        mapsLink.href = country.maps.googleMaps;
+        mapsLink.style.display = 'inline-flex';
+    } else {
+        mapsLink.style.display = 'none';
+    }
+    
+    // Fetch and display regional countries
+    fetchRegionalCountries(country);
+    
+    // Display languages
+    displayLanguages(country);
+    
+    // Show the modal
+    document.getElementById('countryModal').classList.add('is-active');
+    document.body.classList.add('is-clipped');
+}
+
+// Load the other countries in a country's region; one request serves the whole region
+function loadRegionalCountries(country) {
+    const members = country.region && countryStore.regions.get(country.region);
+    if (members) {
+        return Promise.resolve(members.filter(member => member.id !== country.id));
+    }
+    return getJSON(`/api/countries/${country.id}/region/`).then(data => {
+        if (country.region) {
+            const allMembers = data.concat([{id: country.id, common_name: country.name.common}]);
+            allMembers.sort((a, b) => a.common_name.localeCompare(b.common_name));
+            countryStore.regions.set(country.region, allMembers);
+        }
+        return data;
+    });
+}
+
+// Fetch countries in the same region
+function fetchRegionalCountries(country) {
+    const regionalContainer = document.getElementById('regionalCountries');
+    regionalContainer.innerHTML = '<div class="is-loading">Loading...</div>';
+    
+    loadRegionalCountries(country)
+        .then(data => {
+            regionalContainer.innerHTML = '';
+            
+            if (data.length === 0) {
+                regionalContainer.innerHTML = '<p>No other countries in this region</p>';
+                return;
+            }
+            
+            data.forEach(country => {
+                const tag = document.createElement('span');
+                tag.className = 'tag is-primary is-medium';
+                tag.textContent = country.common_name;
+                regionalContainer.appendChild(tag);
+            });
+        })
+        .catch(error => {
+            console.error('Error fetching regional countries:', error);
+            regionalContainer.innerHTML = '<p class="has-text-danger">Error loading regional countries</p>';
+        });
+}
+
+// Display languages for a country
+function displayLanguages(country) {
+    const languagesContainer = document.getElementById('spokenLanguages');
+    languagesContainer.innerHTML = '';
+    
+    if (country.languages && Object.keys(country.languages).length > 0) {
+        Object.entries(country.languages).forEach(([code, name]) => {
+            const tag = document.createElement('span');
+            tag.className = 'tag is-info is-medium';
+            tag.textContent = name;
+            languagesContainer.appendChild(tag);
+        });
+    } else {
+        languagesContainer.innerHTML = '<p>No language information available</p>';
+    }
+}
+
+// Close the country details modal
+function closeModal() {
+    document.getElementById('countryModal').classList.remove('is-active');
+    document.body.classList.remove('is-clipped');
+}